@@ -0,0 +1,54 @@
+"""add mikrotik sync jobs table
+
+Revision ID: 3b8e61c4f2a9
+Revises: ec9502d5d7ea
+Create Date: 2026-10-17 10:12:31.482907
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b8e61c4f2a9'
+down_revision: Union[str, None] = 'ec9502d5d7ea'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('mikrotik_sync_jobs',
+    sa.Column('contrato_id', sa.UUID(), nullable=False),
+    sa.Column('router_id', sa.UUID(), nullable=True),
+    sa.Column('accion', sa.Enum('SYNC', 'LIMPIEZA', name='accionsync'), nullable=False),
+    sa.Column('estado', sa.Enum('PENDIENTE', 'EN_PROCESO', 'COMPLETADO', 'FALLIDO', name='estadosync'), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=True),
+    sa.Column('intentos', sa.Integer(), nullable=False),
+    sa.Column('next_attempt_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('worker', sa.String(length=100), nullable=True),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['contrato_id'], ['contratos.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['router_id'], ['routers.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_mikrotik_sync_jobs_contrato_id'), 'mikrotik_sync_jobs', ['contrato_id'], unique=False)
+    op.create_index('ix_mikrotik_sync_jobs_estado_next_attempt_at', 'mikrotik_sync_jobs', ['estado', 'next_attempt_at'], unique=False)
+    op.create_index(
+        'uq_mikrotik_sync_jobs_pending_sync', 'mikrotik_sync_jobs', ['contrato_id'], unique=True,
+        postgresql_where=sa.text("estado = 'PENDIENTE' AND accion = 'SYNC'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_mikrotik_sync_jobs_pending_sync', table_name='mikrotik_sync_jobs')
+    op.drop_index('ix_mikrotik_sync_jobs_estado_next_attempt_at', table_name='mikrotik_sync_jobs')
+    op.drop_index(op.f('ix_mikrotik_sync_jobs_contrato_id'), table_name='mikrotik_sync_jobs')
+    op.drop_table('mikrotik_sync_jobs')
+    sa.Enum(name='estadosync').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='accionsync').drop(op.get_bind(), checkfirst=True)
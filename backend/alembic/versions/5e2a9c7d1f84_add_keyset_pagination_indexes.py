@@ -0,0 +1,32 @@
+"""add keyset pagination indexes
+
+Revision ID: 5e2a9c7d1f84
+Revises: 9d4f27a1c6e3
+Create Date: 2026-10-17 14:05:31.842617
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e2a9c7d1f84'
+down_revision: Union[str, None] = '9d4f27a1c6e3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_pagos_created_at_id', 'pagos', ['created_at', 'id'], unique=False)
+    op.create_index('ix_router_events_created_at_id', 'router_events', ['created_at', 'id'], unique=False)
+    op.create_index(
+        'ix_router_events_router_id_created_at_id', 'router_events',
+        ['router_id', 'created_at', 'id'], unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_router_events_router_id_created_at_id', table_name='router_events')
+    op.drop_index('ix_router_events_created_at_id', table_name='router_events')
+    op.drop_index('ix_pagos_created_at_id', table_name='pagos')
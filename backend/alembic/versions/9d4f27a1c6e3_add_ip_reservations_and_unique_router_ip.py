@@ -0,0 +1,50 @@
+"""add ip reservations and unique router ip
+
+Revision ID: 9d4f27a1c6e3
+Revises: 3b8e61c4f2a9
+Create Date: 2026-10-17 11:40:08.215374
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d4f27a1c6e3'
+down_revision: Union[str, None] = '3b8e61c4f2a9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('ip_reservations',
+    sa.Column('router_id', sa.UUID(), nullable=False),
+    sa.Column('ip', sa.String(length=50), nullable=False),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('reservado_por', sa.UUID(), nullable=True),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['router_id'], ['routers.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['reservado_por'], ['usuarios.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('router_id', 'ip', name='uq_ip_reservations_router_id_ip')
+    )
+    op.create_index(op.f('ix_ip_reservations_expires_at'), 'ip_reservations', ['expires_at'], unique=False)
+
+    # Fails if duplicated IPs already exist; resolve them before upgrading:
+    # SELECT router_id, ip_asignada, count(*) FROM contratos
+    # WHERE router_id IS NOT NULL AND ip_asignada IS NOT NULL
+    # GROUP BY 1, 2 HAVING count(*) > 1;
+    op.create_index(
+        'uq_contratos_router_id_ip_asignada', 'contratos', ['router_id', 'ip_asignada'], unique=True,
+        postgresql_where=sa.text('router_id IS NOT NULL AND ip_asignada IS NOT NULL'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_contratos_router_id_ip_asignada', table_name='contratos')
+    op.drop_index(op.f('ix_ip_reservations_expires_at'), table_name='ip_reservations')
+    op.drop_table('ip_reservations')
@@ -0,0 +1,26 @@
+"""add pdf_firmado_sha256 to contratos
+
+Revision ID: a6c1e8f4b397
+Revises: e3b9a4d7c215
+Create Date: 2026-10-17 19:48:12.904127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6c1e8f4b397'
+down_revision: Union[str, None] = 'e3b9a4d7c215'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('contratos', sa.Column('pdf_firmado_sha256', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('contratos', 'pdf_firmado_sha256')
@@ -0,0 +1,41 @@
+"""add documentos table
+
+Revision ID: b2f7d9e4a815
+Revises: a6c1e8f4b397
+Create Date: 2026-10-17 20:31:07.225913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2f7d9e4a815'
+down_revision: Union[str, None] = 'a6c1e8f4b397'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('documentos',
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('storage_key', sa.String(length=500), nullable=False),
+        sa.Column('content_type', sa.String(length=100), nullable=False),
+        sa.Column('tamano_bytes', sa.BigInteger(), nullable=False),
+        sa.Column('paginas', sa.Integer(), nullable=True),
+        sa.Column('metadatos', sa.JSON(), nullable=True),
+        sa.Column('miniatura_key', sa.String(length=500), nullable=True),
+        sa.Column('procesado_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_documentos_sha256'), 'documentos', ['sha256'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_documentos_sha256'), table_name='documentos')
+    op.drop_table('documentos')
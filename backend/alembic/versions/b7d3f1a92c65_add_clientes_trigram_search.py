@@ -0,0 +1,49 @@
+"""add clientes trigram search
+
+Revision ID: b7d3f1a92c65
+Revises: 5e2a9c7d1f84
+Create Date: 2026-10-17 15:22:47.103958
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.text import build_search_text
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d3f1a92c65'
+down_revision: Union[str, None] = '5e2a9c7d1f84'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.add_column('clientes', sa.Column('search_text', sa.Text(), server_default='', nullable=False))
+
+    # Backfill with the same normalization the application uses
+    conn = op.get_bind()
+    rows = conn.execute(sa.text(
+        'SELECT id, nombre, apellido1, apellido2, razon_social, email, numero_identificacion FROM clientes'
+    )).all()
+    update = sa.text('UPDATE clientes SET search_text = :search_text WHERE id = :id')
+    for i in range(0, len(rows), BATCH_SIZE):
+        conn.execute(update, [
+            {'id': row.id, 'search_text': build_search_text(*row[1:])}
+            for row in rows[i:i + BATCH_SIZE]
+        ])
+
+    op.create_index(
+        'ix_clientes_search_text_trgm', 'clientes', ['search_text'], unique=False,
+        postgresql_using='gin', postgresql_ops={'search_text': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_clientes_search_text_trgm', table_name='clientes')
+    op.drop_column('clientes', 'search_text')
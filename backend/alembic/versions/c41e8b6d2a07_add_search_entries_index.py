@@ -0,0 +1,84 @@
+"""add search entries index
+
+Revision ID: c41e8b6d2a07
+Revises: b7d3f1a92c65
+Create Date: 2026-10-17 16:48:12.550731
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.utils.text import build_search_text
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41e8b6d2a07'
+down_revision: Union[str, None] = 'b7d3f1a92c65'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('search_entries',
+    sa.Column('tipo', sa.String(length=20), nullable=False),
+    sa.Column('entidad_id', sa.UUID(), nullable=False),
+    sa.Column('titulo', sa.String(length=255), nullable=False),
+    sa.Column('subtitulo', sa.Text(), nullable=True),
+    sa.Column('search_text', sa.Text(), nullable=False),
+    sa.Column('claves', postgresql.ARRAY(sa.Text()), nullable=False),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('tipo', 'entidad_id', name='uq_search_entries_tipo_entidad_id')
+    )
+
+    # Backfill; clientes.search_text is already normalized by the application
+    op.execute("""
+        INSERT INTO search_entries (id, tipo, entidad_id, titulo, subtitulo, search_text, claves)
+        SELECT gen_random_uuid(), 'cliente', c.id,
+               coalesce(c.razon_social, concat_ws(' ', c.nombre, c.apellido1, c.apellido2)),
+               concat_ws(' · ', c.numero_identificacion, c.email),
+               c.search_text,
+               array_remove(ARRAY[lower(c.numero_identificacion), lower(c.email)], NULL)
+        FROM clientes c
+    """)
+    op.execute("""
+        INSERT INTO search_entries (id, tipo, entidad_id, titulo, subtitulo, search_text, claves)
+        SELECT gen_random_uuid(), 'contrato', ct.id, ct.numero_contrato,
+               concat_ws(' · ', coalesce(c.razon_social, concat_ws(' ', c.nombre, c.apellido1, c.apellido2)),
+                         ct.ip_asignada, ct.pppoe_usuario),
+               concat_ws(' ', lower(ct.numero_contrato), ct.ip_asignada, lower(ct.pppoe_usuario), c.search_text),
+               array_remove(ARRAY[lower(ct.numero_contrato), ct.ip_asignada, lower(ct.pppoe_usuario),
+                                  lower(c.numero_identificacion)], NULL)
+        FROM contratos ct JOIN clientes c ON c.id = ct.cliente_id
+    """)
+    conn = op.get_bind()
+    routers = conn.execute(sa.text('SELECT id, nombre, ip, identity FROM routers')).all()
+    if routers:
+        conn.execute(
+            sa.text(
+                "INSERT INTO search_entries (id, tipo, entidad_id, titulo, subtitulo, search_text, claves) "
+                "VALUES (gen_random_uuid(), 'router', :id, :nombre, :ip, :search_text, ARRAY[lower(:ip)])"
+            ),
+            [
+                {'id': r.id, 'nombre': r.nombre, 'ip': r.ip,
+                 'search_text': build_search_text(r.nombre, r.ip, r.identity)}
+                for r in routers
+            ],
+        )
+
+    op.create_index(
+        'ix_search_entries_search_text_trgm', 'search_entries', ['search_text'], unique=False,
+        postgresql_using='gin', postgresql_ops={'search_text': 'gin_trgm_ops'},
+    )
+    op.create_index('ix_search_entries_claves', 'search_entries', ['claves'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_search_entries_claves', table_name='search_entries')
+    op.drop_index('ix_search_entries_search_text_trgm', table_name='search_entries')
+    op.drop_table('search_entries')
@@ -0,0 +1,50 @@
+"""backfill documentos for signed contract PDFs
+
+Revision ID: c9e4f1a7d362
+Revises: b2f7d9e4a815
+Create Date: 2026-10-18 09:12:44.518302
+
+"""
+import os
+import uuid
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9e4f1a7d362'
+down_revision: Union[str, None] = 'b2f7d9e4a815'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Signed PDFs uploaded before the documentos table have a checksum but
+    # no row. They keep their absolute path as storage key, which the
+    # documentos service still reads; metadata is extracted on next startup.
+    conn = op.get_bind()
+    rows = conn.execute(sa.text(
+        "SELECT DISTINCT ON (pdf_firmado_sha256) pdf_firmado_sha256, pdf_firmado_path "
+        "FROM contratos "
+        "WHERE pdf_firmado_sha256 IS NOT NULL AND pdf_firmado_path IS NOT NULL "
+        "ORDER BY pdf_firmado_sha256, updated_at DESC"
+    )).fetchall()
+
+    for sha256, path in rows:
+        if not os.path.isfile(path):
+            continue
+        conn.execute(
+            sa.text(
+                "INSERT INTO documentos (id, sha256, storage_key, content_type, tamano_bytes) "
+                "VALUES (:id, :sha256, :storage_key, 'application/pdf', :tamano_bytes) "
+                "ON CONFLICT (sha256) DO NOTHING"
+            ),
+            {"id": uuid.uuid4(), "sha256": sha256, "storage_key": path, "tamano_bytes": os.path.getsize(path)},
+        )
+
+
+def downgrade() -> None:
+    # Only the backfilled rows point to absolute paths
+    op.execute("DELETE FROM documentos WHERE storage_key LIKE '/%'")
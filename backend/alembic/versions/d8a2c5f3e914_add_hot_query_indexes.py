@@ -0,0 +1,46 @@
+"""add hot query indexes
+
+Revision ID: d8a2c5f3e914
+Revises: c41e8b6d2a07
+Create Date: 2026-10-17 18:10:55.267140
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8a2c5f3e914'
+down_revision: Union[str, None] = 'c41e8b6d2a07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # contratos (router_id, ip_asignada) is already covered by
+    # uq_contratos_router_id_ip_asignada
+    op.create_index(
+        'ix_contratos_router_id_pppoe_usuario', 'contratos', ['router_id', 'pppoe_usuario'], unique=False,
+        postgresql_where=sa.text("tipo_conexion = 'PPPOE'"),
+    )
+    op.create_index(
+        'ix_contratos_plan_id_router_id_pppoe', 'contratos', ['plan_id', 'router_id'], unique=False,
+        postgresql_where=sa.text("tipo_conexion = 'PPPOE'"),
+    )
+    op.create_index('ix_contratos_cliente_id', 'contratos', ['cliente_id'], unique=False)
+    op.create_index(
+        'ix_pagos_contrato_id_periodo_facturado', 'pagos', ['contrato_id', 'periodo_facturado'], unique=False
+    )
+    op.create_index('ix_pagos_estado_created_at', 'pagos', ['estado', 'created_at'], unique=False)
+    op.create_index('ix_pagos_cliente_id', 'pagos', ['cliente_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_pagos_cliente_id', table_name='pagos')
+    op.drop_index('ix_pagos_estado_created_at', table_name='pagos')
+    op.drop_index('ix_pagos_contrato_id_periodo_facturado', table_name='pagos')
+    op.drop_index('ix_contratos_cliente_id', table_name='contratos')
+    op.drop_index('ix_contratos_plan_id_router_id_pppoe', table_name='contratos')
+    op.drop_index('ix_contratos_router_id_pppoe_usuario', table_name='contratos')
@@ -0,0 +1,29 @@
+"""add facturas contrato periodo unique
+
+Revision ID: e3b9a4d7c215
+Revises: d8a2c5f3e914
+Create Date: 2026-10-17 19:02:41.518306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3b9a4d7c215'
+down_revision: Union[str, None] = 'd8a2c5f3e914'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_unique_constraint('uq_facturas_contrato_id_periodo', 'facturas', ['contrato_id', 'periodo'])
+    op.create_index('ix_facturas_periodo', 'facturas', ['periodo'], unique=False)
+    op.create_index('ix_facturas_cliente_id', 'facturas', ['cliente_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_facturas_cliente_id', table_name='facturas')
+    op.drop_index('ix_facturas_periodo', table_name='facturas')
+    op.drop_constraint('uq_facturas_contrato_id_periodo', 'facturas', type_='unique')
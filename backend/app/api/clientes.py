@@ -6,7 +6,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.dependencies import get_current_active_user, require_role
 from app.models.usuario import RolUsuario, Usuario
-from app.schemas.cliente import ClienteCreate, ClienteResponse, ClienteUpdate
+from app.schemas.cliente import ClienteCreate, ClienteResponse, ClienteSearchResult, ClienteUpdate
 from app.schemas.common import PaginatedResponse
 from app.services import clientes as clientes_service
 
@@ -25,6 +25,22 @@ async def list_clientes(
     return await clientes_service.list_clientes(db, page, page_size, search, is_active)
 
 
+@router.get("/search", response_model=list[ClienteSearchResult])
+async def search_clientes(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(20, ge=1, le=100),
+    is_active: bool | None = None,
+    db: AsyncSession = Depends(get_db),
+    _current_user: Usuario = Depends(get_current_active_user),
+):
+    """Ranked search by name, razon social, email or identification (ignores accents)"""
+    results = await clientes_service.search_clientes(db, q, limit, is_active)
+    return [
+        ClienteSearchResult(**ClienteResponse.model_validate(cliente).model_dump(), score=score)
+        for cliente, score in results
+    ]
+
+
 @router.get("/{cliente_id}", response_model=ClienteResponse)
 async def get_cliente(
     cliente_id: uuid.UUID,
@@ -1,8 +1,7 @@
-import os
+import base64
 import uuid
 
 from fastapi import APIRouter, Depends, File, Query, UploadFile
-from fastapi.responses import FileResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.exceptions import NotFoundError
@@ -12,7 +11,12 @@ from app.models.contrato import EstadoContrato
 from app.models.usuario import RolUsuario, Usuario
 from app.schemas.common import PaginatedResponse
 from app.schemas.contrato import ContratoCreate, ContratoDetailResponse, ContratoUpdate
+from app.schemas.corte import CorteRequest, CorteResult
+from app.schemas.documento import DocumentoResponse
+from app.schemas.mikrotik_sync import MikroTikSyncJobResponse
 from app.services import contratos as contratos_service
+from app.services import cortes as cortes_service
+from app.services import documentos as documentos_service
 
 router = APIRouter(prefix="/contratos", tags=["Contratos"])
 
@@ -29,6 +33,26 @@ async def list_contratos(
     return await contratos_service.list_contratos(db, page, page_size, cliente_id, estado)
 
 
+@router.post("/corte", response_model=CorteResult)
+async def run_corte(
+    data: CorteRequest,
+    db: AsyncSession = Depends(get_db),
+    _current_user: Usuario = Depends(require_role(RolUsuario.ADMIN, RolUsuario.OPERADOR)),
+):
+    """
+    Mass suspension/reactivation for a billing period (Admin and Operador only)
+
+    suspender: ACTIVO contracts without payment for the period.
+    reactivar: SUSPENDIDO contracts with a validated payment for the period.
+    With dry_run=true only reports what would change. The estado change is
+    committed before the routers are updated; contracts of routers that fail
+    are retried through the MikroTik sync queue.
+    """
+    return await cortes_service.run_corte(
+        db, data.accion, data.periodo, data.router_id, data.dry_run
+    )
+
+
 @router.get("/{contrato_id}", response_model=ContratoDetailResponse)
 async def get_contrato(
     contrato_id: uuid.UUID,
@@ -42,10 +66,10 @@ async def get_contrato(
 async def create_contrato(
     data: ContratoCreate,
     db: AsyncSession = Depends(get_db),
-    _current_user: Usuario = Depends(require_role(RolUsuario.ADMIN, RolUsuario.OPERADOR)),
+    current_user: Usuario = Depends(require_role(RolUsuario.ADMIN, RolUsuario.OPERADOR)),
 ):
     """Create contract (Admin and Operador only)"""
-    return await contratos_service.create_contrato(db, data)
+    return await contratos_service.create_contrato(db, data, current_user.id)
 
 
 @router.put("/{contrato_id}", response_model=ContratoDetailResponse)
@@ -53,10 +77,30 @@ async def update_contrato(
     contrato_id: uuid.UUID,
     data: ContratoUpdate,
     db: AsyncSession = Depends(get_db),
-    _current_user: Usuario = Depends(require_role(RolUsuario.ADMIN, RolUsuario.OPERADOR)),
+    current_user: Usuario = Depends(require_role(RolUsuario.ADMIN, RolUsuario.OPERADOR)),
 ):
     """Update contract (Admin and Operador only)"""
-    return await contratos_service.update_contrato(db, contrato_id, data)
+    return await contratos_service.update_contrato(db, contrato_id, data, current_user.id)
+
+
+@router.get("/{contrato_id}/mikrotik-sync", response_model=list[MikroTikSyncJobResponse])
+async def get_mikrotik_sync_jobs(
+    contrato_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db),
+    _current_user: Usuario = Depends(get_current_active_user),
+):
+    """MikroTik sync status of the contract (latest jobs first)"""
+    return await contratos_service.get_mikrotik_sync_jobs(db, contrato_id)
+
+
+@router.post("/{contrato_id}/mikrotik-sync", response_model=list[MikroTikSyncJobResponse], status_code=202)
+async def resync_mikrotik(
+    contrato_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db),
+    _current_user: Usuario = Depends(require_role(RolUsuario.ADMIN, RolUsuario.OPERADOR)),
+):
+    """Queue a new MikroTik sync for the contract (Admin and Operador only)"""
+    return await contratos_service.resync_mikrotik(db, contrato_id)
 
 
 @router.post("/{contrato_id}/pdf-firmado", response_model=ContratoDetailResponse)
@@ -66,7 +110,7 @@ async def upload_pdf_firmado(
     db: AsyncSession = Depends(get_db),
     _current_user: Usuario = Depends(require_role(RolUsuario.ADMIN, RolUsuario.OPERADOR, RolUsuario.TECNICO)),
 ):
-    """Upload signed PDF for contract (Admin, Operador, and Tecnico)"""
+    """Upload signed PDF for contract (Admin, Operador, and Tecnico), up to UPLOAD_MAX_PDF_BYTES"""
     return await contratos_service.upload_pdf_firmado(db, contrato_id, file)
 
 
@@ -76,17 +120,58 @@ async def download_pdf_firmado(
     db: AsyncSession = Depends(get_db),
     _current_user: Usuario = Depends(get_current_active_user),
 ):
-    """Download signed PDF for contract"""
+    """Download signed PDF for contract (supports Range requests)"""
     contrato = await contratos_service.get_contrato(db, contrato_id)
 
     if not contrato.pdf_firmado_path:
         raise NotFoundError("PDF firmado no disponible")
 
-    if not os.path.exists(contrato.pdf_firmado_path):
-        raise NotFoundError("Archivo PDF no encontrado")
-
-    return FileResponse(
+    # Redirected to the object store, or streamed from disk in chunks with
+    # Range / If-Range support for resumed downloads. The ETag stays
+    # FileResponse's own (mtime and size), it is the one If-Range is checked
+    # against; stored documents never change, so neither does it.
+    headers = {"Cache-Control": "private, no-cache"}
+    if contrato.pdf_firmado_sha256:
+        digest = base64.b64encode(bytes.fromhex(contrato.pdf_firmado_sha256)).decode()
+        headers["Repr-Digest"] = f"sha-256=:{digest}:"
+    return await documentos_service.document_response(
         contrato.pdf_firmado_path,
-        media_type="application/pdf",
-        filename=f"{contrato.numero_contrato}_firmado.pdf",
+        f"{contrato.numero_contrato}_firmado.pdf",
+        "application/pdf",
+        headers,
+    )
+
+
+@router.get("/{contrato_id}/pdf-firmado/documento", response_model=DocumentoResponse)
+async def get_pdf_firmado_documento(
+    contrato_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db),
+    _current_user: Usuario = Depends(get_current_active_user),
+):
+    """Size, page count and metadata of the signed PDF"""
+    contrato = await contratos_service.get_contrato(db, contrato_id)
+    if not contrato.pdf_firmado_sha256:
+        raise NotFoundError("PDF firmado no disponible")
+    return await documentos_service.get_documento(db, contrato.pdf_firmado_sha256)
+
+
+@router.get("/{contrato_id}/pdf-firmado/miniatura")
+async def download_pdf_firmado_miniatura(
+    contrato_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db),
+    _current_user: Usuario = Depends(get_current_active_user),
+):
+    """Thumbnail of the first page of the signed PDF, once processed"""
+    contrato = await contratos_service.get_contrato(db, contrato_id)
+    if not contrato.pdf_firmado_sha256:
+        raise NotFoundError("PDF firmado no disponible")
+    documento = await documentos_service.get_documento(db, contrato.pdf_firmado_sha256)
+    if not documento.miniatura_key:
+        raise NotFoundError("Miniatura no disponible")
+    return await documentos_service.document_response(
+        documento.miniatura_key,
+        f"{contrato.numero_contrato}_firmado.jpg",
+        "image/jpeg",
+        # The thumbnail of a given content never changes
+        {"Cache-Control": "private, max-age=86400"},
     )
@@ -0,0 +1,58 @@
+import uuid
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_db
+from app.dependencies import get_current_active_user, require_role
+from app.models.factura import EstadoFactura
+from app.models.usuario import RolUsuario, Usuario
+from app.schemas.common import PaginatedResponse
+from app.schemas.factura import FacturacionRequest, FacturacionResult, FacturaResponse
+from app.services import facturas as facturas_service
+
+router = APIRouter(prefix="/facturas", tags=["Facturas"])
+
+
+@router.get("/", response_model=PaginatedResponse[FacturaResponse])
+async def list_facturas(
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    cliente_id: uuid.UUID | None = None,
+    contrato_id: uuid.UUID | None = None,
+    estado: EstadoFactura | None = None,
+    periodo: str | None = None,
+    db: AsyncSession = Depends(get_db),
+    _current_user: Usuario = Depends(get_current_active_user),
+):
+    return await facturas_service.list_facturas(
+        db, page, page_size, cliente_id, contrato_id, estado, periodo
+    )
+
+
+@router.post("/generar", response_model=FacturacionResult)
+async def generate_facturas(
+    data: FacturacionRequest,
+    db: AsyncSession = Depends(get_db),
+    _current_user: Usuario = Depends(require_role(RolUsuario.ADMIN, RolUsuario.OPERADOR)),
+):
+    """
+    Billing run: create the invoices of a period (Admin and Operador only)
+
+    One invoice per active contract, issued on its dia_facturacion. Safe to
+    run again, contracts already invoiced for the period are skipped. With
+    fecha_corte only contracts billed up to that date are invoiced; with
+    dry_run=true only counts the invoices that would be created.
+    """
+    return await facturas_service.generate_facturas(
+        db, data.periodo, data.fecha_corte, data.dry_run
+    )
+
+
+@router.get("/{factura_id}", response_model=FacturaResponse)
+async def get_factura(
+    factura_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db),
+    _current_user: Usuario = Depends(get_current_active_user),
+):
+    return await facturas_service.get_factura(db, factura_id)
@@ -1,8 +1,6 @@
-import os
 import uuid
 
-from fastapi import APIRouter, Depends, Query
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
@@ -16,12 +14,22 @@ from app.schemas.instalacion import (
     InstalacionSolicitudCreate,
     InstalacionUpdate,
 )
+from app.services import documentos as documentos_service
 from app.services import instalaciones as instalaciones_service
 from app.core.exceptions import NotFoundError
 
 router = APIRouter(prefix="/instalaciones", tags=["Instalaciones"])
 
 
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """If-None-Match check, weak comparison as RFC 9110 requires for it"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
 @router.get("/", response_model=PaginatedResponse[InstalacionDetailResponse])
 async def list_instalaciones(
     page: int = Query(1, ge=1),
@@ -82,27 +90,27 @@ async def activar_instalacion(
 @router.get("/{instalacion_id}/pdf-solicitud")
 async def download_pdf_solicitud(
     instalacion_id: uuid.UUID,
+    request: Request,
     db: AsyncSession = Depends(get_db),
     _current_user: Usuario = Depends(get_current_active_user),
 ):
-    """Generate and download installation request PDF"""
+    """
+    Download installation request PDF
+
+    Rendered once per version of the installation and its plan. Send the
+    ETag back in If-None-Match to get a 304 while it hasn't changed.
+    """
     instalacion = await instalaciones_service.get_instalacion(db, instalacion_id)
+    etag = f'"{instalaciones_service.pdf_solicitud_etag(instalacion)}"'
+    # no-cache: browsers keep the PDF but revalidate it on every download
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
 
-    # If PDF exists, return it
-    if instalacion.pdf_solicitud_path and os.path.exists(instalacion.pdf_solicitud_path):
-        return FileResponse(
-            instalacion.pdf_solicitud_path,
-            media_type="application/pdf",
-            filename=f"{instalacion.numero_instalacion}.pdf",
-        )
-
-    # Generate and save PDF
-    pdf_bytes = await instalaciones_service.generate_pdf_solicitud(db, instalacion_id)
-    pdf_path = await instalaciones_service.save_pdf_solicitud(db, instalacion_id, pdf_bytes)
+    pdf_key = await instalaciones_service.get_pdf_solicitud(db, instalacion)
     await db.commit()
 
-    return FileResponse(
-        pdf_path,
-        media_type="application/pdf",
-        filename=f"{instalacion.numero_instalacion}.pdf",
+    return await documentos_service.document_response(
+        pdf_key, f"{instalacion.numero_instalacion}.pdf", "application/pdf", headers
     )
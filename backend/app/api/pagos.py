@@ -7,9 +7,10 @@ from app.database import get_db
 from app.dependencies import get_current_active_user, require_role
 from app.models.pago import EstadoPago
 from app.models.usuario import RolUsuario, Usuario
-from app.schemas.common import PaginatedResponse
+from app.schemas.common import CursorPaginatedResponse, PaginatedResponse
 from app.schemas.pago import PagoCreate, PagoResponse, PagoUpdate, PagoValidarRequest
 from app.services import pagos as pagos_service
+from app.utils.pagination import TotalMode
 
 router = APIRouter(prefix="/pagos", tags=["Pagos"])
 
@@ -30,6 +31,24 @@ async def list_pagos(
     )
 
 
+@router.get("/cursor", response_model=CursorPaginatedResponse[PagoResponse])
+async def list_pagos_cursor(
+    cursor: str | None = None,
+    page_size: int = Query(20, ge=1, le=100),
+    cliente_id: uuid.UUID | None = None,
+    contrato_id: uuid.UUID | None = None,
+    estado: EstadoPago | None = None,
+    periodo: str | None = None,
+    total: TotalMode = "none",
+    db: AsyncSession = Depends(get_db),
+    _current_user: Usuario = Depends(get_current_active_user),
+):
+    """List payments with cursor pagination (pass next_cursor to get the next page)"""
+    return await pagos_service.list_pagos_cursor(
+        db, cursor, page_size, cliente_id, contrato_id, estado, periodo, total
+    )
+
+
 @router.get("/{pago_id}", response_model=PagoResponse)
 async def get_pago(
     pago_id: uuid.UUID,
@@ -7,7 +7,7 @@ from app.database import get_db
 from app.dependencies import get_current_active_user, require_role
 from app.models.usuario import RolUsuario, Usuario
 from app.schemas.common import PaginatedResponse
-from app.schemas.plan import PlanCreate, PlanResponse, PlanUpdate
+from app.schemas.plan import PlanCreate, PlanResponse, PlanUpdate, PlanUpdateResponse, PPPProfileSyncResponse
 from app.services import planes as planes_service
 
 router = APIRouter(prefix="/planes", tags=["Planes"])
@@ -43,14 +43,19 @@ async def create_plan(
     return await planes_service.create_plan(db, data)
 
 
-@router.put("/{plan_id}", response_model=PlanResponse)
+@router.put("/{plan_id}", response_model=PlanUpdateResponse)
 async def update_plan(
     plan_id: uuid.UUID,
     data: PlanUpdate,
     db: AsyncSession = Depends(get_db),
     _current_user: Usuario = Depends(require_role(RolUsuario.ADMIN, RolUsuario.OPERADOR)),
 ):
-    """Update plan (Admin and Operador only)"""
+    """
+    Update plan (Admin and Operador only)
+
+    When the speeds change, routers lists the PPP profile update on each
+    router with PPPoE contracts on the plan; check success per router.
+    """
     return await planes_service.update_plan(db, plan_id, data)
 
 
@@ -74,12 +79,11 @@ async def get_ppp_profiles(
     return await planes_service.get_ppp_profiles_info(db, plan_id)
 
 
-@router.post("/{plan_id}/sync-ppp-profiles")
+@router.post("/{plan_id}/sync-ppp-profiles", response_model=PPPProfileSyncResponse)
 async def sync_ppp_profiles(
     plan_id: uuid.UUID,
     db: AsyncSession = Depends(get_db),
     _current_user: Usuario = Depends(require_role(RolUsuario.ADMIN, RolUsuario.OPERADOR)),
 ):
     """Manually sync/update PPP profiles in all routers for this plan"""
-    await planes_service.sync_ppp_profiles_for_plan(db, plan_id)
-    return {"message": "Perfiles PPP sincronizados exitosamente"}
+    return await planes_service.sync_ppp_profiles_for_plan(db, plan_id)
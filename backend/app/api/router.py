@@ -4,12 +4,14 @@ from app.api import (
     auth,
     clientes,
     contratos,
+    facturas,
     instalaciones,
     pagos,
     planes,
     role_permissions,
     router_events,
     routers,
+    search,
     settings,
     usuarios,
 )
@@ -21,8 +23,10 @@ api_router.include_router(clientes.router)
 api_router.include_router(planes.router)
 api_router.include_router(contratos.router)
 api_router.include_router(pagos.router)
+api_router.include_router(facturas.router)
 api_router.include_router(instalaciones.router)
 api_router.include_router(role_permissions.router)
 api_router.include_router(routers.router)
 api_router.include_router(router_events.router)
+api_router.include_router(search.router)
 api_router.include_router(settings.router)
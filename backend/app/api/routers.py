@@ -7,12 +7,17 @@ from app.database import get_db
 from app.dependencies import require_admin, require_permission
 from app.models.usuario import Usuario
 from app.schemas.common import PaginatedResponse
+from app.schemas.reconciliation import ReconciliationResult
 from app.schemas.router import (
+    IPPoolUsageResponse,
+    IPReservationResponse,
     RouterCreate,
     RouterResponse,
     RouterTestConnectionResponse,
     RouterUpdate,
 )
+from app.services import ip_pool_usage as ip_pool_usage_service
+from app.services import reconciliation as reconciliation_service
 from app.services import routers as routers_service
 from app.services.mikrotik import MikroTikService
 
@@ -32,6 +37,16 @@ async def list_routers(
     return await routers_service.list_routers(db, page, page_size, search, is_active)
 
 
+@router.get("/ip-pool-usage", response_model=IPPoolUsageResponse)
+async def get_ip_pool_usage(
+    refresh: bool = Query(False, description="Recalcular en lugar de usar el caché"),
+    db: AsyncSession = Depends(get_db),
+    _current_user: Usuario = Depends(require_permission("routers")),
+):
+    """Used/free IPs, fragmentation and largest free block of every router's CIDRs"""
+    return await ip_pool_usage_service.get_pool_usage(db, refresh)
+
+
 @router.get("/{router_id}", response_model=RouterResponse)
 async def get_router(
     router_id: uuid.UUID,
@@ -99,6 +114,23 @@ async def test_router_connection(
     return await mikrotik_service.test_connection()
 
 
+@router.post("/{router_id}/reconcile", response_model=ReconciliationResult)
+async def reconcile_router(
+    router_id: uuid.UUID,
+    dry_run: bool = Query(False),
+    db: AsyncSession = Depends(get_db),
+    _current_user: Usuario = Depends(require_permission("routers", require_write=True)),
+):
+    """
+    Reconcile router configuration with the database
+
+    Compares address-lists, PPP secrets, PPP profiles and IP pools on the
+    router with every contract assigned to it and applies only the differences.
+    With dry_run=true the changes are computed but not sent.
+    """
+    return await reconciliation_service.reconcile_router(db, router_id, dry_run)
+
+
 @router.post("/{router_id}/deactivate", response_model=RouterResponse)
 async def deactivate_router(
     router_id: uuid.UUID,
@@ -130,13 +162,41 @@ async def get_next_available_ip(
     return {"ip_address": ip_address}
 
 
+@router.post("/{router_id}/reserve-ip", response_model=IPReservationResponse)
+async def reserve_ip(
+    router_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: Usuario = Depends(require_permission("contratos", require_write=True)),
+):
+    """
+    Reserve the next available IP for a few minutes (requires write permission on contratos)
+
+    Unlike next-available-ip, concurrent calls never return the same IP.
+    The reservation is consumed when a contract is created with the IP.
+    """
+    return await routers_service.reserve_ip(db, router_id, current_user.id)
+
+
+@router.delete("/{router_id}/reserve-ip/{reservation_id}", status_code=204)
+async def release_ip_reservation(
+    router_id: uuid.UUID,
+    reservation_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: Usuario = Depends(require_permission("contratos", require_write=True)),
+):
+    """Release one of your IP reservations before it expires"""
+    await routers_service.release_ip_reservation(db, router_id, reservation_id, current_user.id)
+
+
 @router.get("/{router_id}/check-ip/{ip_address}")
 async def check_ip_available(
     router_id: uuid.UUID,
     ip_address: str,
     exclude_contrato_id: uuid.UUID | None = Query(None),
     db: AsyncSession = Depends(get_db),
-    _current_user: Usuario = Depends(require_permission("routers")),
+    current_user: Usuario = Depends(require_permission("routers")),
 ):
     """Check if IP address is available for assignment (Admin and Operador only)"""
-    return await routers_service.check_ip_available(db, router_id, ip_address, exclude_contrato_id)
+    return await routers_service.check_ip_available(
+        db, router_id, ip_address, exclude_contrato_id, current_user.id
+    )
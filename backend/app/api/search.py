@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_db
+from app.dependencies import get_current_active_user
+from app.models.search_entry import TipoEntrada
+from app.models.usuario import Usuario
+from app.schemas.search import SearchResponse
+from app.services import search as search_service
+
+router = APIRouter(prefix="/search", tags=["Search"])
+
+
+@router.get("/", response_model=SearchResponse)
+async def global_search(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(20, ge=1, le=100),
+    tipo: list[TipoEntrada] | None = Query(None),
+    db: AsyncSession = Depends(get_db),
+    _current_user: Usuario = Depends(get_current_active_user),
+):
+    """Search clients, contracts and routers by name, IP, PPPoE user, contract number or cédula"""
+    return await search_service.global_search(db, q, limit, tipo)
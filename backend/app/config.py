@@ -20,6 +20,37 @@ class Settings(BaseSettings):
     # Encryption
     ENCRYPTION_KEY: str = ""
 
+    # Router monitoring
+    ROUTER_MONITOR_MAX_CONCURRENT_CHECKS: int = 500
+
+    # List totals: seconds a cached count lives, and planner estimate above
+    # which the total is reported as an estimate instead of count(*)
+    PAGINATION_COUNT_CACHE_TTL: int = 60
+    PAGINATION_ESTIMATE_THRESHOLD: int = 100_000
+
+    # Worker processes rendering PDFs for the API (see app.services.pdf_pool)
+    PDF_RENDER_WORKERS: int = 2
+
+    # Largest accepted upload for signed contract PDFs (scans run ~20 MB)
+    UPLOAD_MAX_PDF_BYTES: int = 30 * 1024 * 1024
+
+    # Document storage (see app.services.storage): "local" or "s3"
+    STORAGE_BACKEND: str = "local"
+    STORAGE_LOCAL_ROOT: str = "/app/uploads"
+    # Uploads are streamed here before being hashed and stored
+    UPLOAD_TMP_DIR: str = "/app/uploads/tmp"
+    # Seconds a direct download URL stays valid
+    STORAGE_URL_TTL: int = 300
+
+    # S3 or S3-compatible (MinIO) storage
+    S3_BUCKET: str = "isp-billing"
+    S3_ENDPOINT_URL: str | None = None
+    # Endpoint used in download URLs, if browsers reach the store elsewhere
+    S3_PUBLIC_ENDPOINT_URL: str | None = None
+    S3_ACCESS_KEY: str = ""
+    S3_SECRET_KEY: str = ""
+    S3_REGION: str = "us-east-1"
+
     model_config = {"env_file": ".env", "extra": "ignore"}
 
 
@@ -0,0 +1,120 @@
+"""
+Redis cache of list totals
+
+Cached counts are keyed by the count query (SQL and bound parameters) and
+by a version counter per table it reads. Any ORM write to a table bumps its
+version after commit, so stale totals are never read again and simply
+expire.
+"""
+import asyncio
+import hashlib
+import logging
+
+from sqlalchemy import Select, event
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import ORMExecuteState, Session
+from sqlalchemy.sql.util import find_tables
+
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Session.info key holding the tables written in the current transaction
+_WRITTEN_KEY = "count_cache_written_tables"
+
+# Keeps the version bump tasks referenced until they finish
+_pending: set[asyncio.Task] = set()
+
+
+def _version_key(table: str) -> str:
+    return f"count_version:{table}"
+
+
+def _tables(query: Select) -> list[str]:
+    """Tables a query reads, including joins and subqueries"""
+    tables = find_tables(query, include_joins=True, include_crud=True)
+    return sorted({table.name for table in tables if hasattr(table, "name")})
+
+
+def _query_hash(query: Select) -> str:
+    compiled = query.compile(dialect=postgresql.dialect())
+    params = sorted((key, repr(value)) for key, value in compiled.params.items())
+    return hashlib.sha1(f"{compiled}|{params}".encode()).hexdigest()
+
+
+async def _cache_key(query: Select) -> str:
+    tables = _tables(query)
+    versions = await get_redis().mget([_version_key(table) for table in tables]) if tables else []
+    version_tag = ",".join(f"{table}={version or 0}" for table, version in zip(tables, versions))
+    return f"count:{_query_hash(query)}:{hashlib.sha1(version_tag.encode()).hexdigest()[:16]}"
+
+
+async def get_cached_count(query: Select) -> tuple[str, tuple[int, bool] | None]:
+    """
+    Cached (total, is_estimate) for a query, None on a miss
+
+    Returns the cache key too, to store the total once computed.
+    """
+    key = await _cache_key(query)
+    cached = await get_redis().get(key)
+    if cached is None:
+        return key, None
+    total, is_estimate = cached.split(":")
+    return key, (int(total), is_estimate == "1")
+
+
+async def set_cached_count(key: str, total: int, is_estimate: bool, ttl: int) -> None:
+    await get_redis().set(key, f"{total}:{int(is_estimate)}", ex=ttl)
+
+
+def _record_tables(session: Session, tables) -> None:
+    session.info.setdefault(_WRITTEN_KEY, set()).update(tables)
+
+
+@event.listens_for(Session, "after_flush")
+def _record_flushed_tables(session: Session, flush_context) -> None:
+    tables = {
+        obj.__table__.name
+        for obj in (*session.new, *session.dirty, *session.deleted)
+        if hasattr(obj, "__table__")
+    }
+    if tables:
+        _record_tables(session, tables)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _record_bulk_tables(orm_execute_state: ORMExecuteState) -> None:
+    # Bulk insert/update/delete statements don't go through the flush
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None:
+            _record_tables(orm_execute_state.session, {mapper.local_table.name})
+
+
+async def _bump_versions(tables: set[str]) -> None:
+    try:
+        async with get_redis().pipeline(transaction=False) as pipe:
+            for table in tables:
+                pipe.incr(_version_key(table))
+            await pipe.execute()
+    except Exception as e:
+        logger.warning(f"Could not invalidate cached counts for {sorted(tables)}: {str(e)}")
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_versions_after_commit(session: Session) -> None:
+    tables = session.info.pop(_WRITTEN_KEY, None)
+    if not tables:
+        return
+    try:
+        task = asyncio.get_running_loop().create_task(_bump_versions(tables))
+    except RuntimeError:
+        # Committed outside an event loop, cached counts expire with their TTL
+        return
+    _pending.add(task)
+    task.add_done_callback(_pending.discard)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_tables_after_rollback(session: Session) -> None:
+    session.info.pop(_WRITTEN_KEY, None)
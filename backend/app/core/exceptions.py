@@ -28,3 +28,17 @@ class ForbiddenError(HTTPException):
 class ConflictError(HTTPException):
     def __init__(self, detail: str = "Conflicto con recurso existente"):
         super().__init__(status_code=status.HTTP_409_CONFLICT, detail=detail)
+
+
+class PayloadTooLargeError(HTTPException):
+    def __init__(self, detail: str = "Archivo demasiado grande"):
+        super().__init__(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=detail)
+
+
+class ServiceUnavailableError(HTTPException):
+    def __init__(self, detail: str = "Servicio no disponible, intente de nuevo", retry_after: int = 30):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail,
+            headers={"Retry-After": str(retry_after)},
+        )
@@ -0,0 +1,117 @@
+"""
+Redis-based leader election for background tasks
+
+Each uvicorn worker runs its own lifespan, so tasks that must run only once
+per deployment (like the router monitor) compete for a Redis lock. The
+holder renews the lease periodically; if it dies or loses Redis, the lease
+expires and another process takes over.
+"""
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from collections.abc import Awaitable, Callable
+
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Lease duration in seconds; a crashed leader is replaced after at most this long
+LEASE_TTL = 30
+
+# Seconds between lease renewals (leader) or acquisition attempts (followers)
+RENEW_INTERVAL = 10
+
+# Extend the lease only if we still own it
+_RENEW_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("pexpire", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# Delete the lock only if we still own it
+_RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class LeaderLock:
+    """Lease on a Redis key identifying the single leader for a task"""
+
+    def __init__(self, name: str, ttl: int = LEASE_TTL):
+        self.key = f"leader:{name}"
+        self.ttl = ttl
+        self.token = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}"
+
+    async def acquire(self) -> bool:
+        return bool(await get_redis().set(self.key, self.token, nx=True, ex=self.ttl))
+
+    async def renew(self) -> bool:
+        return bool(await get_redis().eval(_RENEW_SCRIPT, 1, self.key, self.token, self.ttl * 1000))
+
+    async def release(self) -> None:
+        await get_redis().eval(_RELEASE_SCRIPT, 1, self.key, self.token)
+
+
+async def run_as_leader(
+    name: str,
+    task_factory: Callable[[], Awaitable[None]],
+    ttl: int = LEASE_TTL,
+    renew_interval: float = RENEW_INTERVAL,
+) -> None:
+    """
+    Run task_factory() only while this process holds the leader lease
+
+    Followers retry every renew_interval. If the leader can't renew its lease
+    (Redis unreachable or the lease expired and was taken), the task is
+    cancelled before another process could start it. Runs until cancelled.
+
+    Args:
+        name: Lock name, shared by all processes competing for the task
+        task_factory: Coroutine function to run while leader
+        ttl: Lease duration in seconds
+        renew_interval: Seconds between renewals, must be well below ttl
+    """
+    lock = LeaderLock(name, ttl)
+    task: asyncio.Task | None = None
+
+    try:
+        while True:
+            try:
+                if task is None:
+                    if await lock.acquire():
+                        logger.info(f"Acquired leadership for '{name}' ({lock.token})")
+                        task = asyncio.create_task(task_factory())
+                elif not await lock.renew():
+                    logger.warning(f"Lost leadership for '{name}', stopping task")
+                    task.cancel()
+                    task = None
+            except Exception as e:
+                logger.error(f"Leader election for '{name}' failed: {str(e)}")
+                # Without Redis we can't prove the lease is still ours
+                if task is not None:
+                    task.cancel()
+                    task = None
+
+            if task is not None and task.done():
+                if not task.cancelled() and task.exception():
+                    logger.error(f"Leader task '{name}' crashed", exc_info=task.exception())
+                task = None
+                try:
+                    await lock.release()
+                except Exception:
+                    pass
+
+            await asyncio.sleep(renew_interval)
+    finally:
+        if task is not None:
+            task.cancel()
+            try:
+                await lock.release()
+            except Exception:
+                pass
@@ -0,0 +1,67 @@
+"""Corte script: mass suspension/reactivation of contracts for a billing period.
+
+Usage:
+    python -m app.corte suspender [--periodo YYYY-MM] [--router-id UUID] [--dry-run]
+    python -m app.corte reactivar [--periodo YYYY-MM] [--router-id UUID] [--dry-run]
+"""
+
+import argparse
+import asyncio
+import uuid
+from datetime import date
+
+from app.database import async_session
+from app.schemas.corte import CorteRequest, CorteRouterResult
+from app.services.cortes import run_corte
+from app.services.mikrotik_pool import mikrotik_pool
+
+
+def print_progress(result: CorteRouterResult, done: int, total: int):
+    print(
+        f"[{done}/{total}] Router {result.router_nombre}: {result.contratos} contratos, "
+        f"address-lists +{result.address_list.added} ~{result.address_list.updated} -{result.address_list.removed}, "
+        f"PPP secrets +{result.ppp_secrets.added} ~{result.ppp_secrets.updated} -{result.ppp_secrets.removed} "
+        f"({result.duration_ms} ms)"
+    )
+    for error in result.errors:
+        print(f"  Error: {error}")
+    if result.encolados:
+        print(f"  {result.encolados} contratos encolados para reintentar")
+
+
+async def corte(data: CorteRequest):
+    try:
+        async with async_session() as session:
+            # Commits the estado change itself, before pushing to the routers
+            result = await run_corte(
+                session, data.accion, data.periodo, data.router_id, data.dry_run,
+                on_progress=print_progress,
+            )
+    finally:
+        await mikrotik_pool.close()
+
+    modo = " (simulación, sin cambios)" if result.dry_run else ""
+    print(
+        f"Corte {result.accion} {result.periodo}{modo}: {result.contratos} contratos "
+        f"en {len(result.routers)} routers, {result.sin_router} sin router, {result.duration_ms} ms"
+    )
+    if result.dry_run:
+        for numero in result.numeros_contrato:
+            print(f"  {numero}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suspende o reactiva contratos según los pagos del periodo.")
+    parser.add_argument("accion", choices=["suspender", "reactivar"])
+    parser.add_argument("--periodo", default=date.today().strftime("%Y-%m"), help="Periodo YYYY-MM (por defecto el actual)")
+    parser.add_argument("--router-id", type=uuid.UUID, help="Aplicar solo a este router")
+    parser.add_argument("--dry-run", action="store_true", help="Mostrar cambios sin aplicarlos")
+    args = parser.parse_args()
+    data = CorteRequest(
+        accion=args.accion, periodo=args.periodo, router_id=args.router_id, dry_run=args.dry_run
+    )
+    asyncio.run(corte(data))
+
+
+if __name__ == "__main__":
+    main()
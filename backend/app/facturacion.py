@@ -0,0 +1,57 @@
+"""Facturacion script: monthly billing run, creates the invoices of a period.
+
+Safe to run again (e.g. daily with --hasta-hoy): contracts already invoiced
+for the period are skipped.
+
+Usage:
+    python -m app.facturacion [--periodo YYYY-MM] [--hasta-hoy] [--dry-run]
+"""
+
+import argparse
+import asyncio
+from datetime import date
+
+from app.database import async_session
+from app.schemas.factura import FacturacionRequest
+from app.services.facturas import generate_facturas
+
+
+def print_progress(facturas: int, lotes: int):
+    print(f"Lote {lotes}: {facturas} facturas creadas")
+
+
+async def facturacion(data: FacturacionRequest):
+    async with async_session() as session:
+        result = await generate_facturas(
+            session, data.periodo, data.fecha_corte, data.dry_run, on_progress=print_progress
+        )
+
+    corte = f" hasta {result.fecha_corte}" if result.fecha_corte else ""
+    if result.dry_run:
+        print(f"Facturación {result.periodo}{corte} (simulación, sin cambios): {result.facturas} facturas por crear")
+    else:
+        print(
+            f"Facturación {result.periodo}{corte}: {result.facturas} facturas creadas "
+            f"en {result.lotes} lotes, {result.duration_ms} ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera las facturas del periodo para los contratos activos.")
+    parser.add_argument("--periodo", default=date.today().strftime("%Y-%m"), help="Periodo YYYY-MM (por defecto el actual)")
+    parser.add_argument(
+        "--hasta-hoy", action="store_true",
+        help="Facturar solo los contratos cuyo día de facturación ya llegó",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Contar las facturas sin crearlas")
+    args = parser.parse_args()
+    data = FacturacionRequest(
+        periodo=args.periodo,
+        fecha_corte=date.today() if args.hasta_hoy else None,
+        dry_run=args.dry_run,
+    )
+    asyncio.run(facturacion(data))
+
+
+if __name__ == "__main__":
+    main()
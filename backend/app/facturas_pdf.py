@@ -0,0 +1,49 @@
+"""Facturas PDF script: renders the invoices of a period to PDF on all cores.
+
+Usage:
+    python -m app.facturas_pdf SALIDA [--periodo YYYY-MM] [--zip] [--workers N]
+
+SALIDA is a directory ({numero_factura}.pdf per invoice) or, with --zip,
+the path of the zip file.
+"""
+
+import argparse
+import asyncio
+import re
+from datetime import date
+
+from app.database import async_session
+from app.services.factura_pdfs import render_facturas_pdf
+
+
+def print_progress(rendered: int, total: int):
+    print(f"[{rendered}/{total}] facturas generadas")
+
+
+async def facturas_pdf(periodo: str, salida: str, as_zip: bool, workers: int | None):
+    async with async_session() as session:
+        result = await render_facturas_pdf(
+            session, periodo, salida, as_zip, workers, on_progress=print_progress
+        )
+
+    print(
+        f"PDFs {result.periodo}: {result.facturas} facturas en {result.destino} "
+        f"({result.tamano_bytes / 1024 / 1024:.1f} MB), {result.workers} procesos, "
+        f"{result.duration_ms} ms, {result.facturas_por_segundo} facturas/s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera los PDF de las facturas de un periodo.")
+    parser.add_argument("salida", help="Directorio de salida, o archivo .zip con --zip")
+    parser.add_argument("--periodo", default=date.today().strftime("%Y-%m"), help="Periodo YYYY-MM (por defecto el actual)")
+    parser.add_argument("--zip", action="store_true", help="Escribir un solo archivo zip")
+    parser.add_argument("--workers", type=int, help="Procesos a usar (por defecto todos los núcleos)")
+    args = parser.parse_args()
+    if not re.match(r"^\d{4}-(0[1-9]|1[0-2])$", args.periodo):
+        parser.error("Periodo debe tener formato YYYY-MM")
+    asyncio.run(facturas_pdf(args.periodo, args.salida, args.zip, args.workers))
+
+
+if __name__ == "__main__":
+    main()
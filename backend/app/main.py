@@ -6,15 +6,25 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import settings
 from app.core.redis import close_redis, init_redis
+from app.services.documentos import start_sweeper as documentos_sweeper_start
+from app.services.documentos import stop_sweeper as documentos_sweeper_stop
+from app.services.mikrotik_outbox import sync_worker
+from app.services.mikrotik_pool import mikrotik_pool
+from app.services.pdf_pool import pdf_pool
+from app.services.storage import storage
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Create upload directories
-    os.makedirs("/app/uploads/instalaciones/solicitudes", exist_ok=True)
-    os.makedirs("/app/uploads/contratos/firmados", exist_ok=True)
+    # Create upload directories, and the storage root or bucket
+    os.makedirs(settings.UPLOAD_TMP_DIR, exist_ok=True)
+    await storage.start()
 
     await init_redis()
+    mikrotik_pool.start()
+
+    # Metadata of documents left unprocessed, in one process (leader election)
+    await documentos_sweeper_start()
 
     # Initialize role permissions if needed (skip if table doesn't exist yet)
     try:
@@ -37,7 +47,16 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"Note: Could not start router monitoring: {e}")
 
+    # Start worker that applies queued contract changes to the routers
+    sync_worker.start()
+
     yield
+    from app.services.router_monitor import stop_monitoring
+    await stop_monitoring()
+    await documentos_sweeper_stop()
+    await sync_worker.stop()
+    await mikrotik_pool.close()
+    await pdf_pool.close()
     await close_redis()
 
 
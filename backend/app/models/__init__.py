@@ -1,13 +1,17 @@
 from app.models.base import Base, BaseModel
 from app.models.cliente import Cliente, TipoIdentificacion
 from app.models.contrato import Contrato, EstadoContrato, TipoConexion
+from app.models.documento import Documento
 from app.models.factura import EstadoFactura, Factura
 from app.models.instalacion import EstadoInstalacion, Instalacion
+from app.models.ip_reservation import IPReservation
+from app.models.mikrotik_sync_job import AccionSync, EstadoSync, MikroTikSyncJob
 from app.models.pago import EstadoPago, MetodoPago, Pago
 from app.models.plan import Plan
 from app.models.role_permission import RolePermission
 from app.models.router import Router
 from app.models.router_event import RouterEvent
+from app.models.search_entry import SearchEntry, TipoEntrada
 from app.models.settings import Settings
 from app.models.usuario import RolUsuario, Usuario
 
@@ -26,11 +30,18 @@ __all__ = [
     "MetodoPago",
     "EstadoPago",
     "Factura",
+    "Documento",
     "EstadoFactura",
     "Instalacion",
     "EstadoInstalacion",
     "RolePermission",
     "Router",
     "RouterEvent",
+    "SearchEntry",
+    "TipoEntrada",
+    "IPReservation",
+    "MikroTikSyncJob",
+    "AccionSync",
+    "EstadoSync",
     "Settings",
 ]
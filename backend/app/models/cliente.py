@@ -1,9 +1,10 @@
 import enum
 
-from sqlalchemy import Boolean, Enum, String, Text
+from sqlalchemy import Boolean, Enum, Index, String, Text, event
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import BaseModel
+from app.utils.text import build_search_text
 
 
 class TipoIdentificacion(str, enum.Enum):
@@ -15,6 +16,14 @@ class TipoIdentificacion(str, enum.Enum):
 
 class Cliente(BaseModel):
     __tablename__ = "clientes"
+    __table_args__ = (
+        Index(
+            "ix_clientes_search_text_trgm",
+            "search_text",
+            postgresql_using="gin",
+            postgresql_ops={"search_text": "gin_trgm_ops"},
+        ),
+    )
 
     tipo_identificacion: Mapped[TipoIdentificacion] = mapped_column(
         Enum(TipoIdentificacion), nullable=False
@@ -33,6 +42,25 @@ class Cliente(BaseModel):
     distrito: Mapped[str | None] = mapped_column(String(50), nullable=True)
     direccion_exacta: Mapped[str | None] = mapped_column(Text, nullable=True)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
+    # Accent-free lowercase names, email and identification, kept in sync on
+    # insert/update; backs the trigram search
+    search_text: Mapped[str] = mapped_column(Text, nullable=False, server_default="")
 
     contratos: Mapped[list["Contrato"]] = relationship(back_populates="cliente")  # noqa: F821
     pagos: Mapped[list["Pago"]] = relationship(back_populates="cliente")  # noqa: F821
+
+    def build_search_text(self) -> str:
+        return build_search_text(
+            self.nombre,
+            self.apellido1,
+            self.apellido2,
+            self.razon_social,
+            self.email,
+            self.numero_identificacion,
+        )
+
+
+@event.listens_for(Cliente, "before_insert")
+@event.listens_for(Cliente, "before_update")
+def _update_search_text(mapper, connection, target: Cliente) -> None:
+    target.search_text = target.build_search_text()
@@ -1,7 +1,7 @@
 import enum
 from datetime import date
 
-from sqlalchemy import Date, Enum, ForeignKey, Integer, String, Text
+from sqlalchemy import Date, Enum, ForeignKey, Index, Integer, String, Text, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -22,6 +22,31 @@ class TipoConexion(str, enum.Enum):
 
 class Contrato(BaseModel):
     __tablename__ = "contratos"
+    __table_args__ = (
+        # An IP can only be assigned once per router
+        Index(
+            "uq_contratos_router_id_ip_asignada",
+            "router_id",
+            "ip_asignada",
+            unique=True,
+            postgresql_where=text("router_id IS NOT NULL AND ip_asignada IS NOT NULL"),
+        ),
+        # PPPoE username lookups per router
+        Index(
+            "ix_contratos_router_id_pppoe_usuario",
+            "router_id",
+            "pppoe_usuario",
+            postgresql_where=text("tipo_conexion = 'PPPOE'"),
+        ),
+        # Routers with PPPoE contracts on a plan (PPP profile sync)
+        Index(
+            "ix_contratos_plan_id_router_id_pppoe",
+            "plan_id",
+            "router_id",
+            postgresql_where=text("tipo_conexion = 'PPPOE'"),
+        ),
+        Index("ix_contratos_cliente_id", "cliente_id"),
+    )
 
     numero_contrato: Mapped[str] = mapped_column(
         String(20), unique=True, nullable=False, index=True
@@ -40,6 +65,7 @@ class Contrato(BaseModel):
     dia_facturacion: Mapped[int] = mapped_column(Integer, default=1, nullable=False)
     notas: Mapped[str | None] = mapped_column(Text, nullable=True)
     pdf_firmado_path: Mapped[str | None] = mapped_column(String(500), nullable=True)
+    pdf_firmado_sha256: Mapped[str | None] = mapped_column(String(64), nullable=True)
 
     # MikroTik integration fields
     tipo_conexion: Mapped[TipoConexion] = mapped_column(
@@ -0,0 +1,27 @@
+from datetime import datetime
+
+from sqlalchemy import JSON, BigInteger, DateTime, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import BaseModel
+
+
+class Documento(BaseModel):
+    """
+    Stored document, content-addressed
+
+    One row per distinct content: uploads with the same bytes share the row
+    and the stored object. Page count, PDF metadata and the thumbnail are
+    filled in the background after the upload (procesado_at).
+    """
+    __tablename__ = "documentos"
+
+    sha256: Mapped[str] = mapped_column(String(64), unique=True, nullable=False, index=True)
+    # Key in the storage backend, see app.services.storage
+    storage_key: Mapped[str] = mapped_column(String(500), nullable=False)
+    content_type: Mapped[str] = mapped_column(String(100), nullable=False)
+    tamano_bytes: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    paginas: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    metadatos: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    miniatura_key: Mapped[str | None] = mapped_column(String(500), nullable=True)
+    procesado_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
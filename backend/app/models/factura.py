@@ -1,7 +1,7 @@
 import enum
-from datetime import date, datetime
+from datetime import date
 
-from sqlalchemy import Date, DateTime, Enum, ForeignKey, Numeric, String, Text
+from sqlalchemy import Date, Enum, ForeignKey, Index, Numeric, String, Text, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -16,6 +16,12 @@ class EstadoFactura(str, enum.Enum):
 
 class Factura(BaseModel):
     __tablename__ = "facturas"
+    __table_args__ = (
+        # One invoice per contract and period, billing runs rely on it to be re-runnable
+        UniqueConstraint("contrato_id", "periodo", name="uq_facturas_contrato_id_periodo"),
+        Index("ix_facturas_periodo", "periodo"),
+        Index("ix_facturas_cliente_id", "cliente_id"),
+    )
 
     numero_factura: Mapped[str] = mapped_column(
         String(50), unique=True, nullable=False, index=True
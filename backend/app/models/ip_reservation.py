@@ -0,0 +1,30 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, String, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import BaseModel
+
+
+class IPReservation(BaseModel):
+    """
+    Short-lived lease on a router IP while a contract is being created
+
+    Reserved IPs are skipped by the allocator until the lease expires or a
+    contract takes the IP.
+    """
+    __tablename__ = "ip_reservations"
+    __table_args__ = (
+        UniqueConstraint("router_id", "ip", name="uq_ip_reservations_router_id_ip"),
+    )
+
+    router_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("routers.id", ondelete="CASCADE"), nullable=False
+    )
+    ip: Mapped[str] = mapped_column(String(50), nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
+    reservado_por: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("usuarios.id", ondelete="SET NULL"), nullable=True
+    )
@@ -0,0 +1,62 @@
+import enum
+import uuid
+from datetime import datetime
+
+from sqlalchemy import JSON, DateTime, Enum, ForeignKey, Index, Integer, String, Text, func, text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import BaseModel
+
+
+class AccionSync(str, enum.Enum):
+    SYNC = "sync"          # Apply the current contract state to its router
+    LIMPIEZA = "limpieza"  # Remove an old IP / PPP secret from a router
+
+
+class EstadoSync(str, enum.Enum):
+    PENDIENTE = "pendiente"
+    EN_PROCESO = "en_proceso"
+    COMPLETADO = "completado"
+    FALLIDO = "fallido"
+
+
+class MikroTikSyncJob(BaseModel):
+    """
+    Outbox of MikroTik changes produced by contract writes
+
+    Rows are written in the same transaction as the contract and applied to
+    the router by the sync worker after commit.
+    """
+    __tablename__ = "mikrotik_sync_jobs"
+    __table_args__ = (
+        # At most one pending SYNC per contract: the worker always applies the
+        # latest contract state, so queued duplicates would be redundant
+        Index(
+            "uq_mikrotik_sync_jobs_pending_sync",
+            "contrato_id",
+            unique=True,
+            postgresql_where=text("estado = 'PENDIENTE' AND accion = 'SYNC'"),
+        ),
+        Index("ix_mikrotik_sync_jobs_estado_next_attempt_at", "estado", "next_attempt_at"),
+    )
+
+    contrato_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("contratos.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    router_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("routers.id", ondelete="CASCADE"), nullable=True
+    )
+    accion: Mapped[AccionSync] = mapped_column(Enum(AccionSync), nullable=False)
+    estado: Mapped[EstadoSync] = mapped_column(
+        Enum(EstadoSync), default=EstadoSync.PENDIENTE, nullable=False
+    )
+    # LIMPIEZA: {"ip": "..."} or {"pppoe_usuario": "..."}
+    payload: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    intentos: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    next_attempt_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    completed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    worker: Mapped[str | None] = mapped_column(String(100), nullable=True)
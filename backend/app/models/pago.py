@@ -1,7 +1,7 @@
 import enum
 from datetime import date, datetime
 
-from sqlalchemy import Date, DateTime, Enum, ForeignKey, Numeric, String, Text
+from sqlalchemy import Date, DateTime, Enum, ForeignKey, Index, Numeric, String, Text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -24,6 +24,15 @@ class EstadoPago(str, enum.Enum):
 
 class Pago(BaseModel):
     __tablename__ = "pagos"
+    __table_args__ = (
+        # Keyset pagination (see paginate_cursor)
+        Index("ix_pagos_created_at_id", "created_at", "id"),
+        # Payments of a contract for a period (cutoffs, duplicates)
+        Index("ix_pagos_contrato_id_periodo_facturado", "contrato_id", "periodo_facturado"),
+        # Pending payments queue, newest first
+        Index("ix_pagos_estado_created_at", "estado", "created_at"),
+        Index("ix_pagos_cliente_id", "cliente_id"),
+    )
 
     cliente_id: Mapped[str] = mapped_column(
         UUID(as_uuid=True), ForeignKey("clientes.id"), nullable=False
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import String, Text, ForeignKey, DateTime, JSON
+from sqlalchemy import String, Text, ForeignKey, DateTime, Index, JSON
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 import uuid
 
@@ -11,6 +11,11 @@ class RouterEvent(BaseModel):
     Router event history for monitoring and auditing
     """
     __tablename__ = "router_events"
+    __table_args__ = (
+        # Keyset pagination (see paginate_cursor), globally and per router
+        Index("ix_router_events_created_at_id", "created_at", "id"),
+        Index("ix_router_events_router_id_created_at_id", "router_id", "created_at", "id"),
+    )
 
     router_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("routers.id", ondelete="CASCADE"), nullable=False, index=True)
     event_type: Mapped[str] = mapped_column(String(50), nullable=False, index=True)
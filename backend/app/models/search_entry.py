@@ -0,0 +1,188 @@
+import enum
+import uuid
+
+from sqlalchemy import Index, String, Text, UniqueConstraint, and_, event, func, literal, select
+from sqlalchemy.dialects.postgresql import ARRAY, UUID, array, insert
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import BaseModel
+from app.models.cliente import Cliente
+from app.models.contrato import Contrato
+from app.models.router import Router
+from app.utils.text import build_search_text
+
+
+class TipoEntrada(str, enum.Enum):
+    CLIENTE = "cliente"
+    CONTRATO = "contrato"
+    ROUTER = "router"
+
+
+class SearchEntry(BaseModel):
+    """
+    Denormalized global search index
+
+    One row per client, contract and router with its display text, the
+    normalized text searched with trigrams and the exact identifiers
+    (IP, PPPoE user, contract number, cédula) matched first. Rows are kept
+    up to date by the mapper events below, in the same transaction as the
+    write that changed them. ORM bulk updates don't fire those events: code
+    writing indexed columns that way upserts the entries itself (see
+    router_monitor.save_check_results).
+    """
+    __tablename__ = "search_entries"
+    __table_args__ = (
+        UniqueConstraint("tipo", "entidad_id", name="uq_search_entries_tipo_entidad_id"),
+        Index(
+            "ix_search_entries_search_text_trgm",
+            "search_text",
+            postgresql_using="gin",
+            postgresql_ops={"search_text": "gin_trgm_ops"},
+        ),
+        Index("ix_search_entries_claves", "claves", postgresql_using="gin"),
+    )
+
+    # TipoEntrada value
+    tipo: Mapped[str] = mapped_column(String(20), nullable=False)
+    entidad_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    titulo: Mapped[str] = mapped_column(String(255), nullable=False)
+    subtitulo: Mapped[str | None] = mapped_column(Text, nullable=True)
+    search_text: Mapped[str] = mapped_column(Text, nullable=False)
+    # Exact-match identifiers, lowercase
+    claves: Mapped[list[str]] = mapped_column(ARRAY(Text), nullable=False)
+
+
+def _claves(*values: str | None) -> list[str]:
+    return sorted({value.strip().lower() for value in values if value and value.strip()})
+
+
+def upsert_entries(values):
+    """INSERT ... ON CONFLICT (tipo, entidad_id) DO UPDATE for values (one or a list) or a select"""
+    table = SearchEntry.__table__
+    stmt = insert(table)
+    stmt = stmt.values(values) if isinstance(values, (dict, list)) else stmt.from_select(
+        ["id", "tipo", "entidad_id", "titulo", "subtitulo", "search_text", "claves"], values
+    )
+    return stmt.on_conflict_do_update(
+        constraint="uq_search_entries_tipo_entidad_id",
+        set_={
+            "titulo": stmt.excluded.titulo,
+            "subtitulo": stmt.excluded.subtitulo,
+            "search_text": stmt.excluded.search_text,
+            "claves": stmt.excluded.claves,
+            "updated_at": func.now(),
+        },
+    )
+
+
+def contrato_entries_select(*where):
+    """
+    Search entries of the contracts matching where, built in SQL
+
+    The client part of the text is the client's own (already normalized)
+    search_text, so renaming a client only needs this statement re-run for
+    its contracts.
+    """
+    cliente_nombre = func.coalesce(
+        Cliente.razon_social, func.concat_ws(" ", Cliente.nombre, Cliente.apellido1, Cliente.apellido2)
+    )
+    return (
+        select(
+            func.gen_random_uuid(),
+            literal(TipoEntrada.CONTRATO.value),
+            Contrato.id,
+            Contrato.numero_contrato,
+            func.concat_ws(" · ", cliente_nombre, Contrato.ip_asignada, Contrato.pppoe_usuario),
+            func.concat_ws(
+                " ",
+                func.lower(Contrato.numero_contrato),
+                Contrato.ip_asignada,
+                func.lower(Contrato.pppoe_usuario),
+                Cliente.search_text,
+            ),
+            func.array_remove(
+                array([
+                    func.lower(Contrato.numero_contrato),
+                    Contrato.ip_asignada,
+                    func.lower(Contrato.pppoe_usuario),
+                    func.lower(Cliente.numero_identificacion),
+                ]),
+                None,
+            ),
+        )
+        .join(Cliente, Cliente.id == Contrato.cliente_id)
+        .where(and_(*where))
+    )
+
+
+def cliente_entry(cliente: Cliente) -> dict:
+    nombre = cliente.razon_social or " ".join(
+        part for part in (cliente.nombre, cliente.apellido1, cliente.apellido2) if part
+    )
+    return {
+        "id": uuid.uuid4(),
+        "tipo": TipoEntrada.CLIENTE.value,
+        "entidad_id": cliente.id,
+        "titulo": nombre,
+        "subtitulo": " · ".join(part for part in (cliente.numero_identificacion, cliente.email) if part),
+        "search_text": cliente.build_search_text(),
+        "claves": _claves(cliente.numero_identificacion, cliente.email),
+    }
+
+
+def router_entry(router: Router, identity: str | None = None) -> dict:
+    """Search entry of a router, with identity instead of router.identity if given"""
+    identity = identity or router.identity
+    return {
+        "id": uuid.uuid4(),
+        "tipo": TipoEntrada.ROUTER.value,
+        "entidad_id": router.id,
+        "titulo": router.nombre,
+        "subtitulo": router.ip,
+        "search_text": build_search_text(router.nombre, router.ip, identity),
+        "claves": _claves(router.ip),
+    }
+
+
+def _delete_entry(connection, tipo: TipoEntrada, entidad_id: uuid.UUID) -> None:
+    connection.execute(
+        SearchEntry.__table__.delete()
+        .where(SearchEntry.tipo == tipo.value)
+        .where(SearchEntry.entidad_id == entidad_id)
+    )
+
+
+@event.listens_for(Cliente, "after_insert")
+@event.listens_for(Cliente, "after_update")
+def _index_cliente(mapper, connection, target: Cliente) -> None:
+    connection.execute(upsert_entries(cliente_entry(target)))
+    # Contract entries embed the client's name and identification
+    connection.execute(upsert_entries(contrato_entries_select(Contrato.cliente_id == target.id)))
+
+
+@event.listens_for(Contrato, "after_insert")
+@event.listens_for(Contrato, "after_update")
+def _index_contrato(mapper, connection, target: Contrato) -> None:
+    connection.execute(upsert_entries(contrato_entries_select(Contrato.id == target.id)))
+
+
+@event.listens_for(Router, "after_insert")
+@event.listens_for(Router, "after_update")
+def _index_router(mapper, connection, target: Router) -> None:
+    connection.execute(upsert_entries(router_entry(target)))
+
+
+@event.listens_for(Cliente, "after_delete")
+def _unindex_cliente(mapper, connection, target: Cliente) -> None:
+    _delete_entry(connection, TipoEntrada.CLIENTE, target.id)
+
+
+@event.listens_for(Contrato, "after_delete")
+def _unindex_contrato(mapper, connection, target: Contrato) -> None:
+    _delete_entry(connection, TipoEntrada.CONTRATO, target.id)
+
+
+@event.listens_for(Router, "after_delete")
+def _unindex_router(mapper, connection, target: Router) -> None:
+    _delete_entry(connection, TipoEntrada.ROUTER, target.id)
+
@@ -0,0 +1,281 @@
+"""Plan check script: EXPLAINs the hot service queries and fails on sequential scans.
+
+Runs every check inside a transaction that is always rolled back. With --seed
+the tables are first filled with synthetic rows and ANALYZEd, so the check
+gives the same plans on an empty development database as on production.
+
+Usage:
+    python -m app.plan_check [--seed N]
+
+Exits with status 1 if a query scans a large table sequentially or no longer
+uses its index.
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, NamedTuple
+
+from sqlalchemy import Select, insert, select, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import async_session
+from app.models.cliente import Cliente, TipoIdentificacion
+from app.models.contrato import Contrato, EstadoContrato, TipoConexion
+from app.models.pago import EstadoPago, MetodoPago, Pago
+from app.models.plan import Plan
+from app.models.router import Router
+from app.models.router_event import RouterEvent
+from app.models.search_entry import SearchEntry, contrato_entries_select, upsert_entries
+from app.services.contratos import ip_in_use_query, pppoe_user_in_use_query
+from app.services.cortes import corte_query
+from app.services.pagos import pagos_query
+from app.services.planes import pppoe_routers_query
+from app.services.router_events import router_events_query
+from app.utils.explain import explain
+from app.utils.text import build_search_text
+
+# Tables that must never be scanned sequentially by a checked query
+LARGE_TABLES = {"clientes", "contratos", "pagos", "router_events", "search_entries"}
+
+# Prefix of the synthetic rows, they never outlive the rolled back transaction
+SEED_PREFIX = "PLANCHK"
+
+SEED_ROUTERS = 20
+SEED_PLANES = 5
+SEED_PERIODOS = 6
+
+
+class PlanCheck(NamedTuple):
+    name: str
+    statement: Select
+    # Index the plan must use, None to only forbid sequential scans
+    index: str | None = None
+    # Tables allowed to be scanned sequentially by this query
+    allow_seq_scan: frozenset[str] = frozenset()
+
+
+def _walk(plan: dict[str, Any]):
+    yield plan
+    for child in plan.get("Plans", ()):
+        yield from _walk(child)
+
+
+def check_plan(check: PlanCheck, plan: dict[str, Any]) -> list[str]:
+    """Problems found in a plan, empty if it is fine"""
+    problems = []
+    indexes = set()
+    for node in _walk(plan):
+        if "Index Name" in node:
+            indexes.add(node["Index Name"])
+        relation = node.get("Relation Name")
+        if (
+            node.get("Node Type") == "Seq Scan"
+            and relation in LARGE_TABLES
+            and relation not in check.allow_seq_scan
+        ):
+            problems.append(f"Seq Scan en {relation}")
+    if check.index and check.index not in indexes:
+        usados = ", ".join(sorted(indexes)) or "ninguno"
+        problems.append(f"no usa {check.index} (índices usados: {usados})")
+    return problems
+
+
+async def seed(db: AsyncSession, n: int) -> None:
+    """Insert n clients/contracts, 3n payments and n router events"""
+    rng = random.Random(42)
+    now = datetime.now(timezone.utc)
+
+    planes = [
+        {"id": uuid.uuid4(), "nombre": f"{SEED_PREFIX} Plan {i}", "velocidad_bajada_mbps": 10 * (i + 1),
+         "velocidad_subida_mbps": 5 * (i + 1), "precio_mensual": 10000 + 5000 * i, "moneda": "CRC",
+         "is_active": True}
+        for i in range(SEED_PLANES)
+    ]
+    routers = [
+        {"id": uuid.uuid4(), "nombre": f"{SEED_PREFIX} Router {i}", "ip": f"192.0.2.{i + 1}", "usuario": "admin",
+         "hashed_password": "-", "puerto": 8728, "ssl": False, "is_active": True,
+         "cidr_disponibles": f"10.{i}.0.0/16"}
+        for i in range(SEED_ROUTERS)
+    ]
+    clientes = []
+    contratos = []
+    for i in range(n):
+        cliente_id = uuid.uuid4()
+        nombre, apellido = f"Cliente{i}", f"Apellido{rng.randrange(n)}"
+        numero_identificacion = f"9{i:08d}"
+        clientes.append({
+            "id": cliente_id, "tipo_identificacion": TipoIdentificacion.CEDULA_FISICA,
+            "numero_identificacion": numero_identificacion, "nombre": nombre, "apellido1": apellido,
+            "email": f"cliente{i}@example.com", "is_active": True,
+            "search_text": build_search_text(nombre, apellido, f"cliente{i}@example.com", numero_identificacion),
+        })
+        router = routers[i % SEED_ROUTERS]
+        pppoe = i % 2 == 0
+        contratos.append({
+            "id": uuid.uuid4(), "numero_contrato": f"{SEED_PREFIX}-{i:06d}", "cliente_id": cliente_id,
+            "plan_id": planes[i % SEED_PLANES]["id"], "fecha_inicio": date(2024, 1, 1),
+            "estado": EstadoContrato.ACTIVO if i % 10 else EstadoContrato.SUSPENDIDO, "dia_facturacion": 1,
+            "tipo_conexion": TipoConexion.PPPOE if pppoe else TipoConexion.IPOE,
+            "router_id": router["id"],
+            "ip_asignada": f"10.{i % SEED_ROUTERS}.{(i // SEED_ROUTERS) // 254}.{(i // SEED_ROUTERS) % 254 + 1}",
+            "pppoe_usuario": f"user{i}" if pppoe else None,
+        })
+
+    pagos = []
+    for i, contrato in enumerate(contratos):
+        for m in range(3):
+            pagos.append({
+                "id": uuid.uuid4(), "cliente_id": contrato["cliente_id"], "contrato_id": contrato["id"],
+                "monto": 15000, "moneda": "CRC", "fecha_pago": date(2024, m + 1, 5),
+                "metodo_pago": MetodoPago.SINPE_MOVIL, "periodo_facturado": f"2024-{rng.randrange(SEED_PERIODOS) + 1:02d}",
+                "estado": EstadoPago.PENDIENTE if rng.random() < 0.05 else EstadoPago.VALIDADO,
+                "created_at": now - timedelta(minutes=rng.randrange(500_000)),
+            })
+    events = [
+        {"id": uuid.uuid4(), "router_id": routers[i % SEED_ROUTERS]["id"], "event_type": "OFFLINE",
+         "description": "-", "created_at": now - timedelta(minutes=i)}
+        for i in range(n)
+    ]
+
+    for model, rows in (
+        (Plan, planes), (Router, routers), (Cliente, clientes), (Contrato, contratos),
+        (Pago, pagos), (RouterEvent, events),
+    ):
+        for i in range(0, len(rows), 5000):
+            await db.execute(insert(model), rows[i:i + 5000])
+    await db.execute(upsert_entries(contrato_entries_select(Contrato.numero_contrato.like(f"{SEED_PREFIX}-%"))))
+
+    for table in ("planes", "routers", "clientes", "contratos", "pagos", "router_events", "search_entries"):
+        await db.execute(text(f"ANALYZE {table}"))
+
+
+async def build_checks(db: AsyncSession) -> list[PlanCheck]:
+    """Checks for the service queries, with parameters taken from existing rows"""
+    result = await db.execute(
+        select(Contrato)
+        .where(Contrato.tipo_conexion == TipoConexion.PPPOE)
+        .where(Contrato.router_id.isnot(None))
+        .where(Contrato.pppoe_usuario.isnot(None))
+        .limit(1)
+    )
+    pppoe = result.scalar_one_or_none()
+    result = await db.execute(
+        select(Contrato).where(Contrato.router_id.isnot(None)).where(Contrato.ip_asignada.isnot(None)).limit(1)
+    )
+    ipoe = result.scalar_one_or_none()
+    pago = (await db.execute(select(Pago).limit(1))).scalar_one_or_none()
+    cliente = (await db.execute(select(Cliente).limit(1))).scalar_one_or_none()
+    event = (await db.execute(select(RouterEvent).limit(1))).scalar_one_or_none()
+
+    checks = []
+    if ipoe:
+        checks.append(PlanCheck(
+            "contratos: IP en uso", ip_in_use_query(ipoe.router_id, ipoe.ip_asignada),
+            "uq_contratos_router_id_ip_asignada",
+        ))
+    if pppoe:
+        checks.append(PlanCheck(
+            "contratos: usuario PPPoE en uso", pppoe_user_in_use_query(pppoe.router_id, pppoe.pppoe_usuario),
+            "ix_contratos_router_id_pppoe_usuario",
+        ))
+        checks.append(PlanCheck(
+            "planes: routers PPPoE del plan", pppoe_routers_query(pppoe.plan_id),
+            "ix_contratos_plan_id_router_id_pppoe",
+        ))
+    if cliente:
+        checks.append(PlanCheck(
+            "contratos: por cliente", select(Contrato).where(Contrato.cliente_id == cliente.id),
+            "ix_contratos_cliente_id",
+        ))
+        checks.append(PlanCheck(
+            "clientes: búsqueda", select(Cliente).where(
+                Cliente.search_text.contains(cliente.numero_identificacion, autoescape=True)
+            ).limit(20),
+            "ix_clientes_search_text_trgm",
+        ))
+        checks.append(PlanCheck(
+            "search: claves exactas",
+            select(SearchEntry).where(SearchEntry.claves.contains([cliente.numero_identificacion.lower()])).limit(20),
+            "ix_search_entries_claves",
+        ))
+    if pago:
+        checks.append(PlanCheck(
+            "pagos: contrato y periodo", pagos_query(contrato_id=pago.contrato_id, periodo=pago.periodo_facturado),
+            "ix_pagos_contrato_id_periodo_facturado",
+        ))
+        checks.append(PlanCheck(
+            "pagos: pendientes", pagos_query(estado=EstadoPago.PENDIENTE).limit(20),
+            "ix_pagos_estado_created_at",
+        ))
+        checks.append(PlanCheck(
+            "pagos: por cliente", pagos_query(cliente_id=pago.cliente_id).limit(20),
+        ))
+        checks.append(PlanCheck(
+            "pagos: página por cursor",
+            pagos_query()
+            .order_by(None)
+            .order_by(Pago.created_at.desc(), Pago.id.desc())
+            .where(tuple_(Pago.created_at, Pago.id) < tuple_(pago.created_at, pago.id))
+            .limit(21),
+            "ix_pagos_created_at_id",
+        ))
+        # The contract filter is on estado, only the payment lookup must be indexed
+        checks.append(PlanCheck(
+            "cortes: reactivar", corte_query("reactivar", pago.periodo_facturado),
+            "ix_pagos_contrato_id_periodo_facturado", frozenset({"contratos"}),
+        ))
+    if event:
+        checks.append(PlanCheck(
+            "router_events: página por cursor del router",
+            router_events_query(router_id=event.router_id)
+            .order_by(None)
+            .order_by(RouterEvent.created_at.desc(), RouterEvent.id.desc())
+            .limit(51),
+            "ix_router_events_router_id_created_at_id",
+        ))
+    return checks
+
+
+async def run(seed_rows: int) -> bool:
+    ok = True
+    async with async_session() as session:
+        try:
+            if seed_rows:
+                print(f"Generando {seed_rows} contratos de prueba...")
+                await seed(session, seed_rows)
+
+            checks = await build_checks(session)
+            if not checks:
+                print("No hay datos para revisar; use --seed N para generar datos de prueba.")
+                return False
+
+            for check in checks:
+                plan = await explain(session, check.statement)
+                problems = check_plan(check, plan)
+                estado = "OK   " if not problems else "FALLO"
+                print(f"{estado} {check.name} (costo {plan.get('Total Cost')})")
+                for problem in problems:
+                    print(f"      {problem}")
+                ok = ok and not problems
+        finally:
+            # Nothing, seeded or otherwise, is ever committed
+            await session.rollback()
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Revisa los planes de ejecución de las consultas frecuentes.")
+    parser.add_argument(
+        "--seed", type=int, default=0, metavar="N",
+        help="Generar N contratos de prueba (en una transacción que se revierte)",
+    )
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(run(args.seed)) else 1)
+
+
+if __name__ == "__main__":
+    main()
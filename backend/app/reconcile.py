@@ -0,0 +1,57 @@
+"""Reconcile script: syncs MikroTik routers with the contracts in the database.
+
+Usage:
+    python -m app.reconcile [--router-id UUID] [--dry-run]
+"""
+
+import argparse
+import asyncio
+import uuid
+
+from app.database import async_session
+from app.schemas.reconciliation import ReconciliationCounts, ReconciliationResult
+from app.services.mikrotik_pool import mikrotik_pool
+from app.services.reconciliation import reconcile_all_routers, reconcile_router
+
+
+def _format_counts(counts: ReconciliationCounts) -> str:
+    return f"+{counts.added} ~{counts.updated} -{counts.removed}"
+
+
+def print_result(result: ReconciliationResult):
+    modo = " (simulación)" if result.dry_run else ""
+    print(f"Router {result.router_nombre}{modo}: {result.contratos} contratos, {result.duration_ms} ms")
+    print(f"  Address-lists: {_format_counts(result.address_list)}")
+    print(f"  PPP secrets:   {_format_counts(result.ppp_secrets)}")
+    print(f"  PPP profiles:  {_format_counts(result.ppp_profiles)}")
+    print(f"  IP pools:      {_format_counts(result.ip_pools)}")
+    for error in result.errors:
+        print(f"  Error: {error}")
+
+
+async def reconcile(router_id: uuid.UUID | None, dry_run: bool):
+    try:
+        async with async_session() as session:
+            if router_id:
+                results = [await reconcile_router(session, router_id, dry_run)]
+            else:
+                results = await reconcile_all_routers(session, dry_run)
+    finally:
+        await mikrotik_pool.close()
+
+    if not results:
+        print("No hay routers activos para sincronizar.")
+    for result in results:
+        print_result(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sincroniza los routers MikroTik con los contratos.")
+    parser.add_argument("--router-id", type=uuid.UUID, help="Sincronizar solo este router")
+    parser.add_argument("--dry-run", action="store_true", help="Mostrar cambios sin aplicarlos")
+    args = parser.parse_args()
+    asyncio.run(reconcile(args.router_id, args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
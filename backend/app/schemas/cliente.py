@@ -66,3 +66,7 @@ class ClienteResponse(ClienteBase):
     updated_at: datetime
 
     model_config = {"from_attributes": True}
+
+
+class ClienteSearchResult(ClienteResponse):
+    score: float
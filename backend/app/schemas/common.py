@@ -16,6 +16,15 @@ class PaginatedResponse(BaseModel, Generic[T]):
     page: int
     page_size: int
     total_pages: int
+    total_is_estimate: bool = False
+
+
+class CursorPaginatedResponse(BaseModel, Generic[T]):
+    items: list[T]
+    page_size: int
+    next_cursor: str | None = None
+    total: int | None = None
+    total_is_estimate: bool = False
 
 
 class MessageResponse(BaseModel):
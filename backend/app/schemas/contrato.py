@@ -47,6 +47,7 @@ class ContratoResponse(ContratoBase):
     id: uuid.UUID
     numero_contrato: str
     pdf_firmado_path: str | None = None
+    pdf_firmado_sha256: str | None = None
     created_at: datetime
     updated_at: datetime
 
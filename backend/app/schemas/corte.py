@@ -0,0 +1,50 @@
+import re
+import uuid
+
+from pydantic import BaseModel, field_validator
+
+from app.schemas.reconciliation import ReconciliationCounts
+
+
+class CorteRequest(BaseModel):
+    accion: str  # "suspender" or "reactivar"
+    periodo: str  # YYYY-MM
+    router_id: uuid.UUID | None = None
+    dry_run: bool = False
+
+    @field_validator("accion")
+    @classmethod
+    def validate_accion(cls, v: str) -> str:
+        if v not in ("suspender", "reactivar"):
+            raise ValueError("Acción debe ser 'suspender' o 'reactivar'")
+        return v
+
+    @field_validator("periodo")
+    @classmethod
+    def validate_periodo(cls, v: str) -> str:
+        if not re.match(r"^\d{4}-(0[1-9]|1[0-2])$", v):
+            raise ValueError("Periodo debe tener formato YYYY-MM")
+        return v
+
+
+class CorteRouterResult(BaseModel):
+    router_id: uuid.UUID
+    router_nombre: str
+    contratos: int
+    address_list: ReconciliationCounts
+    ppp_secrets: ReconciliationCounts
+    errors: list[str] = []
+    # Contracts queued in the MikroTik outbox because the push failed
+    encolados: int = 0
+    duration_ms: int
+
+
+class CorteResult(BaseModel):
+    accion: str
+    periodo: str
+    dry_run: bool
+    contratos: int
+    numeros_contrato: list[str]
+    sin_router: int
+    routers: list[CorteRouterResult]
+    duration_ms: int
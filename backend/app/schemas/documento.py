@@ -0,0 +1,19 @@
+import uuid
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class DocumentoResponse(BaseModel):
+    id: uuid.UUID
+    sha256: str
+    content_type: str
+    tamano_bytes: int
+    # Filled in the background after upload, None until procesado_at is set
+    paginas: int | None = None
+    metadatos: dict | None = None
+    miniatura_key: str | None = None
+    procesado_at: datetime | None = None
+    created_at: datetime
+
+    model_config = {"from_attributes": True}
@@ -0,0 +1,64 @@
+import re
+import uuid
+from datetime import date, datetime
+from typing import Literal
+
+from pydantic import BaseModel, field_validator
+
+from app.models.factura import EstadoFactura
+
+
+class FacturaResponse(BaseModel):
+    id: uuid.UUID
+    numero_factura: str
+    contrato_id: uuid.UUID
+    cliente_id: uuid.UUID
+    clave_numerica_fe: str | None = None
+    fecha_emision: date
+    fecha_vencimiento: date
+    subtotal: float
+    impuesto: float
+    total: float
+    moneda: str
+    periodo: str
+    estado: EstadoFactura
+    notas: str | None = None
+    created_at: datetime
+    updated_at: datetime
+
+    model_config = {"from_attributes": True}
+
+
+class FacturacionRequest(BaseModel):
+    periodo: str  # YYYY-MM
+    # Only bill contracts whose billing day is on or before this date
+    fecha_corte: date | None = None
+    dry_run: bool = False
+
+    @field_validator("periodo")
+    @classmethod
+    def validate_periodo(cls, v: str) -> str:
+        if not re.match(r"^\d{4}-(0[1-9]|1[0-2])$", v):
+            raise ValueError("Periodo debe tener formato YYYY-MM")
+        return v
+
+
+class FacturacionResult(BaseModel):
+    periodo: str
+    fecha_corte: date | None = None
+    dry_run: bool
+    # Invoices created, or that would be created with dry_run
+    facturas: int
+    lotes: int
+    duration_ms: int
+
+
+class FacturaPDFResult(BaseModel):
+    periodo: str
+    destino: str
+    formato: Literal["directorio", "zip"]
+    facturas: int
+    tamano_bytes: int
+    workers: int
+    duration_ms: int
+    facturas_por_segundo: float
@@ -0,0 +1,23 @@
+import uuid
+from datetime import datetime
+
+from pydantic import BaseModel
+
+from app.models.mikrotik_sync_job import AccionSync, EstadoSync
+
+
+class MikroTikSyncJobResponse(BaseModel):
+    id: uuid.UUID
+    contrato_id: uuid.UUID
+    router_id: uuid.UUID | None = None
+    accion: AccionSync
+    estado: EstadoSync
+    payload: dict | None = None
+    intentos: int
+    next_attempt_at: datetime
+    last_error: str | None = None
+    completed_at: datetime | None = None
+    created_at: datetime
+    updated_at: datetime
+
+    model_config = {"from_attributes": True}
@@ -27,6 +27,14 @@ class PlanUpdate(BaseModel):
     is_active: bool | None = None
 
 
+class PPPProfileRouterResult(BaseModel):
+    router_id: uuid.UUID
+    router_nombre: str
+    success: bool
+    error: str | None = None
+    duration_ms: int
+
+
 class PlanResponse(PlanBase):
     id: uuid.UUID
     is_active: bool
@@ -34,3 +42,14 @@ class PlanResponse(PlanBase):
     updated_at: datetime
 
     model_config = {"from_attributes": True}
+
+
+class PlanUpdateResponse(PlanResponse):
+    # PPP profile update per router when the speeds changed, empty otherwise
+    routers: list[PPPProfileRouterResult] = []
+
+
+class PPPProfileSyncResponse(BaseModel):
+    message: str
+    profile_name: str
+    routers: list[PPPProfileRouterResult]
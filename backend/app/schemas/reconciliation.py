@@ -0,0 +1,22 @@
+import uuid
+
+from pydantic import BaseModel
+
+
+class ReconciliationCounts(BaseModel):
+    added: int = 0
+    updated: int = 0
+    removed: int = 0
+
+
+class ReconciliationResult(BaseModel):
+    router_id: uuid.UUID
+    router_nombre: str
+    dry_run: bool
+    contratos: int
+    address_list: ReconciliationCounts
+    ppp_secrets: ReconciliationCounts
+    ppp_profiles: ReconciliationCounts
+    ip_pools: ReconciliationCounts
+    errors: list[str] = []
+    duration_ms: int
@@ -46,3 +46,34 @@ class RouterTestConnectionResponse(BaseModel):
     success: bool
     message: str
     router_version: str | None = None
+
+
+class IPReservationResponse(BaseModel):
+    id: uuid.UUID
+    router_id: uuid.UUID
+    ip_address: str = Field(validation_alias="ip")
+    expires_at: datetime
+
+    model_config = {"from_attributes": True}
+
+
+class IPPoolUsage(BaseModel):
+    router_id: uuid.UUID
+    router_nombre: str
+    is_active: bool
+    cidr_disponibles: str | None = None
+    total: int
+    used: int
+    free: int
+    utilization: float
+    free_blocks: int
+    largest_free_block: int
+    largest_free_block_start: str | None = None
+    fragmentation: float
+    out_of_range: int
+
+
+class IPPoolUsageResponse(BaseModel):
+    routers: list[IPPoolUsage]
+    computed_at: datetime
+    cached: bool
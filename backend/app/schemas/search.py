@@ -0,0 +1,20 @@
+import uuid
+
+from pydantic import BaseModel
+
+from app.models.search_entry import TipoEntrada
+
+
+class SearchHit(BaseModel):
+    tipo: TipoEntrada
+    id: uuid.UUID
+    titulo: str
+    subtitulo: str | None = None
+    exacto: bool
+    score: float
+
+
+class SearchResponse(BaseModel):
+    query: str
+    hits: list[SearchHit]
+    duration_ms: float
@@ -1,6 +1,6 @@
 import uuid
 
-from sqlalchemy import or_, select
+from sqlalchemy import case, func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.exceptions import ConflictError, NotFoundError
@@ -9,6 +9,10 @@ from app.schemas.cliente import ClienteCreate, ClienteUpdate
 from app.schemas.common import PaginatedResponse
 from app.utils.cedula import validate_identificacion
 from app.utils.pagination import paginate
+from app.utils.text import normalize_search
+
+# Search results returned when no limit is given
+SEARCH_LIMIT = 20
 
 
 async def list_clientes(
@@ -21,22 +25,58 @@ async def list_clientes(
     query = select(Cliente).order_by(Cliente.created_at.desc())
 
     if search:
-        search_filter = f"%{search}%"
-        query = query.where(
+        # Substring match on the trigram-indexed search_text, accent-insensitive
+        query = query.where(Cliente.search_text.contains(normalize_search(search), autoescape=True))
+
+    if is_active is not None:
+        query = query.where(Cliente.is_active == is_active)
+
+    return await paginate(db, query, page, page_size, cached_count=True)
+
+
+async def search_clientes(
+    db: AsyncSession,
+    term: str,
+    limit: int = SEARCH_LIMIT,
+    is_active: bool | None = None,
+) -> list[tuple[Cliente, float]]:
+    """
+    Ranked client search over names, razon_social, email and identification
+
+    Accents and case are ignored (same normalization as the MikroTik
+    comments). Matches substrings and, for typos, similar words; both use
+    the GIN trigram index on search_text. An exact identification number
+    comes first, then results by word similarity.
+
+    Returns:
+        (cliente, score) pairs, best first; score is between 0 and 1
+    """
+    normalized = normalize_search(term)
+    if not normalized:
+        return []
+
+    score = func.word_similarity(normalized, Cliente.search_text)
+    query = (
+        select(Cliente, score.label("score"))
+        .where(
             or_(
-                Cliente.nombre.ilike(search_filter),
-                Cliente.apellido1.ilike(search_filter),
-                Cliente.apellido2.ilike(search_filter),
-                Cliente.razon_social.ilike(search_filter),
-                Cliente.numero_identificacion.ilike(search_filter),
-                Cliente.email.ilike(search_filter),
+                Cliente.search_text.contains(normalized, autoescape=True),
+                # word_similarity(term, search_text) above pg_trgm.word_similarity_threshold
+                Cliente.search_text.op("%>")(normalized),
             )
         )
-
+        .order_by(
+            case((Cliente.numero_identificacion == term.strip(), 0), else_=1),
+            score.desc(),
+            Cliente.nombre,
+        )
+        .limit(limit)
+    )
     if is_active is not None:
         query = query.where(Cliente.is_active == is_active)
 
-    return await paginate(db, query, page, page_size)
+    result = await db.execute(query)
+    return [(cliente, float(row_score)) for cliente, row_score in result.all()]
 
 
 async def get_cliente(db: AsyncSession, cliente_id: uuid.UUID) -> Cliente:
@@ -1,28 +1,50 @@
 import logging
-import os
 import uuid
-import unicodedata
 from datetime import date
 
 from fastapi import UploadFile
-from sqlalchemy import func, select
+from sqlalchemy import Select, func, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from app.config import settings
 from app.core.encryption import encryption_service
 from app.core.exceptions import BadRequestError, NotFoundError
 from app.models.cliente import Cliente
 from app.models.contrato import Contrato, EstadoContrato, TipoConexion
+from app.models.mikrotik_sync_job import MikroTikSyncJob
 from app.models.plan import Plan
 from app.models.router import Router
 from app.schemas.common import PaginatedResponse
 from app.schemas.contrato import ContratoCreate, ContratoUpdate
-from app.services.mikrotik import MikroTikService
-from app.services.routers import decrypt_router_password, get_local_address_from_cidrs
+from app.services.mikrotik import (
+    ADDRESS_LIST_ACTIVOS,
+    ADDRESS_LIST_SUSPENDIDOS,
+    MikroTikService,
+    ip_pool_name,
+    ppp_profile_name,
+)
+from app.services import documentos as documentos_service
+from app.services.ip_allocator import track_ip_change
+from app.services.ip_pool_usage import mark_pool_usage_stale
+from app.services.mikrotik_outbox import enqueue_cleanup, enqueue_sync, list_jobs_for_contrato
+from app.services.routers import (
+    consume_ip_reservation,
+    get_foreign_reservation,
+    decrypt_router_password,
+    get_local_address_from_cidrs,
+)
+from app.utils.cidr import split_cidrs
+from app.utils.files import PDF_MAGIC
 from app.utils.pagination import paginate
+from app.utils.text import to_ascii
 
 logger = logging.getLogger(__name__)
 
+# Partial unique index on (router_id, ip_asignada), see the Contrato model
+UNIQUE_ROUTER_IP_INDEX = "uq_contratos_router_id_ip_asignada"
+
 
 def normalize_for_mikrotik(text: str) -> str:
     """
@@ -40,13 +62,25 @@ def normalize_for_mikrotik(text: str) -> str:
     Returns:
         ASCII-safe string
     """
-    # Normalize unicode characters (decompose accents)
-    normalized = unicodedata.normalize('NFD', text)
-    # Remove combining characters (accents)
-    ascii_text = ''.join(char for char in normalized if unicodedata.category(char) != 'Mn')
-    # Keep only ASCII printable characters
-    ascii_safe = ''.join(char for char in ascii_text if ord(char) < 128)
-    return ascii_safe
+    return to_ascii(text)
+
+
+def build_mikrotik_comment(cliente: Cliente | None, numero_contrato: str) -> str:
+    """
+    Build the MikroTik comment for a contract: "{nombre cliente} - {numero_contrato}"
+
+    Uses razon_social for companies and falls back to "Cliente desconocido".
+    The result is normalized to ASCII to avoid encoding errors with MikroTik.
+    """
+    if cliente:
+        if cliente.razon_social:
+            nombre_cliente = cliente.razon_social
+        else:
+            nombre_cliente = f"{cliente.nombre} {cliente.apellido1 or ''} {cliente.apellido2 or ''}".strip()
+    else:
+        nombre_cliente = "Cliente desconocido"
+
+    return normalize_for_mikrotik(f"{nombre_cliente} - {numero_contrato}")
 
 
 async def _generate_numero_contrato(db: AsyncSession) -> str:
@@ -69,8 +103,8 @@ async def _sync_ipoe(
     router: Router
 ) -> None:
     """Synchronize IPoE contract with MikroTik using address-lists"""
-    list_activos = "ISP-ACTIVOS"
-    list_suspendidos = "ISP-SUSPENDIDOS"
+    list_activos = ADDRESS_LIST_ACTIVOS
+    list_suspendidos = ADDRESS_LIST_SUSPENDIDOS
 
     if contrato.estado == EstadoContrato.CANCELADO:
         logger.warning(f"[IPoE-CANCELADO] Removing {contrato.ip_asignada} from all lists")
@@ -78,10 +112,9 @@ async def _sync_ipoe(
         logger.warning(f"MikroTik sync: Removed {contrato.ip_asignada} from all lists")
 
     elif contrato.estado == EstadoContrato.SUSPENDIDO:
-        logger.warning(f"[IPoE-SUSPENDIDO] Cleaning and adding to {list_suspendidos}")
-        await mikrotik.remove_all_for_address(contrato.ip_asignada)
-        success = await mikrotik.add_address_list(
-            list_suspendidos, contrato.ip_asignada, disabled=False, comment=comment
+        logger.warning(f"[IPoE-SUSPENDIDO] Moving to {list_suspendidos}")
+        success = await mikrotik.move_to_address_list(
+            list_suspendidos, contrato.ip_asignada, comment=comment
         )
         if not success:
             raise BadRequestError(
@@ -90,10 +123,9 @@ async def _sync_ipoe(
         logger.warning(f"✓ IPoE sync SUCCESS: Suspended {contrato.ip_asignada}")
 
     elif contrato.estado in [EstadoContrato.ACTIVO, EstadoContrato.PENDIENTE]:
-        logger.warning(f"[IPoE-ACTIVO] Cleaning and adding to {list_activos}")
-        await mikrotik.remove_all_for_address(contrato.ip_asignada)
-        success = await mikrotik.add_address_list(
-            list_activos, contrato.ip_asignada, disabled=False, comment=comment
+        logger.warning(f"[IPoE-ACTIVO] Moving to {list_activos}")
+        success = await mikrotik.move_to_address_list(
+            list_activos, contrato.ip_asignada, comment=comment
         )
         if not success:
             raise BadRequestError(
@@ -111,16 +143,16 @@ async def _sync_pppoe(
     router: Router
 ) -> None:
     """Synchronize PPPoE contract with MikroTik using PPP profiles and secrets"""
-    # Generate profile name based on plan (convert to int to avoid decimals)
-    profile_name = f"PLAN-{int(plan.velocidad_bajada_mbps)}MB"
+    # Generate profile name based on plan
+    profile_name = ppp_profile_name(plan.velocidad_bajada_mbps)
 
     # Calculate local address from router CIDRs (first IP of smallest CIDR)
     local_address = get_local_address_from_cidrs(router.cidr_disponibles)
 
     # Determine pool for profile (always use pool in profile, it's shared)
-    pool_name = f"pool-{router.nombre.lower().replace(' ', '-')}"
+    pool_name = ip_pool_name(router.nombre)
     profile_remote_address = None
-    cidr_ranges = [cidr.strip() for cidr in router.cidr_disponibles.split(",") if cidr.strip()]
+    cidr_ranges = split_cidrs(router.cidr_disponibles)
 
     # Ensure IP pool exists in MikroTik for profile
     if cidr_ranges:
@@ -209,6 +241,15 @@ async def _sync_pppoe(
         logger.warning(f"✓ PPPoE sync SUCCESS: Activated user {contrato.pppoe_usuario} with profile {profile_name}")
 
 
+def _check_router_active(router: Router) -> None:
+    """Reject assigning contracts to an inactive router before anything is queued"""
+    if not router.is_active:
+        raise BadRequestError(
+            f"El router '{router.nombre}' está inactivo. "
+            "Actívalo antes de asignar contratos."
+        )
+
+
 async def _sync_mikrotik(db: AsyncSession, contrato: Contrato) -> None:
     """
     Synchronize contract state with MikroTik router using generic address-lists
@@ -225,7 +266,9 @@ async def _sync_mikrotik(db: AsyncSession, contrato: Contrato) -> None:
     - SUSPENDIDO: Add to ISP-SUSPENDIDOS, remove from ISP-ACTIVOS
     - CANCELADO: Remove from both lists
 
-    Raises BadRequestError if router is offline/inactive and IP is assigned
+    Runs in the MikroTik sync worker (see mikrotik_outbox), not in the request.
+    Raises BadRequestError if router is offline/inactive and IP is assigned;
+    the worker records the error on the job and retries it later.
     """
     logger.warning(
         f">>> _SYNC_MIKROTIK START <<< contract {contrato.numero_contrato}, "
@@ -292,8 +335,7 @@ async def _sync_mikrotik(db: AsyncSession, contrato: Contrato) -> None:
             nombre_cliente = "Cliente desconocido"
 
         # Build comment with client name and contract number
-        # Normalize to ASCII to avoid encoding errors with MikroTik
-        comment = normalize_for_mikrotik(f"{nombre_cliente} - {contrato.numero_contrato}")
+        comment = build_mikrotik_comment(cliente, contrato.numero_contrato)
 
         # Decrypt password
         password = decrypt_router_password(router)
@@ -364,7 +406,7 @@ async def list_contratos(
     if estado:
         query = query.where(Contrato.estado == estado)
 
-    result = await paginate(db, query, page, page_size)
+    result = await paginate(db, query, page, page_size, cached_count=True)
 
     # Decrypt PPPoE passwords for display in frontend (admin users only)
     for contrato in result.items:
@@ -403,7 +445,71 @@ async def get_contrato(db: AsyncSession, contrato_id: uuid.UUID) -> Contrato:
     return contrato
 
 
-async def create_contrato(db: AsyncSession, data: ContratoCreate) -> Contrato:
+def ip_in_use_query(
+    router_id: uuid.UUID, ip_asignada: str, exclude_contrato_id: uuid.UUID | None = None
+) -> Select:
+    """Contract holding an IP on a router (uq_contratos_router_id_ip_asignada)"""
+    query = (
+        select(Contrato)
+        .where(Contrato.router_id == router_id)
+        .where(Contrato.ip_asignada == ip_asignada)
+    )
+    if exclude_contrato_id:
+        query = query.where(Contrato.id != exclude_contrato_id)
+    return query
+
+
+def pppoe_user_in_use_query(
+    router_id: uuid.UUID, pppoe_usuario: str, exclude_contrato_id: uuid.UUID | None = None
+) -> Select:
+    """PPPoE contract using a username on a router (ix_contratos_router_id_pppoe_usuario)"""
+    query = (
+        select(Contrato)
+        .where(Contrato.router_id == router_id)
+        .where(Contrato.pppoe_usuario == pppoe_usuario)
+        .where(Contrato.tipo_conexion == TipoConexion.PPPOE)
+    )
+    if exclude_contrato_id:
+        query = query.where(Contrato.id != exclude_contrato_id)
+    return query
+
+
+async def _check_ip_not_reserved(
+    db: AsyncSession, router_id: uuid.UUID, ip: str, usuario_id: uuid.UUID | None
+) -> None:
+    """Reject an IP under another user's unexpired reservation"""
+    reservation = await get_foreign_reservation(db, router_id, ip, usuario_id, lock=True)
+    if reservation:
+        raise BadRequestError(
+            f"La IP {ip} está reservada por otro usuario hasta las "
+            f"{reservation.expires_at:%H:%M:%S} UTC"
+        )
+
+
+async def _flush_contrato(
+    db: AsyncSession, router_id: uuid.UUID | None, ip: str | None, usuario_id: uuid.UUID | None = None
+) -> None:
+    """
+    Flush a contract insert/update, turning a duplicate router IP into a 400
+
+    The SELECT checks before the flush give a friendly message in the common
+    case; the unique index catches two requests racing for the same IP. Only
+    the caller's own reservation of the IP is consumed.
+    """
+    try:
+        await db.flush()
+    except IntegrityError as e:
+        if UNIQUE_ROUTER_IP_INDEX in str(e.orig):
+            raise BadRequestError(f"La IP {ip} ya está asignada a otro contrato en este router")
+        raise
+
+    if router_id and ip:
+        await consume_ip_reservation(db, router_id, ip, usuario_id)
+
+
+async def create_contrato(
+    db: AsyncSession, data: ContratoCreate, usuario_id: uuid.UUID | None = None
+) -> Contrato:
     # Validate client exists
     result = await db.execute(select(Cliente).where(Cliente.id == data.cliente_id))
     cliente = result.scalar_one_or_none()
@@ -426,6 +532,7 @@ async def create_contrato(db: AsyncSession, data: ContratoCreate) -> Contrato:
         router = result.scalar_one_or_none()
         if not router:
             raise BadRequestError("Router no encontrado")
+        _check_router_active(router)
 
     # Validate connection type requirements
     if data.tipo_conexion == TipoConexion.IPOE:
@@ -436,12 +543,7 @@ async def create_contrato(db: AsyncSession, data: ContratoCreate) -> Contrato:
             raise BadRequestError("Para PPPoE, el usuario y contraseña son requeridos")
         # Validate PPPoE username is not already in use
         if data.router_id:
-            result = await db.execute(
-                select(Contrato)
-                .where(Contrato.router_id == data.router_id)
-                .where(Contrato.pppoe_usuario == data.pppoe_usuario)
-                .where(Contrato.tipo_conexion == TipoConexion.PPPOE)
-            )
+            result = await db.execute(pppoe_user_in_use_query(data.router_id, data.pppoe_usuario))
             existing_pppoe = result.scalar_one_or_none()
             if existing_pppoe:
                 raise BadRequestError(
@@ -450,16 +552,13 @@ async def create_contrato(db: AsyncSession, data: ContratoCreate) -> Contrato:
 
     # Validate IP is not already assigned to another contract on the same router (IPoE)
     if data.tipo_conexion == TipoConexion.IPOE and data.router_id and data.ip_asignada:
-        result = await db.execute(
-            select(Contrato)
-            .where(Contrato.router_id == data.router_id)
-            .where(Contrato.ip_asignada == data.ip_asignada)
-        )
+        result = await db.execute(ip_in_use_query(data.router_id, data.ip_asignada))
         existing_contrato = result.scalar_one_or_none()
         if existing_contrato:
             raise BadRequestError(
                 f"La IP {data.ip_asignada} ya está asignada al contrato {existing_contrato.numero_contrato}"
             )
+        await _check_ip_not_reserved(db, data.router_id, data.ip_asignada, usuario_id)
 
     numero_contrato = await _generate_numero_contrato(db)
 
@@ -475,18 +574,22 @@ async def create_contrato(db: AsyncSession, data: ContratoCreate) -> Contrato:
         numero_contrato=numero_contrato,
     )
     db.add(contrato)
-    await db.flush()
+    await _flush_contrato(db, contrato.router_id, contrato.ip_asignada, usuario_id)
     await db.refresh(contrato)
 
-    # Sync with MikroTik (will raise exception if router is offline/inactive)
-    await _sync_mikrotik(db, contrato)
+    track_ip_change(db, contrato.router_id, contrato.ip_asignada, allocated=True)
+    mark_pool_usage_stale(db)
+
+    # Router changes are applied by the sync worker after commit
+    if contrato.router_id:
+        await enqueue_sync(db, contrato.id)
 
     # Reload with relationships
     return await get_contrato(db, contrato.id)
 
 
 async def update_contrato(
-    db: AsyncSession, contrato_id: uuid.UUID, data: ContratoUpdate
+    db: AsyncSession, contrato_id: uuid.UUID, data: ContratoUpdate, usuario_id: uuid.UUID | None = None
 ) -> Contrato:
     logger.warning(f"=== UPDATE_CONTRATO START === ID: {contrato_id}")
     contrato = await get_contrato(db, contrato_id)
@@ -507,6 +610,7 @@ async def update_contrato(
         router = result.scalar_one_or_none()
         if not router:
             raise BadRequestError("Router no encontrado")
+        _check_router_active(router)
 
     # Determine final values after update
     final_router_id = update_data.get("router_id", contrato.router_id)
@@ -518,27 +622,20 @@ async def update_contrato(
     if final_tipo_conexion == TipoConexion.IPOE:
         # Validate IP is not already assigned to another contract on the same router
         if final_router_id and final_ip_asignada:
-            result = await db.execute(
-                select(Contrato)
-                .where(Contrato.router_id == final_router_id)
-                .where(Contrato.ip_asignada == final_ip_asignada)
-                .where(Contrato.id != contrato_id)
-            )
+            result = await db.execute(ip_in_use_query(final_router_id, final_ip_asignada, contrato_id))
             existing_contrato = result.scalar_one_or_none()
             if existing_contrato:
                 raise BadRequestError(
                     f"La IP {final_ip_asignada} ya está asignada al contrato {existing_contrato.numero_contrato}"
                 )
+            if (final_router_id, final_ip_asignada) != (contrato.router_id, contrato.ip_asignada):
+                await _check_ip_not_reserved(db, final_router_id, final_ip_asignada, usuario_id)
 
     elif final_tipo_conexion == TipoConexion.PPPOE:
         # Validate PPPoE username is not already in use
         if final_router_id and final_pppoe_usuario:
             result = await db.execute(
-                select(Contrato)
-                .where(Contrato.router_id == final_router_id)
-                .where(Contrato.pppoe_usuario == final_pppoe_usuario)
-                .where(Contrato.tipo_conexion == TipoConexion.PPPOE)
-                .where(Contrato.id != contrato_id)
+                pppoe_user_in_use_query(final_router_id, final_pppoe_usuario, contrato_id)
             )
             existing_pppoe = result.scalar_one_or_none()
             if existing_pppoe:
@@ -563,83 +660,77 @@ async def update_contrato(
     now_ipoe = final_tipo_conexion == TipoConexion.IPOE
     now_pppoe = final_tipo_conexion == TipoConexion.PPPOE
 
-    # Get old router if it exists and is active (for cleanup)
-    old_router = None
-    old_mikrotik = None
+    # Queue removal of the old configuration; the worker skips inactive routers
     if contrato.router_id:
-        result = await db.execute(select(Router).where(Router.id == contrato.router_id))
-        old_router = result.scalar_one_or_none()
-        if old_router and old_router.is_active:
-            try:
-                password = decrypt_router_password(old_router)
-                old_mikrotik = MikroTikService(
-                    host=old_router.ip,
-                    username=old_router.usuario,
-                    password=password,
-                    port=old_router.puerto,
-                    ssl=old_router.ssl,
-                )
-            except Exception as e:
-                logger.error(f"Failed to connect to old router for cleanup: {str(e)}")
-
-    # Execute cleanup operations
-    try:
-        if old_mikrotik:
-            # Case 1: Connection type changed (PPPoE ↔ IPoE)
-            if tipo_conexion_changed:
-                if was_pppoe and now_ipoe and contrato.pppoe_usuario:
-                    logger.warning(f"[TYPE_CHANGE] PPPoE → IPoE: Removing PPP secret {contrato.pppoe_usuario}")
-                    await old_mikrotik.remove_ppp_secret(contrato.pppoe_usuario)
-                    logger.warning(f"✓ Removed PPP secret {contrato.pppoe_usuario}")
-
-                elif was_ipoe and now_pppoe and contrato.ip_asignada:
-                    logger.warning(f"[TYPE_CHANGE] IPoE → PPPoE: Removing address-list entries for {contrato.ip_asignada}")
-                    await old_mikrotik.remove_all_for_address(contrato.ip_asignada)
-                    logger.warning(f"✓ Removed address-list entries for {contrato.ip_asignada}")
-
-            # Case 2: IP changed (IPoE only, same connection type)
-            elif not tipo_conexion_changed and was_ipoe and ip_changed and contrato.ip_asignada:
-                logger.warning(f"[IP_CHANGE] IPoE: Removing old IP {contrato.ip_asignada} from address-lists")
-                await old_mikrotik.remove_all_for_address(contrato.ip_asignada)
-                logger.warning(f"✓ Removed old IP {contrato.ip_asignada} from address-lists")
-
-            # Case 3: PPPoE usuario changed (PPPoE only, same connection type)
-            elif not tipo_conexion_changed and was_pppoe and pppoe_usuario_changed and contrato.pppoe_usuario:
-                logger.warning(f"[USER_CHANGE] PPPoE: Removing old secret {contrato.pppoe_usuario}")
-                await old_mikrotik.remove_ppp_secret(contrato.pppoe_usuario)
-                logger.warning(f"✓ Removed old PPP secret {contrato.pppoe_usuario}")
-
-            # Case 4: Router changed (remove from old router, will add to new in sync)
-            if router_changed:
-                if was_ipoe and contrato.ip_asignada:
-                    logger.warning(f"[ROUTER_CHANGE] IPoE: Removing IP {contrato.ip_asignada} from old router")
-                    await old_mikrotik.remove_all_for_address(contrato.ip_asignada)
-                    logger.warning(f"✓ Removed IP from old router")
-
-                elif was_pppoe and contrato.pppoe_usuario:
-                    logger.warning(f"[ROUTER_CHANGE] PPPoE: Removing secret {contrato.pppoe_usuario} from old router")
-                    await old_mikrotik.remove_ppp_secret(contrato.pppoe_usuario)
-                    logger.warning(f"✓ Removed secret from old router")
-
-    except Exception as e:
-        logger.error(f"Failed to clean up old MikroTik config: {str(e)}")
-        # Don't fail the update, just log the error
+        old_ip = {"ip": contrato.ip_asignada} if contrato.ip_asignada else None
+        old_secret = {"pppoe_usuario": contrato.pppoe_usuario} if contrato.pppoe_usuario else None
+        cleanup = None
+
+        # Case 1: Connection type changed (PPPoE ↔ IPoE)
+        if tipo_conexion_changed:
+            if was_pppoe and now_ipoe:
+                logger.warning(f"[TYPE_CHANGE] PPPoE → IPoE: Removing PPP secret {contrato.pppoe_usuario}")
+                cleanup = old_secret
+            elif was_ipoe and now_pppoe:
+                logger.warning(f"[TYPE_CHANGE] IPoE → PPPoE: Removing address-list entries for {contrato.ip_asignada}")
+                cleanup = old_ip
+
+        # Case 2: IP changed (IPoE only, same connection type)
+        elif was_ipoe and ip_changed:
+            logger.warning(f"[IP_CHANGE] IPoE: Removing old IP {contrato.ip_asignada} from address-lists")
+            cleanup = old_ip
+
+        # Case 3: PPPoE usuario changed (PPPoE only, same connection type)
+        elif was_pppoe and pppoe_usuario_changed:
+            logger.warning(f"[USER_CHANGE] PPPoE: Removing old secret {contrato.pppoe_usuario}")
+            cleanup = old_secret
+
+        # Case 4: Router changed (remove from old router, will add to new in sync)
+        if router_changed:
+            logger.warning(f"[ROUTER_CHANGE] Removing contract config from old router {contrato.router_id}")
+            cleanup = old_ip if was_ipoe else old_secret
+
+        if cleanup:
+            await enqueue_cleanup(db, contrato.id, contrato.router_id, cleanup)
+
+    if router_changed or ip_changed:
+        track_ip_change(db, contrato.router_id, contrato.ip_asignada, allocated=False)
+        track_ip_change(db, final_router_id, final_ip_asignada, allocated=True)
+        mark_pool_usage_stale(db)
 
     for key, value in update_data.items():
         setattr(contrato, key, value)
-    await db.flush()
+    await _flush_contrato(
+        db, contrato.router_id, contrato.ip_asignada if (router_changed or ip_changed) else None, usuario_id
+    )
     await db.refresh(contrato)
 
     logger.warning(f"After update - router_id: {contrato.router_id}, ip_asignada: {contrato.ip_asignada}, estado: {contrato.estado}")
-    logger.warning(f"Calling _sync_mikrotik...")
 
-    # Sync with MikroTik (will raise exception if router is offline/inactive)
-    await _sync_mikrotik(db, contrato)
+    # Router changes are applied by the sync worker after commit
+    if contrato.router_id:
+        await enqueue_sync(db, contrato.id)
 
     logger.warning(f"=== UPDATE_CONTRATO END ===")
     return await get_contrato(db, contrato_id)
 
 
+async def get_mikrotik_sync_jobs(db: AsyncSession, contrato_id: uuid.UUID) -> list[MikroTikSyncJob]:
+    """Recent MikroTik sync jobs of a contract, newest first (polled by the UI)"""
+    await get_contrato(db, contrato_id)
+    return await list_jobs_for_contrato(db, contrato_id)
+
+
+async def resync_mikrotik(db: AsyncSession, contrato_id: uuid.UUID) -> list[MikroTikSyncJob]:
+    """Queue a new MikroTik sync for a contract, e.g. after a failed job"""
+    contrato = await get_contrato(db, contrato_id)
+    if not contrato.router_id:
+        raise BadRequestError("El contrato no tiene un router asignado")
+
+    await enqueue_sync(db, contrato.id)
+    return await list_jobs_for_contrato(db, contrato_id)
+
+
 async def upload_pdf_firmado(
     db: AsyncSession, contrato_id: uuid.UUID, file: UploadFile
 ) -> Contrato:
@@ -647,21 +738,22 @@ async def upload_pdf_firmado(
     contrato = await get_contrato(db, contrato_id)
 
     # Validate PDF file
-    if not file.filename.endswith(".pdf"):
+    if not file.filename or not file.filename.lower().endswith(".pdf"):
         raise BadRequestError("El archivo debe ser PDF")
 
-    # Create directory if not exists
-    upload_dir = "/app/uploads/contratos/firmados"
-    os.makedirs(upload_dir, exist_ok=True)
-
-    # Save file
-    file_path = f"{upload_dir}/{contrato.numero_contrato}_firmado.pdf"
-    with open(file_path, "wb") as f:
-        content = await file.read()
-        f.write(content)
+    # Streamed in chunks and stored once per content, see documentos.store_upload
+    documento = await documentos_service.store_upload(
+        db, file, "application/pdf", settings.UPLOAD_MAX_PDF_BYTES, magic=PDF_MAGIC
+    )
+    logger.info(
+        f"Signed PDF stored for contract {contrato.numero_contrato}: "
+        f"{documento.tamano_bytes} bytes, sha256 {documento.sha256}"
+    )
 
-    # Update contrato
-    contrato.pdf_firmado_path = file_path
+    # Update contrato. The previous document is left in place, other
+    # contracts may share it
+    contrato.pdf_firmado_path = documento.storage_key
+    contrato.pdf_firmado_sha256 = documento.sha256
     await db.flush()
 
     return contrato
@@ -0,0 +1,275 @@
+"""
+Billing cutoff: mass suspension and reactivation of contracts
+
+Selects every contract affected by a cutoff with a single query, updates
+their estado in bulk and pushes the address-list / PPP secret changes to
+each router in one pipelined session instead of one update per contract.
+The estado change is committed before any router is touched; contracts of
+routers that fail are handed to the MikroTik outbox to be retried.
+"""
+import asyncio
+import calendar
+import logging
+import time
+import uuid
+from collections.abc import Callable
+from datetime import date
+
+from sqlalchemy import Select, exists, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.models.contrato import Contrato, EstadoContrato, TipoConexion
+from app.models.pago import EstadoPago, Pago
+from app.models.router import Router
+from app.schemas.corte import CorteResult, CorteRouterResult
+from app.services.mikrotik import MikroTikService
+from app.services.mikrotik_outbox import enqueue_sync
+from app.services.reconciliation import (
+    api_value,
+    build_desired_state,
+    count_commands,
+    diff_address_lists,
+    diff_ppp_secrets,
+)
+from app.services.routers import decrypt_router_password
+
+logger = logging.getLogger(__name__)
+
+# Routers pushed to at the same time
+ROUTER_CONCURRENCY = 4
+
+# Contract ids per bulk UPDATE statement
+UPDATE_CHUNK_SIZE = 1000
+
+# Called after each router with (result, routers done, routers total)
+ProgressCallback = Callable[[CorteRouterResult, int, int], None]
+
+
+def periodo_bounds(periodo: str) -> tuple[date, date]:
+    """First and last day of a YYYY-MM period"""
+    year, month = (int(part) for part in periodo.split("-"))
+    return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+
+def corte_query(accion: str, periodo: str, router_id: uuid.UUID | None = None) -> Select:
+    """
+    Contracts affected by a cutoff
+
+    - suspender: ACTIVO contracts running during the period without a
+      pending or validated Pago for it
+    - reactivar: SUSPENDIDO contracts with a validated Pago for the period
+    """
+    inicio, fin = periodo_bounds(periodo)
+    pago_del_periodo = (
+        select(Pago.id)
+        .where(Pago.contrato_id == Contrato.id)
+        .where(Pago.periodo_facturado == periodo)
+    )
+
+    query = (
+        select(Contrato)
+        .options(selectinload(Contrato.cliente), selectinload(Contrato.plan))
+        .order_by(Contrato.numero_contrato)
+    )
+    if accion == "suspender":
+        query = (
+            query.where(Contrato.estado == EstadoContrato.ACTIVO)
+            .where(Contrato.fecha_inicio <= fin)
+            .where(or_(Contrato.fecha_fin.is_(None), Contrato.fecha_fin >= inicio))
+            .where(~exists(pago_del_periodo.where(Pago.estado != EstadoPago.RECHAZADO)))
+        )
+    else:
+        query = (
+            query.where(Contrato.estado == EstadoContrato.SUSPENDIDO)
+            .where(exists(pago_del_periodo.where(Pago.estado == EstadoPago.VALIDADO)))
+        )
+
+    if router_id:
+        query = query.where(Contrato.router_id == router_id)
+
+    return query
+
+
+async def find_contratos_para_corte(
+    db: AsyncSession,
+    accion: str,
+    periodo: str,
+    router_id: uuid.UUID | None = None,
+) -> list[Contrato]:
+    """Contracts affected by a cutoff, selected with one query (see corte_query)"""
+    result = await db.execute(corte_query(accion, periodo, router_id))
+    return list(result.scalars().all())
+
+
+async def _push_router(
+    router: Router,
+    contratos: list[Contrato],
+    nuevo_estado: EstadoContrato,
+    dry_run: bool,
+) -> tuple[CorteRouterResult, bool]:
+    """
+    Apply the new estado of contratos to one router in a single pipelined session
+
+    Returns:
+        The router report, and whether the push failed (connection error or
+        commands rejected by the router) and is worth retrying
+    """
+    started = time.monotonic()
+    address_commands = []
+    secret_commands = []
+    errors: list[str] = []
+    failed = False
+
+    if not router.is_active:
+        errors.append(f"El router '{router.nombre}' está inactivo, no se enviaron cambios")
+    else:
+        mikrotik = MikroTikService(
+            host=router.ip,
+            username=router.usuario,
+            password=decrypt_router_password(router),
+            port=router.puerto,
+            ssl=router.ssl,
+        )
+        try:
+            state = await mikrotik.get_sync_state()
+
+            desired = build_desired_state(router, contratos, estado=nuevo_estado)
+            errors.extend(desired["errors"])
+
+            # Only look at the entries of the affected contracts, the rest of
+            # the router is left alone
+            ips = {c.ip_asignada for c in contratos if c.tipo_conexion == TipoConexion.IPOE and c.ip_asignada}
+            usuarios = {c.pppoe_usuario for c in contratos if c.tipo_conexion == TipoConexion.PPPOE and c.pppoe_usuario}
+            address_commands = diff_address_lists(
+                [entry for entry in state["address_list"] if api_value(entry.get("address")) in ips],
+                desired["address_list"],
+            )
+            secret_commands = diff_ppp_secrets(
+                [secret for secret in state["ppp_secrets"] if api_value(secret.get("name")) in usuarios],
+                desired["ppp_secrets"],
+                set(),
+                desired["protected_secrets"],
+            )
+
+            commands = secret_commands + address_commands
+            if commands and not dry_run:
+                rejected = await mikrotik.apply_commands(commands)
+                errors.extend(rejected)
+                failed = bool(rejected)
+        except Exception as e:
+            logger.exception(f"Cutoff push to router {router.nombre} failed: {str(e)}")
+            errors.append(f"Error enviando cambios al router '{router.nombre}': {str(e)}")
+            failed = True
+
+    return CorteRouterResult(
+        router_id=router.id,
+        router_nombre=router.nombre,
+        contratos=len(contratos),
+        address_list=count_commands(address_commands),
+        ppp_secrets=count_commands(secret_commands),
+        errors=errors,
+        duration_ms=int((time.monotonic() - started) * 1000),
+    ), failed
+
+
+async def run_corte(
+    db: AsyncSession,
+    accion: str,
+    periodo: str,
+    router_id: uuid.UUID | None = None,
+    dry_run: bool = False,
+    on_progress: ProgressCallback | None = None,
+) -> CorteResult:
+    """
+    Suspend delinquent contracts or reactivate paid ones for a period
+
+    The estado change is committed first, so no row stays locked while the
+    routers are pushed to and a failed push can't roll it back. Routers that
+    fail are reported in the result and their contracts are queued in the
+    MikroTik outbox (enqueue_sync), which retries with the committed estado.
+
+    Args:
+        db: Database session
+        accion: "suspender" or "reactivar"
+        periodo: Billing period YYYY-MM
+        router_id: Limit the cutoff to one router
+        dry_run: Report what would change without touching the database or routers
+        on_progress: Called after each router is processed
+
+    Returns:
+        CorteResult with the affected contracts and a report per router
+    """
+    started = time.monotonic()
+    nuevo_estado = EstadoContrato.SUSPENDIDO if accion == "suspender" else EstadoContrato.ACTIVO
+
+    contratos = await find_contratos_para_corte(db, accion, periodo, router_id)
+    logger.info(
+        f"Cutoff {accion} {periodo}: {len(contratos)} contracts selected (dry_run={dry_run})"
+    )
+
+    # Group per router
+    por_router: dict[uuid.UUID, list[Contrato]] = {}
+    for contrato in contratos:
+        if contrato.router_id:
+            por_router.setdefault(contrato.router_id, []).append(contrato)
+
+    routers: list[Router] = []
+    if por_router:
+        result = await db.execute(select(Router).where(Router.id.in_(por_router.keys())))
+        routers = list(result.scalars().all())
+
+    if contratos and not dry_run:
+        ids = [contrato.id for contrato in contratos]
+        for i in range(0, len(ids), UPDATE_CHUNK_SIZE):
+            await db.execute(
+                update(Contrato)
+                .where(Contrato.id.in_(ids[i:i + UPDATE_CHUNK_SIZE]))
+                .values(estado=nuevo_estado)
+                .execution_options(synchronize_session=False)
+            )
+        # Loaded objects stay usable after commit (expire_on_commit=False)
+        await db.commit()
+
+    limit = asyncio.Semaphore(ROUTER_CONCURRENCY)
+    router_results: list[CorteRouterResult] = []
+    failed_routers: list[CorteRouterResult] = []
+
+    async def _process(router: Router) -> None:
+        async with limit:
+            router_result, failed = await _push_router(router, por_router[router.id], nuevo_estado, dry_run)
+        router_results.append(router_result)
+        if failed and not dry_run:
+            # Queued below, the session can't be shared by concurrent pushes
+            router_result.encolados = router_result.contratos
+            failed_routers.append(router_result)
+        logger.info(
+            f"Cutoff {accion} {periodo}: router {router.nombre} done "
+            f"({len(router_results)}/{len(routers)}, {router_result.contratos} contracts, "
+            f"{len(router_result.errors)} errors)"
+        )
+        if on_progress:
+            on_progress(router_result, len(router_results), len(routers))
+
+    await asyncio.gather(*(_process(router) for router in routers))
+
+    if failed_routers:
+        for router_result in failed_routers:
+            for contrato in por_router[router_result.router_id]:
+                await enqueue_sync(db, contrato.id)
+        await db.commit()
+        logger.warning(
+            f"Cutoff {accion} {periodo}: {len(failed_routers)} routers failed, "
+            f"{sum(r.encolados for r in failed_routers)} contracts queued for retry"
+        )
+
+    return CorteResult(
+        accion=accion,
+        periodo=periodo,
+        dry_run=dry_run,
+        contratos=len(contratos),
+        numeros_contrato=[contrato.numero_contrato for contrato in contratos],
+        sin_router=sum(1 for contrato in contratos if not contrato.router_id),
+        routers=sorted(router_results, key=lambda r: r.router_nombre),
+        duration_ms=int((time.monotonic() - started) * 1000),
+    )
@@ -0,0 +1,268 @@
+"""
+Stored documents: content-addressed uploads and downloads
+
+Uploads are streamed to a temporary file and hashed, then stored once per
+content under "documentos/<sha256[:2]>/<sha256>.<ext>": uploading the same
+file again (or for another contract) reuses the stored object. Page count,
+metadata and thumbnail are extracted in the background once the upload is
+committed; documents left unprocessed (restarts, backfilled rows) are
+picked up by a sweep that runs in a single, leader-elected process.
+Downloads redirect to a direct URL when the storage backend
+offers them, and are streamed by the API otherwise.
+"""
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from fastapi import UploadFile
+from fastapi.responses import FileResponse, RedirectResponse, Response
+from sqlalchemy import event, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.exceptions import NotFoundError
+from app.core.leader import run_as_leader
+from app.database import async_session
+from app.models.documento import Documento
+from app.services.pdf_pool import pdf_pool
+from app.services.storage import storage
+from app.utils.files import save_upload
+from app.utils.pdf_metadata import extract_stored_pdf_metadata
+
+logger = logging.getLogger(__name__)
+
+# Session.info key holding the documents to process after commit
+_PENDING_KEY = "documentos_pending"
+
+# Keeps the background processing tasks referenced until they finish
+_pending: set[asyncio.Task] = set()
+
+# Seconds the PDF worker may take to read a document (including an S3 download)
+METADATA_TIMEOUT = 120
+
+# Seconds between sweeps for documents left unprocessed
+SWEEP_INTERVAL = 300
+
+# Documents younger than this are left to their own after-commit task
+SWEEP_MIN_AGE = 120
+
+# Leader election task started by start_sweeper
+_sweep_task: asyncio.Task | None = None
+
+# Extension of the stored objects per content type
+_EXTENSIONS = {"application/pdf": "pdf", "image/jpeg": "jpg"}
+
+
+def content_key(sha256: str, content_type: str) -> str:
+    return f"documentos/{sha256[:2]}/{sha256}.{_EXTENSIONS.get(content_type, 'bin')}"
+
+
+async def store_upload(
+    db: AsyncSession,
+    file: UploadFile,
+    content_type: str,
+    max_bytes: int,
+    magic: bytes | None = None,
+) -> Documento:
+    """
+    Store an upload, once per distinct content
+
+    Args:
+        db: Database session
+        file: Uploaded file
+        content_type: Content type the upload was validated as
+        max_bytes: Largest accepted size
+        magic: Required first bytes of the content
+
+    Returns:
+        The Documento of the content, new or existing
+    """
+    tmp_path = os.path.join(settings.UPLOAD_TMP_DIR, f"{uuid.uuid4().hex}.upload")
+    try:
+        stored = await save_upload(file, tmp_path, max_bytes, magic)
+        key = content_key(stored.sha256, content_type)
+        if not await storage.exists(key):
+            await storage.put_file(key, tmp_path, content_type)
+        else:
+            logger.info(f"Upload {stored.sha256} already stored, reusing {key}")
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    # Concurrent uploads of the same content end up with the same row
+    await db.execute(
+        insert(Documento)
+        .values(
+            id=uuid.uuid4(),
+            sha256=stored.sha256,
+            storage_key=key,
+            content_type=content_type,
+            tamano_bytes=stored.size,
+        )
+        .on_conflict_do_nothing(index_elements=["sha256"])
+    )
+    result = await db.execute(select(Documento).where(Documento.sha256 == stored.sha256))
+    documento = result.scalar_one()
+    if documento.procesado_at is None:
+        db.info.setdefault(_PENDING_KEY, set()).add(documento.id)
+    return documento
+
+
+async def get_documento(db: AsyncSession, sha256: str) -> Documento:
+    result = await db.execute(select(Documento).where(Documento.sha256 == sha256))
+    documento = result.scalar_one_or_none()
+    if not documento:
+        raise NotFoundError("Documento no encontrado")
+    return documento
+
+
+async def delete_stored(key: str | None) -> None:
+    """Remove a stored file that is not content-addressed (generated, per version)"""
+    if not key:
+        return
+    if os.path.isabs(key):
+        # Written before the storage backends existed
+        if os.path.exists(key):
+            os.remove(key)
+        return
+    await storage.delete(key)
+
+
+async def document_response(
+    key: str, filename: str, media_type: str, headers: dict[str, str] | None = None
+) -> Response:
+    """
+    Download response for a stored file
+
+    Redirects to a short-lived direct URL when the backend has them, so the
+    bytes never go through the API; streams the local file otherwise.
+    """
+    if os.path.isabs(key):
+        # Written before the storage backends existed
+        path = key
+    elif storage.direct_urls:
+        url = await storage.url(key, filename, media_type, settings.STORAGE_URL_TTL)
+        return RedirectResponse(url, status_code=307, headers=headers)
+    else:
+        path = storage.local_path(key)
+
+    if not os.path.exists(path):
+        raise NotFoundError("Archivo no encontrado")
+    return FileResponse(path, media_type=media_type, filename=filename, headers=headers)
+
+
+async def process_documento(documento_id: uuid.UUID) -> None:
+    """Extract page count, metadata and thumbnail of a stored PDF"""
+    async with async_session() as db:
+        result = await db.execute(select(Documento).where(Documento.id == documento_id))
+        documento = result.scalar_one_or_none()
+        if documento is None or documento.procesado_at is not None:
+            return
+
+        values = {"procesado_at": datetime.now(timezone.utc)}
+        if documento.content_type == "application/pdf":
+            try:
+                # The worker reads the file itself, it never goes through this process
+                paginas, metadatos, miniatura = await pdf_pool.run(
+                    extract_stored_pdf_metadata, documento.storage_key, timeout=METADATA_TIMEOUT
+                )
+            except Exception as e:
+                # Damaged or encrypted PDFs are kept, just without metadata
+                logger.warning(f"Could not read PDF metadata of document {documento.sha256}: {str(e)}")
+            else:
+                values.update(paginas=paginas, metadatos=metadatos)
+                if miniatura:
+                    # Next to the content key, also for documents still at a legacy path
+                    miniatura_key = f"{content_key(documento.sha256, documento.content_type)}.thumb.jpg"
+                    await storage.put_bytes(miniatura_key, miniatura, "image/jpeg")
+                    values["miniatura_key"] = miniatura_key
+
+        await db.execute(update(Documento).where(Documento.id == documento_id).values(**values))
+        await db.commit()
+        logger.info(f"Document {documento.sha256} processed: {values.get('paginas')} pages")
+
+
+async def _process_all(documento_ids: set[uuid.UUID]) -> None:
+    for documento_id in documento_ids:
+        try:
+            await process_documento(documento_id)
+        except Exception as e:
+            logger.warning(f"Could not process document {documento_id}: {str(e)}")
+
+
+async def process_unprocessed() -> None:
+    """
+    Process the documents left without metadata
+
+    Covers uploads whose background task was lost to a restart and the
+    signed PDFs backfilled from before the documentos table.
+    """
+    try:
+        async with async_session() as db:
+            result = await db.execute(
+                select(Documento.id)
+                .where(Documento.procesado_at.is_(None))
+                .where(Documento.created_at < datetime.now(timezone.utc) - timedelta(seconds=SWEEP_MIN_AGE))
+            )
+            documento_ids = set(result.scalars().all())
+    except Exception as e:
+        # E.g. the documentos migration has not run yet
+        logger.warning(f"Could not list unprocessed documents: {str(e)}")
+        return
+    if documento_ids:
+        logger.info(f"Processing {len(documento_ids)} unprocessed documents")
+        await _process_all(documento_ids)
+
+
+async def sweep_unprocessed() -> None:
+    """Run process_unprocessed every SWEEP_INTERVAL, until cancelled"""
+    while True:
+        await process_unprocessed()
+        await asyncio.sleep(SWEEP_INTERVAL)
+
+
+async def start_sweeper() -> None:
+    """
+    Start the unprocessed documents sweep in the background
+
+    Every worker process calls this, but only the one holding the Redis
+    leader lease actually runs sweep_unprocessed.
+    """
+    global _sweep_task
+    if _sweep_task is None or _sweep_task.done():
+        _sweep_task = asyncio.create_task(run_as_leader("documentos-sweep", sweep_unprocessed))
+
+
+async def stop_sweeper() -> None:
+    """Stop the sweep and release the leader lease"""
+    global _sweep_task
+    if _sweep_task is not None:
+        _sweep_task.cancel()
+        try:
+            await _sweep_task
+        except asyncio.CancelledError:
+            pass
+        _sweep_task = None
+
+
+@event.listens_for(Session, "after_commit")
+def _process_after_commit(session: Session) -> None:
+    documento_ids = session.info.pop(_PENDING_KEY, None)
+    if not documento_ids:
+        return
+    try:
+        task = asyncio.get_running_loop().create_task(_process_all(documento_ids))
+    except RuntimeError:
+        # Committed outside an event loop, the document stays unprocessed
+        return
+    _pending.add(task)
+    task.add_done_callback(_pending.discard)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,209 @@
+"""
+Batch invoice PDF rendering
+
+Renders every invoice of a period on all cores: the rows are read in pages
+and handed as plain dicts to a pool of worker processes, each with the
+company header and the ReportLab styles built once at startup. PDFs are
+written to a directory or a zip file as they come back. The next page is
+read and queued to the pool before the current one is drained, so workers
+never sit idle at the end of a page.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+import zipfile
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.cliente import Cliente
+from app.models.contrato import Contrato
+from app.models.factura import EstadoFactura, Factura
+from app.models.plan import Plan
+from app.models.settings import Settings
+from app.schemas.factura import FacturaPDFResult
+from app.utils.pdf_generator import factura_styles, generate_factura_pdf
+
+logger = logging.getLogger(__name__)
+
+# Invoices read per query; at most two pages are in flight (and their PDFs
+# in memory) at once
+PAGE_SIZE = 500
+
+# Called after each page with (PDFs written so far, invoices total)
+ProgressCallback = Callable[[int, int], None]
+
+# Company header of the worker process, set by _init_worker
+_empresa: dict | None = None
+
+
+def empresa_pdf_data(settings: Settings | None) -> dict:
+    """Company header of the invoices, as a plain dict for the workers"""
+    if settings is None:
+        return {"company_name": "ISP Billing", "lineas": []}
+    lineas = [
+        settings.razon_social,
+        f"Cédula jurídica {settings.cedula_juridica}" if settings.cedula_juridica else None,
+        " · ".join(part for part in (settings.telefono, settings.email) if part),
+        settings.direccion,
+    ]
+    return {"company_name": settings.company_name, "lineas": [line for line in lineas if line]}
+
+
+def factura_pdf_data(factura: Factura, cliente: Cliente, numero_contrato: str, plan: Plan) -> dict:
+    """Everything generate_factura_pdf needs, as a plain (picklable) dict"""
+    nombre = cliente.razon_social or " ".join(
+        part for part in (cliente.nombre, cliente.apellido1, cliente.apellido2) if part
+    )
+    ubicacion = ", ".join(
+        part for part in (cliente.direccion_exacta, cliente.distrito, cliente.canton, cliente.provincia) if part
+    )
+    return {
+        "numero_factura": factura.numero_factura,
+        "numero_contrato": numero_contrato,
+        "fecha_emision": factura.fecha_emision,
+        "fecha_vencimiento": factura.fecha_vencimiento,
+        "periodo": factura.periodo,
+        "cliente_nombre": nombre,
+        "cliente_identificacion": cliente.numero_identificacion,
+        "cliente_email": cliente.email,
+        "cliente_telefono": cliente.telefono,
+        "cliente_direccion": ubicacion,
+        "descripcion": (
+            f"Servicio de internet {plan.nombre} "
+            f"({plan.velocidad_bajada_mbps}/{plan.velocidad_subida_mbps} Mbps), periodo {factura.periodo}"
+        ),
+        "subtotal": factura.subtotal,
+        "impuesto": factura.impuesto,
+        "total": factura.total,
+        "moneda": factura.moneda,
+        "notas": factura.notas,
+    }
+
+
+def _init_worker(empresa: dict) -> None:
+    global _empresa
+    _empresa = empresa
+    factura_styles()
+
+
+def _render(factura: dict) -> tuple[str, bytes]:
+    return factura["numero_factura"], generate_factura_pdf(factura, _empresa)
+
+
+async def _fetch_page(db: AsyncSession, periodo: str, after: str | None) -> list[dict]:
+    query = (
+        select(Factura, Cliente, Contrato.numero_contrato, Plan)
+        .join(Cliente, Cliente.id == Factura.cliente_id)
+        .join(Contrato, Contrato.id == Factura.contrato_id)
+        .join(Plan, Plan.id == Contrato.plan_id)
+        .where(Factura.periodo == periodo)
+        .where(Factura.estado != EstadoFactura.ANULADA)
+        .order_by(Factura.numero_factura)
+        .limit(PAGE_SIZE)
+    )
+    if after:
+        query = query.where(Factura.numero_factura > after)
+    result = await db.execute(query)
+    return [factura_pdf_data(*row) for row in result.all()]
+
+
+async def render_facturas_pdf(
+    db: AsyncSession,
+    periodo: str,
+    destino: str,
+    as_zip: bool = False,
+    workers: int | None = None,
+    on_progress: ProgressCallback | None = None,
+) -> FacturaPDFResult:
+    """
+    Render the PDFs of every invoice of a period (ANULADA ones excepted)
+
+    Args:
+        db: Database session
+        periodo: Billing period YYYY-MM
+        destino: Directory for {numero_factura}.pdf files, or zip file path with as_zip
+        as_zip: Write a single zip file instead of a directory
+        workers: Worker processes, all cores by default
+        on_progress: Called after each page
+
+    Returns:
+        FacturaPDFResult with the invoices rendered and the throughput
+    """
+    started = time.monotonic()
+    workers = workers or os.cpu_count() or 1
+
+    result = await db.execute(select(Settings).limit(1))
+    empresa = empresa_pdf_data(result.scalar_one_or_none())
+    total = await db.scalar(
+        select(func.count())
+        .select_from(Factura)
+        .where(Factura.periodo == periodo)
+        .where(Factura.estado != EstadoFactura.ANULADA)
+    )
+
+    if as_zip:
+        Path(destino).parent.mkdir(parents=True, exist_ok=True)
+        archive = zipfile.ZipFile(destino, "w", compression=zipfile.ZIP_STORED)
+    else:
+        Path(destino).mkdir(parents=True, exist_ok=True)
+        archive = None
+
+    rendered = 0
+    size = 0
+    loop = asyncio.get_running_loop()
+    # spawn: the workers must not inherit the event loop or DB connections
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(empresa,),
+    )
+
+    def _submit(page: list[dict]) -> list[asyncio.Future]:
+        return [loop.run_in_executor(executor, _render, factura) for factura in page]
+
+    try:
+        page = await _fetch_page(db, periodo, None)
+        futures = _submit(page)
+        while futures:
+            # Read and queue the next page while this one renders, the pool
+            # picks it up as soon as a worker is done with the current one
+            next_page = await _fetch_page(db, periodo, page[-1]["numero_factura"])
+            next_futures = _submit(next_page)
+
+            for future in asyncio.as_completed(futures):
+                numero_factura, pdf = await future
+                if archive:
+                    archive.writestr(f"{numero_factura}.pdf", pdf)
+                else:
+                    Path(destino, f"{numero_factura}.pdf").write_bytes(pdf)
+                rendered += 1
+                size += len(pdf)
+
+            logger.info(f"Invoice PDFs {periodo}: {rendered}/{total} rendered")
+            if on_progress:
+                on_progress(rendered, total)
+            page, futures = next_page, next_futures
+    finally:
+        executor.shutdown(cancel_futures=True)
+        if archive:
+            archive.close()
+
+    elapsed = time.monotonic() - started
+    logger.info(f"Invoice PDFs {periodo}: {rendered} rendered with {workers} workers in {elapsed:.1f} s")
+    return FacturaPDFResult(
+        periodo=periodo,
+        destino=destino,
+        formato="zip" if as_zip else "directorio",
+        facturas=rendered,
+        tamano_bytes=size,
+        workers=workers,
+        duration_ms=int(elapsed * 1000),
+        facturas_por_segundo=round(rendered / elapsed, 1) if elapsed else 0.0,
+    )
@@ -0,0 +1,234 @@
+"""
+Monthly invoice generation
+
+A billing run creates the Facturas of a period with INSERT ... SELECT over
+contratos joined to planes, one chunk of contracts per statement and per
+transaction, instead of building an ORM object per contract. Facturas are
+unique per (contrato_id, periodo), so a run that stopped halfway, or that
+is started twice, only inserts the invoices still missing.
+"""
+import logging
+import time
+import uuid
+from collections.abc import Callable
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import Date, Select, cast, exists, func, literal, or_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.exceptions import NotFoundError
+from app.models.contrato import Contrato, EstadoContrato
+from app.models.factura import EstadoFactura, Factura
+from app.models.plan import Plan
+from app.schemas.common import PaginatedResponse
+from app.schemas.factura import FacturacionResult
+from app.services.cortes import periodo_bounds
+from app.utils.pagination import paginate
+
+logger = logging.getLogger(__name__)
+
+# IVA on internet service
+IVA_RATE = Decimal("0.13")
+
+# Days between fecha_emision and fecha_vencimiento
+DIAS_VENCIMIENTO = 15
+
+# Contracts per INSERT ... SELECT, each chunk is committed on its own
+CHUNK_SIZE = 5000
+
+# Unique constraint on (contrato_id, periodo), see the Factura model
+UNIQUE_CONTRATO_PERIODO = "uq_facturas_contrato_id_periodo"
+
+# Factura columns filled by facturables_query, in its column order
+_COLUMNS = (
+    "id",
+    "numero_factura",
+    "contrato_id",
+    "cliente_id",
+    "fecha_emision",
+    "fecha_vencimiento",
+    "subtotal",
+    "impuesto",
+    "total",
+    "moneda",
+    "periodo",
+    "estado",
+)
+
+# Called after each chunk with (facturas created so far, chunks done)
+ProgressCallback = Callable[[int, int], None]
+
+
+def facturables_query(periodo: str, fecha_corte: date | None = None) -> Select:
+    """
+    Invoices still to be created for a period, one row per contract
+
+    Active contracts running during the period without a Factura for it.
+    The invoice is issued on the contract's dia_facturacion (capped to the
+    last day of the month); with fecha_corte, contracts whose billing day
+    comes later are left for a later run.
+    """
+    inicio, fin = periodo_bounds(periodo)
+    fecha_emision = func.make_date(
+        inicio.year, inicio.month, func.least(Contrato.dia_facturacion, fin.day), type_=Date
+    )
+    impuesto = func.round(Plan.precio_mensual * IVA_RATE, 2)
+    facturada = (
+        select(Factura.id)
+        .where(Factura.contrato_id == Contrato.id)
+        .where(Factura.periodo == periodo)
+    )
+
+    query = (
+        select(
+            func.gen_random_uuid().label("id"),
+            func.concat(f"FAC-{inicio:%Y%m}-", Contrato.numero_contrato).label("numero_factura"),
+            Contrato.id.label("contrato_id"),
+            Contrato.cliente_id.label("cliente_id"),
+            fecha_emision.label("fecha_emision"),
+            (fecha_emision + DIAS_VENCIMIENTO).label("fecha_vencimiento"),
+            Plan.precio_mensual.label("subtotal"),
+            impuesto.label("impuesto"),
+            (Plan.precio_mensual + impuesto).label("total"),
+            Plan.moneda.label("moneda"),
+            literal(periodo).label("periodo"),
+            cast(literal(EstadoFactura.BORRADOR, Factura.estado.type), Factura.estado.type).label("estado"),
+        )
+        .join(Plan, Plan.id == Contrato.plan_id)
+        .where(Contrato.estado == EstadoContrato.ACTIVO)
+        .where(Contrato.fecha_inicio <= fin)
+        .where(or_(Contrato.fecha_fin.is_(None), Contrato.fecha_fin >= inicio))
+        .where(~exists(facturada))
+    )
+    if fecha_corte:
+        query = query.where(fecha_emision <= fecha_corte)
+
+    return query
+
+
+def _chunk_statement(
+    periodo: str, fecha_corte: date | None, after: uuid.UUID | None, chunk_size: int
+) -> Select:
+    """
+    Insert the invoices of the next chunk_size contracts after `after`
+
+    A single statement returning the last contract id of the chunk (None
+    once there are no contracts left) and the number of invoices inserted.
+    """
+    query = facturables_query(periodo, fecha_corte)
+    if after:
+        query = query.where(Contrato.id > after)
+    lote = query.order_by(Contrato.id).limit(chunk_size).cte("lote")
+
+    insertadas = (
+        insert(Factura)
+        .from_select(_COLUMNS, select(*(lote.c[column] for column in _COLUMNS)))
+        # Another run may have billed some of these contracts meanwhile
+        .on_conflict_do_nothing(constraint=UNIQUE_CONTRATO_PERIODO)
+        .returning(Factura.id)
+        .cte("insertadas")
+    )
+    return select(
+        select(lote.c.contrato_id).order_by(lote.c.contrato_id.desc()).limit(1).scalar_subquery(),
+        select(func.count()).select_from(insertadas).scalar_subquery(),
+    )
+
+
+async def generate_facturas(
+    db: AsyncSession,
+    periodo: str,
+    fecha_corte: date | None = None,
+    dry_run: bool = False,
+    chunk_size: int = CHUNK_SIZE,
+    on_progress: ProgressCallback | None = None,
+) -> FacturacionResult:
+    """
+    Create the Facturas of a period for every active contract
+
+    Unlike most services this commits, once per chunk, so a failed run
+    keeps the invoices already created and can simply be started again.
+
+    Args:
+        db: Database session
+        periodo: Billing period YYYY-MM
+        fecha_corte: Only bill contracts whose billing day is on or before this date
+        dry_run: Count the invoices that would be created without creating them
+        chunk_size: Contracts per statement
+        on_progress: Called after each chunk
+
+    Returns:
+        FacturacionResult with the number of invoices created
+    """
+    started = time.monotonic()
+
+    if dry_run:
+        result = await db.execute(
+            select(func.count()).select_from(facturables_query(periodo, fecha_corte).subquery())
+        )
+        return FacturacionResult(
+            periodo=periodo,
+            fecha_corte=fecha_corte,
+            dry_run=True,
+            facturas=result.scalar() or 0,
+            lotes=0,
+            duration_ms=int((time.monotonic() - started) * 1000),
+        )
+
+    after = None
+    facturas = 0
+    lotes = 0
+    while True:
+        result = await db.execute(_chunk_statement(periodo, fecha_corte, after, chunk_size))
+        after, insertadas = result.one()
+        if after is None:
+            break
+        await db.commit()
+        facturas += insertadas
+        lotes += 1
+        logger.info(f"Billing {periodo}: chunk {lotes} done, {insertadas} invoices ({facturas} total)")
+        if on_progress:
+            on_progress(facturas, lotes)
+
+    duration_ms = int((time.monotonic() - started) * 1000)
+    logger.info(f"Billing {periodo}: {facturas} invoices created in {lotes} chunks, {duration_ms} ms")
+    return FacturacionResult(
+        periodo=periodo,
+        fecha_corte=fecha_corte,
+        dry_run=False,
+        facturas=facturas,
+        lotes=lotes,
+        duration_ms=duration_ms,
+    )
+
+
+async def list_facturas(
+    db: AsyncSession,
+    page: int = 1,
+    page_size: int = 20,
+    cliente_id: uuid.UUID | None = None,
+    contrato_id: uuid.UUID | None = None,
+    estado: EstadoFactura | None = None,
+    periodo: str | None = None,
+) -> PaginatedResponse:
+    query = select(Factura).order_by(Factura.fecha_emision.desc(), Factura.numero_factura)
+
+    if cliente_id:
+        query = query.where(Factura.cliente_id == cliente_id)
+    if contrato_id:
+        query = query.where(Factura.contrato_id == contrato_id)
+    if estado:
+        query = query.where(Factura.estado == estado)
+    if periodo:
+        query = query.where(Factura.periodo == periodo)
+
+    return await paginate(db, query, page, page_size)
+
+
+async def get_factura(db: AsyncSession, factura_id: uuid.UUID) -> Factura:
+    result = await db.execute(select(Factura).where(Factura.id == factura_id))
+    factura = result.scalar_one_or_none()
+    if not factura:
+        raise NotFoundError("Factura no encontrada")
+    return factura
@@ -1,12 +1,13 @@
-import os
+import hashlib
 import uuid
 from datetime import date
+from types import SimpleNamespace
 
-from sqlalchemy import func, select
+from sqlalchemy import func, inspect, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.core.exceptions import BadRequestError, NotFoundError
+from app.core.exceptions import BadRequestError, NotFoundError, ServiceUnavailableError
 from app.models.cliente import Cliente, TipoIdentificacion
 from app.models.contrato import Contrato
 from app.models.instalacion import EstadoInstalacion, Instalacion
@@ -21,8 +22,18 @@ from app.schemas.instalacion import (
 )
 from app.services import clientes as clientes_service
 from app.services import contratos as contratos_service
+from app.services.documentos import delete_stored
+from app.services.pdf_pool import pdf_pool
+from app.services.storage import storage
 from app.utils.cedula import validate_identificacion
 from app.utils.pagination import paginate
+from app.utils.pdf_generator import generate_instalacion_pdf
+
+# Storage prefix of the installation request PDFs, see get_pdf_solicitud
+PDF_SOLICITUD_PREFIX = "instalaciones/solicitudes"
+
+# Bump when generate_instalacion_pdf output changes, cached PDFs are then re-rendered
+PDF_SOLICITUD_VERSION = 1
 
 # Valid state transitions
 VALID_TRANSITIONS = {
@@ -239,7 +250,7 @@ async def activar_instalacion(
         router_id=data.router_id,
         ip_asignada=data.ip_asignada,
     )
-    contrato = await contratos_service.create_contrato(db, contrato_data)
+    contrato = await contratos_service.create_contrato(db, contrato_data, usuario_id)
 
     # Update installation
     instalacion.contrato_id = contrato.id
@@ -251,31 +262,59 @@ async def activar_instalacion(
     return await get_instalacion(db, instalacion_id)
 
 
-async def generate_pdf_solicitud(db: AsyncSession, instalacion_id: uuid.UUID) -> bytes:
-    """Generate PDF for installation request"""
-    from app.utils.pdf_generator import generate_instalacion_pdf
+def pdf_solicitud_etag(instalacion: Instalacion) -> str:
+    """
+    Cache key of the request PDF, also sent as its ETag
 
-    instalacion = await get_instalacion(db, instalacion_id)
-    return generate_instalacion_pdf(instalacion, instalacion.plan)
+    Derived from what the document is rendered from, so it changes
+    whenever the installation, its plan or the template changes and the
+    PDF can be cached (and revalidated) without rendering it.
+    """
+    raw = (
+        f"{PDF_SOLICITUD_VERSION}|{instalacion.id}|{instalacion.updated_at.isoformat()}|"
+        f"{instalacion.plan.id}|{instalacion.plan.updated_at.isoformat()}"
+    )
+    return hashlib.sha256(raw.encode()).hexdigest()[:32]
 
 
-async def save_pdf_solicitud(
-    db: AsyncSession, instalacion_id: uuid.UUID, pdf_bytes: bytes
-) -> str:
-    """Save PDF file and update instalacion record"""
-    instalacion = await get_instalacion(db, instalacion_id)
+def _snapshot(obj) -> SimpleNamespace:
+    """Column values of a model instance, picklable for the PDF worker processes"""
+    return SimpleNamespace(**{attr.key: getattr(obj, attr.key) for attr in inspect(obj).mapper.column_attrs})
 
-    # Create directory if not exists
-    upload_dir = "/app/uploads/instalaciones/solicitudes"
-    os.makedirs(upload_dir, exist_ok=True)
 
-    # Save PDF file
-    file_path = f"{upload_dir}/{instalacion.numero_instalacion}.pdf"
-    with open(file_path, "wb") as f:
-        f.write(pdf_bytes)
+async def get_pdf_solicitud(db: AsyncSession, instalacion: Instalacion) -> str:
+    """
+    Storage key of the installation request PDF, rendered only if not cached yet
 
-    # Update instalacion record
-    instalacion.pdf_solicitud_path = file_path
-    await db.flush()
+    Keys are named after pdf_solicitud_etag, so an unchanged installation
+    is served from storage and an edited one gets a new file. The previous
+    file is removed once replaced.
+
+    Raises:
+        ServiceUnavailableError: If rendering takes longer than the PDF pool allows
+    """
+    key = f"{PDF_SOLICITUD_PREFIX}/{instalacion.numero_instalacion}-{pdf_solicitud_etag(instalacion)}.pdf"
+
+    if not await storage.exists(key):
+        try:
+            pdf_bytes = await pdf_pool.run(
+                generate_instalacion_pdf, _snapshot(instalacion), _snapshot(instalacion.plan)
+            )
+        except TimeoutError:
+            raise ServiceUnavailableError(
+                "El PDF de la solicitud está tardando demasiado en generarse, intente de nuevo"
+            )
+        # Concurrent downloads may render the same file, never serve a partial one
+        await storage.put_bytes(key, pdf_bytes, "application/pdf")
+
+    previous_key = instalacion.pdf_solicitud_path
+    if previous_key != key:
+        # Keep updated_at as is, it is part of the cache key
+        await db.execute(
+            update(Instalacion.__table__)
+            .where(Instalacion.id == instalacion.id)
+            .values(pdf_solicitud_path=key, updated_at=Instalacion.updated_at)
+        )
+        await delete_stored(previous_key)
 
-    return file_path
+    return key
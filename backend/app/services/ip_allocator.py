@@ -0,0 +1,290 @@
+"""
+IP allocator for router CIDR pools
+
+Keeps, per router, the free addresses of its cidr_disponibles as sorted
+integer intervals instead of walking network.hosts() and comparing strings.
+Finding the next free IP is O(1), checking an address is O(log n). Pools are
+cached per process, updated incrementally when contract changes commit and
+rebuilt from the database when the router's CIDRs change or the entry ages
+out (other worker processes allocate too).
+"""
+import asyncio
+import ipaddress
+import logging
+import time
+import uuid
+from bisect import bisect_right
+from collections.abc import Iterable, Iterator
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.contrato import Contrato
+from app.models.router import Router
+from app.utils.cidr import host_ranges, int_to_ip
+
+logger = logging.getLogger(__name__)
+
+# Seconds before a cached pool is rebuilt from the database
+CACHE_TTL = 300
+
+# Candidates checked against the database before the pool is rebuilt
+VERIFY_ATTEMPTS = 20
+
+# Session.info key holding IP changes to apply after commit
+_PENDING_KEY = "ip_allocator_changes"
+
+
+def _parse_ip(value: str) -> ipaddress.IPv4Address | ipaddress.IPv6Address | None:
+    try:
+        return ipaddress.ip_address(value.strip())
+    except (ValueError, AttributeError):
+        return None
+
+
+class FreeList:
+    """Sorted, disjoint, inclusive integer intervals"""
+
+    def __init__(self, intervals: Iterable[tuple[int, int]] = ()):
+        self.starts: list[int] = []
+        self.ends: list[int] = []
+        for start, end in intervals:
+            self.starts.append(start)
+            self.ends.append(end)
+
+    @classmethod
+    def build(cls, bounds: Iterable[tuple[int, int]], used: Iterable[int]) -> "FreeList":
+        """Intervals of bounds (sorted, merged) minus the used values"""
+        used_sorted = sorted(set(used))
+        free = cls()
+        for start, end in bounds:
+            current = start
+            i = bisect_right(used_sorted, start - 1)
+            while i < len(used_sorted) and used_sorted[i] <= end:
+                if used_sorted[i] > current:
+                    free.starts.append(current)
+                    free.ends.append(used_sorted[i] - 1)
+                current = used_sorted[i] + 1
+                i += 1
+            if current <= end:
+                free.starts.append(current)
+                free.ends.append(end)
+        return free
+
+    def _index(self, value: int) -> int:
+        """Index of the interval that could contain value, -1 if none"""
+        return bisect_right(self.starts, value) - 1
+
+    def __contains__(self, value: int) -> bool:
+        i = self._index(value)
+        return i >= 0 and value <= self.ends[i]
+
+    def first(self) -> int | None:
+        return self.starts[0] if self.starts else None
+
+    def next_after(self, value: int) -> int | None:
+        """Smallest free value greater than value"""
+        i = self._index(value + 1)
+        if i >= 0 and value + 1 <= self.ends[i]:
+            return value + 1
+        return self.starts[i + 1] if i + 1 < len(self.starts) else None
+
+    def remove(self, value: int) -> bool:
+        """Take value out of the free intervals, return False if it wasn't free"""
+        i = self._index(value)
+        if i < 0 or value > self.ends[i]:
+            return False
+        start, end = self.starts[i], self.ends[i]
+        if start == end:
+            del self.starts[i], self.ends[i]
+        elif value == start:
+            self.starts[i] = value + 1
+        elif value == end:
+            self.ends[i] = value - 1
+        else:
+            self.ends[i] = value - 1
+            self.starts.insert(i + 1, value + 1)
+            self.ends.insert(i + 1, end)
+        return True
+
+    def add(self, value: int) -> None:
+        """Put value back, merging with adjacent intervals"""
+        if value in self:
+            return
+        i = self._index(value)
+        joins_left = i >= 0 and self.ends[i] == value - 1
+        joins_right = i + 1 < len(self.starts) and self.starts[i + 1] == value + 1
+        if joins_left and joins_right:
+            self.ends[i] = self.ends[i + 1]
+            del self.starts[i + 1], self.ends[i + 1]
+        elif joins_left:
+            self.ends[i] = value
+        elif joins_right:
+            self.starts[i + 1] = value
+        else:
+            self.starts.insert(i + 1, value)
+            self.ends.insert(i + 1, value)
+
+
+class RouterIPPool:
+    """Free addresses of one router's cidr_disponibles"""
+
+    def __init__(self, cidr_disponibles: str, used_ips: Iterable[str]):
+        self.cidr_disponibles = cidr_disponibles
+        self.built_at = time.monotonic()
+        self.bounds = host_ranges(cidr_disponibles)
+        self.hosts = {version: FreeList(bounds) for version, bounds in self.bounds.items()}
+
+        used: dict[int, list[int]] = {}
+        for value in used_ips:
+            ip = _parse_ip(value)
+            if ip is not None:
+                used.setdefault(ip.version, []).append(int(ip))
+
+        self.free = {
+            version: FreeList.build(bounds, used.get(version, ()))
+            for version, bounds in self.bounds.items()
+        }
+
+    def in_ranges(self, ip: str) -> bool:
+        """Whether ip is a usable host address of the router's CIDRs"""
+        parsed = _parse_ip(ip)
+        if parsed is None or parsed.version not in self.hosts:
+            return False
+        return int(parsed) in self.hosts[parsed.version]
+
+    def iter_free(self) -> Iterator[str]:
+        """Free addresses in ascending order, IPv4 before IPv6"""
+        for version in sorted(self.free):
+            free = self.free[version]
+            value = free.first()
+            while value is not None:
+                yield int_to_ip(version, value)
+                value = free.next_after(value)
+
+    def allocate(self, ip: str) -> None:
+        parsed = _parse_ip(ip)
+        if parsed is not None and parsed.version in self.free:
+            self.free[parsed.version].remove(int(parsed))
+
+    def release(self, ip: str) -> None:
+        if self.in_ranges(ip):
+            parsed = _parse_ip(ip)
+            self.free[parsed.version].add(int(parsed))
+
+
+class IPAllocator:
+    """Per-process cache of RouterIPPool by router"""
+
+    def __init__(self, ttl: float = CACHE_TTL):
+        self.ttl = ttl
+        self._pools: dict[uuid.UUID, RouterIPPool] = {}
+        self._locks: dict[uuid.UUID, asyncio.Lock] = {}
+
+    async def _used_ips(self, db: AsyncSession, router_id: uuid.UUID) -> list[str]:
+        result = await db.execute(
+            select(Contrato.ip_asignada)
+            .where(Contrato.router_id == router_id)
+            .where(Contrato.ip_asignada.isnot(None))
+        )
+        return list(result.scalars().all())
+
+    async def get_pool(self, db: AsyncSession, router: Router) -> RouterIPPool:
+        """Cached pool for the router, rebuilt if its CIDRs changed or it aged out"""
+        pool = self._pools.get(router.id)
+        if self._is_fresh(pool, router):
+            return pool
+
+        lock = self._locks.setdefault(router.id, asyncio.Lock())
+        async with lock:
+            pool = self._pools.get(router.id)
+            if not self._is_fresh(pool, router):
+                pool = RouterIPPool(router.cidr_disponibles or "", await self._used_ips(db, router.id))
+                self._pools[router.id] = pool
+        return pool
+
+    def _is_fresh(self, pool: RouterIPPool | None, router: Router) -> bool:
+        return (
+            pool is not None
+            and pool.cidr_disponibles == (router.cidr_disponibles or "")
+            and time.monotonic() - pool.built_at < self.ttl
+        )
+
+    async def next_available(
+        self, db: AsyncSession, router: Router, exclude: Iterable[str] = ()
+    ) -> str | None:
+        """
+        Lowest free IP of the router, verified against the database
+
+        The cache may miss allocations made by other processes, so the
+        candidate is checked with an indexed lookup before it is returned.
+
+        Args:
+            exclude: Addresses to skip without marking them as allocated
+                (e.g. IPs under an active reservation)
+        """
+        exclude = set(exclude)
+        for attempt in range(2):
+            pool = await self.get_pool(db, router)
+            stale = 0
+            for candidate in pool.iter_free():
+                if candidate in exclude:
+                    continue
+                result = await db.execute(
+                    select(Contrato.id)
+                    .where(Contrato.router_id == router.id)
+                    .where(Contrato.ip_asignada == candidate)
+                    .limit(1)
+                )
+                if result.first() is None:
+                    return candidate
+                pool.allocate(candidate)
+                stale += 1
+                if stale >= VERIFY_ATTEMPTS:
+                    break
+            else:
+                return None
+            # Too many stale entries, start over from the database
+            self.invalidate(router.id)
+        return None
+
+    def apply_change(self, router_id: uuid.UUID, ip: str, allocated: bool) -> None:
+        """Update a cached pool after a committed contract change"""
+        pool = self._pools.get(router_id)
+        if pool is None:
+            return
+        if allocated:
+            pool.allocate(ip)
+        else:
+            pool.release(ip)
+
+    def invalidate(self, router_id: uuid.UUID) -> None:
+        self._pools.pop(router_id, None)
+
+
+def track_ip_change(
+    db: AsyncSession, router_id: uuid.UUID | None, ip: str | None, allocated: bool
+) -> None:
+    """
+    Record that a contract took (allocated=True) or freed an IP of a router
+
+    Cached pools are updated only once the transaction commits.
+    """
+    if router_id and ip:
+        db.info.setdefault(_PENDING_KEY, []).append((router_id, ip, allocated))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_ip_changes_after_commit(session: Session) -> None:
+    for router_id, ip, allocated in session.info.pop(_PENDING_KEY, ()):
+        ip_allocator.apply_change(router_id, ip, allocated)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_ip_changes_after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+# Singleton instance
+ip_allocator = IPAllocator()
@@ -0,0 +1,153 @@
+"""
+IP pool utilization per router
+
+Used/free counts, fragmentation and the largest free block of every router's
+cidr_disponibles, computed from one aggregated query over Contrato.ip_asignada
+and cached in Redis. Contract and router writes drop the cache after commit.
+"""
+import asyncio
+import json
+import logging
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.redis import get_redis
+from app.models.contrato import Contrato
+from app.models.router import Router
+from app.schemas.router import IPPoolUsage, IPPoolUsageResponse
+from app.services.ip_allocator import RouterIPPool
+from app.utils.cidr import int_to_ip, total_hosts
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY = "ip_pool_usage"
+
+# Seconds before the cached report is recomputed even without writes
+CACHE_TTL = 300
+
+# Session.info flag set by mark_pool_usage_stale, handled after commit
+_STALE_FLAG = "ip_pool_usage_stale"
+
+# Keeps the invalidation tasks referenced until they finish
+_pending: set[asyncio.Task] = set()
+
+
+def _router_usage(
+    router_id: uuid.UUID,
+    nombre: str,
+    is_active: bool,
+    cidr_disponibles: str | None,
+    ips: list[str],
+) -> IPPoolUsage:
+    pool = RouterIPPool(cidr_disponibles or "", ips)
+    total = total_hosts(cidr_disponibles or "")
+
+    free = free_blocks = largest = 0
+    largest_start = None
+    for version, free_list in pool.free.items():
+        free_blocks += len(free_list.starts)
+        for start, end in zip(free_list.starts, free_list.ends):
+            size = end - start + 1
+            free += size
+            if size > largest:
+                largest, largest_start = size, int_to_ip(version, start)
+
+    used = total - free
+    return IPPoolUsage(
+        router_id=router_id,
+        router_nombre=nombre,
+        is_active=is_active,
+        cidr_disponibles=cidr_disponibles,
+        total=total,
+        used=used,
+        free=free,
+        utilization=round(used / total, 4) if total else 0.0,
+        free_blocks=free_blocks,
+        largest_free_block=largest,
+        largest_free_block_start=largest_start,
+        # 0 when all free addresses are contiguous, close to 1 when scattered
+        fragmentation=round(1 - largest / free, 4) if free else 0.0,
+        out_of_range=sum(1 for ip in set(ips) if not pool.in_ranges(ip)),
+    )
+
+
+async def compute_pool_usage(db: AsyncSession) -> IPPoolUsageResponse:
+    """Utilization of every router, assigned IPs aggregated per router in SQL"""
+    assigned = (
+        select(Contrato.router_id, func.array_agg(Contrato.ip_asignada).label("ips"))
+        .where(Contrato.router_id.isnot(None))
+        .where(Contrato.ip_asignada.isnot(None))
+        .group_by(Contrato.router_id)
+        .subquery()
+    )
+    result = await db.execute(
+        select(Router.id, Router.nombre, Router.is_active, Router.cidr_disponibles, assigned.c.ips)
+        .outerjoin(assigned, assigned.c.router_id == Router.id)
+        .order_by(Router.nombre)
+    )
+    return IPPoolUsageResponse(
+        routers=[
+            _router_usage(row.id, row.nombre, row.is_active, row.cidr_disponibles, row.ips or [])
+            for row in result.all()
+        ],
+        computed_at=datetime.now(timezone.utc),
+        cached=False,
+    )
+
+
+async def get_pool_usage(db: AsyncSession, refresh: bool = False) -> IPPoolUsageResponse:
+    """
+    Cached utilization report of every router
+
+    Args:
+        refresh: Ignore the cached report and recompute it
+    """
+    if not refresh:
+        try:
+            cached = await get_redis().get(CACHE_KEY)
+            if cached:
+                report = IPPoolUsageResponse.model_validate(json.loads(cached))
+                report.cached = True
+                return report
+        except Exception as e:
+            logger.warning(f"Could not read IP pool usage cache: {str(e)}")
+
+    report = await compute_pool_usage(db)
+    try:
+        await get_redis().set(CACHE_KEY, report.model_dump_json(), ex=CACHE_TTL)
+    except Exception as e:
+        logger.warning(f"Could not store IP pool usage cache: {str(e)}")
+    return report
+
+
+def mark_pool_usage_stale(db: AsyncSession) -> None:
+    """Drop the cached report once the current transaction commits"""
+    db.info[_STALE_FLAG] = True
+
+
+async def _invalidate() -> None:
+    try:
+        await get_redis().delete(CACHE_KEY)
+    except Exception as e:
+        logger.warning(f"Could not invalidate IP pool usage cache: {str(e)}")
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    if session.info.pop(_STALE_FLAG, False):
+        try:
+            task = asyncio.get_running_loop().create_task(_invalidate())
+        except RuntimeError:
+            # Committed outside an event loop, the TTL expires the report
+            return
+        _pending.add(task)
+        task.add_done_callback(_pending.discard)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_stale_flag_after_rollback(session: Session) -> None:
+    session.info.pop(_STALE_FLAG, None)
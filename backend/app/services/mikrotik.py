@@ -2,18 +2,117 @@
 MikroTik RouterOS integration service using librouteros
 Manages address-lists for client access control
 """
-import ipaddress
 import logging
 import ssl
-from typing import Any
+import threading
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+from typing import Any, TypeVar
 
 import librouteros
+from librouteros.api import Path
+from librouteros.exceptions import TrapError
+from librouteros.protocol import compose_word
 from librouteros.query import Key
 
 from app.schemas.router import RouterTestConnectionResponse
+from app.services.mikrotik_pool import CALL_TIMEOUT, PoolKey, mikrotik_pool
+from app.utils.cidr import pool_ranges
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# Address-lists used by firewall rules to allow or block IPoE clients
+ADDRESS_LIST_ACTIVOS = "ISP-ACTIVOS"
+ADDRESS_LIST_SUSPENDIDOS = "ISP-SUSPENDIDOS"
+
+# Maximum number of RouterOS item ids remembered across all routers
+MAX_CACHED_IDS = 100_000
+
+# Write commands sent back-to-back per pipelined burst in bulk operations
+PIPELINE_BATCH_SIZE = 200
+
+# Seconds allowed for a single bulk call (full table print or one pipelined burst)
+BULK_CALL_TIMEOUT = 300
+
+# (menu path, action, attributes), e.g. ("/ppp/secret", "set", {".id": "*1A", "disabled": "yes"})
+RouterOSCommand = tuple[str, str, dict[str, Any]]
+
+
+def ppp_profile_name(velocidad_bajada_mbps: float) -> str:
+    """PPP profile name for a plan download speed (10.00 -> PLAN-10MB)"""
+    return f"PLAN-{int(velocidad_bajada_mbps)}MB"
+
+
+def ip_pool_name(router_nombre: str) -> str:
+    """IP pool name for a router ("Torre Norte" -> pool-torre-norte)"""
+    return f"pool-{router_nombre.lower().replace(' ', '-')}"
+
+
+def ppp_rate_limit(velocidad_subida_mbps: float, velocidad_bajada_mbps: float) -> str:
+    """
+    PPP rate-limit value "upload/download" (e.g. "10M/50M")
+
+    Speeds are converted to int to avoid decimals (10.00 -> 10)
+    """
+    return f"{int(velocidad_subida_mbps)}M/{int(velocidad_bajada_mbps)}M"
+
+
+def cidr_pool_ranges(cidr_ranges: list[str]) -> list[str]:
+    """
+    Convert CIDR ranges to MikroTik IP pool ranges, skipping invalid CIDRs
+
+    Example: ["192.168.1.0/24"] -> ["192.168.1.1-192.168.1.254"]
+    """
+    return list(pool_ranges(",".join(cidr_ranges)))
+
+
+class _ItemIdCache:
+    """
+    Thread-safe LRU of RouterOS item .id values
+
+    Keys identify an item by router, menu path and the fields used to look it
+    up (e.g. list + address). Ids are only stable for the router's uptime: a
+    reboot or config import can renumber them, and an item edited by hand
+    (WinBox) keeps its id with different fields. A cached id is therefore
+    never written to blindly, _find_id confirms it still matches the lookup
+    fields first (see MikroTikService._find_id).
+    """
+
+    def __init__(self, max_size: int = MAX_CACHED_IDS):
+        self.max_size = max_size
+        self._ids: OrderedDict[tuple, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> str | None:
+        with self._lock:
+            item_id = self._ids.get(key)
+            if item_id is not None:
+                self._ids.move_to_end(key)
+            return item_id
+
+    def set(self, key: tuple, item_id: str) -> None:
+        with self._lock:
+            self._ids[key] = item_id
+            self._ids.move_to_end(key)
+            while len(self._ids) > self.max_size:
+                self._ids.popitem(last=False)
+
+    def discard(self, key: tuple) -> None:
+        with self._lock:
+            self._ids.pop(key, None)
+
+    def clear_router(self, host: str, port: int) -> None:
+        """Forget every id cached for one router"""
+        with self._lock:
+            for key in [k for k in self._ids if k[:2] == (host, port)]:
+                del self._ids[key]
+
+
+_id_cache = _ItemIdCache()
+
 
 class MikroTikService:
     """
@@ -21,6 +120,10 @@ class MikroTikService:
 
     Address-list naming convention: ISP-{numero_contrato}
     Example: ISP-CTR-20260205-0001
+
+    Connections are borrowed from the shared per-router pool, so consecutive
+    calls on the same router reuse one logged-in API session. The blocking
+    librouteros work of every method runs in the pool's thread pool via _run().
     """
 
     def __init__(
@@ -37,9 +140,9 @@ class MikroTikService:
         self.port = port
         self.ssl = ssl
 
-    async def _connect(self) -> librouteros.Api:
+    def _open(self) -> librouteros.Api:
         """
-        Establish connection to MikroTik router
+        Establish connection to MikroTik router (blocking)
 
         Returns:
             librouteros.Api: Connected API instance
@@ -81,6 +184,143 @@ class MikroTikService:
             logger.error(f"Failed to connect to MikroTik {self.host}: {str(e)}")
             raise
 
+    async def _connect(self) -> librouteros.Api:
+        """Open a new API session in the RouterOS thread pool"""
+        return await mikrotik_pool.run(self._open)
+
+    @property
+    def _pool_key(self) -> PoolKey:
+        return (self.host, self.port, self.username, self.password, self.ssl)
+
+    @asynccontextmanager
+    async def _session(self) -> AsyncIterator[librouteros.Api]:
+        """
+        Borrow a pooled API connection to this router
+
+        Yields:
+            librouteros.Api: Logged-in API instance, returned to the pool on exit
+        """
+        async with mikrotik_pool.connection(self._pool_key, self._connect) as api:
+            yield api
+
+    async def _run(
+        self, func: Callable[[librouteros.Api], T], timeout: float = CALL_TIMEOUT
+    ) -> T:
+        """
+        Run a blocking function against a pooled connection off the event loop
+
+        Args:
+            func: Callable receiving the API instance; all librouteros calls go here
+            timeout: Seconds func may run before it is abandoned
+
+        Returns:
+            Whatever func returns
+        """
+        async with self._session() as api:
+            return await mikrotik_pool.run(func, api, timeout=timeout)
+
+    def _cache_key(self, path: Path, match: dict[str, str]) -> tuple:
+        return (self.host, self.port, str(path), tuple(sorted(match.items())))
+
+    @staticmethod
+    def _find(path: Path, fields: tuple[str, ...], **match: str) -> list[dict[str, Any]]:
+        """
+        Query items whose fields equal match, filtered on the router
+
+        Args:
+            path: Menu path (e.g. api.path("/ppp/secret"))
+            fields: Properties to return (.proplist)
+            **match: Field/value pairs that must all match
+
+        Returns:
+            Matching items (only the requested fields)
+        """
+        query = path.select(*(Key(field) for field in fields))
+        conditions = [Key(field) == value for field, value in match.items()]
+        return list(query.where(*conditions))
+
+    def _find_id(self, path: Path, **match: str) -> str | None:
+        """
+        Return the .id of the first item matching all fields, or None
+
+        A cached id is re-checked against match by .id before it is returned,
+        so a renumbered or edited item is never mistaken for the one looked up.
+        """
+        cache_key = self._cache_key(path, match)
+        item_id = _id_cache.get(cache_key)
+        if item_id is not None:
+            if self._find(path, (".id",), **{".id": item_id, **match}):
+                return item_id
+            _id_cache.discard(cache_key)
+
+        items = self._find(path, (".id",), **match)
+        if not items:
+            return None
+        item_id = items[0][".id"]
+        _id_cache.set(cache_key, item_id)
+        return item_id
+
+    def _upsert(
+        self,
+        path: Path,
+        match: dict[str, str],
+        update_data: dict[str, Any],
+        add_data: dict[str, Any],
+    ) -> bool:
+        """
+        Update the item identified by match, or add it if it doesn't exist
+
+        Args:
+            path: Menu path
+            match: Fields that identify the item (e.g. {"name": username})
+            update_data: Fields to set on an existing item (without .id)
+            add_data: Fields for a new item (match is merged in)
+
+        Returns:
+            True if an existing item was updated, False if a new one was added
+        """
+        cache_key = self._cache_key(path, match)
+        item_id = self._find_id(path, **match)
+        if item_id is not None:
+            try:
+                path.update(**{".id": item_id, **update_data})
+                return True
+            except TrapError:
+                # Cached id no longer exists on the router, look it up again
+                _id_cache.discard(cache_key)
+                item_id = self._find_id(path, **match)
+                if item_id is not None:
+                    path.update(**{".id": item_id, **update_data})
+                    return True
+
+        item_id = path.add(**{**match, **add_data})
+        _id_cache.set(cache_key, item_id)
+        return False
+
+    def _remove_matching(
+        self, path: Path, cache_fields: tuple[str, ...] | None = None, **match: str
+    ) -> list[dict[str, Any]]:
+        """
+        Remove every item matching all fields in a single command
+
+        Args:
+            path: Menu path
+            cache_fields: Fields the id cache is keyed by for these items, when
+                they differ from match (e.g. list + address when removing by address)
+            **match: Field/value pairs that must all match
+
+        Returns:
+            The removed items (.id plus the match and cache fields)
+        """
+        cache_fields = cache_fields or tuple(match)
+        items = self._find(path, (".id", *match, *cache_fields), **match)
+        if items:
+            path.remove(*(item[".id"] for item in items))
+            for item in items:
+                item_key = {field: item.get(field, "") for field in cache_fields}
+                _id_cache.discard(self._cache_key(path, item_key))
+        return items
+
     async def test_connection(self) -> RouterTestConnectionResponse:
         """
         Test connection to MikroTik and retrieve system identity
@@ -88,25 +328,24 @@ class MikroTikService:
         Returns:
             RouterTestConnectionResponse with success status and router version
         """
+        def _apply(api: librouteros.Api) -> RouterTestConnectionResponse:
+            # Get system identity and version
+            system = api.path("/system/identity")
+            identity = list(system)[0]
+            router_name = identity.get("name", "Unknown")
+
+            resource = api.path("/system/resource")
+            resource_info = list(resource)[0]
+            version = resource_info.get("version", "Unknown")
+
+            return RouterTestConnectionResponse(
+                success=True,
+                message=f"Conexión exitosa a {router_name}",
+                router_version=version,
+            )
+
         try:
-            api = await self._connect()
-            try:
-                # Get system identity and version
-                system = api.path("/system/identity")
-                identity = list(system)[0]
-                router_name = identity.get("name", "Unknown")
-
-                resource = api.path("/system/resource")
-                resource_info = list(resource)[0]
-                version = resource_info.get("version", "Unknown")
-
-                return RouterTestConnectionResponse(
-                    success=True,
-                    message=f"Conexión exitosa a {router_name}",
-                    router_version=version,
-                )
-            finally:
-                api.close()
+            return await self._run(_apply)
         except Exception as e:
             error_msg = str(e)
             logger.error(f"Connection test failed for {self.host}: {error_msg}")
@@ -132,52 +371,29 @@ class MikroTikService:
             True if successful, False otherwise
         """
         logger.warning(f"[MikroTik] add_address_list called: list={list_name}, address={address}, disabled={disabled}")
-        try:
-            logger.warning(f"[MikroTik] Connecting to {self.host}:{self.port}")
-            api = await self._connect()
-            try:
-                firewall = api.path("/ip/firewall/address-list")
-
-                # Get all entries and filter manually
-                logger.warning(f"[MikroTik] Getting all entries to check for duplicates")
-                all_entries = list(firewall)
-                logger.warning(f"[MikroTik] Total entries: {len(all_entries)}")
-
-                # Check if entry exists
-                existing_list = [
-                    e for e in all_entries
-                    if e.get("list") == list_name and e.get("address") == address
-                ]
-                logger.warning(f"[MikroTik] Found {len(existing_list)} existing entries for list={list_name}, address={address}")
-
-                if existing_list:
-                    # Update existing entry
-                    entry_id = existing_list[0][".id"]
-                    update_data = {".id": entry_id, "disabled": "yes" if disabled else "no"}
-                    if comment:
-                        update_data["comment"] = comment
-                    logger.warning(f"[MikroTik] Updating entry ID {entry_id}")
-                    firewall.update(**update_data)
-                    logger.warning(
-                        f"[MikroTik] Updated address-list {list_name} for {address} (disabled={disabled})"
-                    )
-                else:
-                    # Add new entry
-                    add_data = {
-                        "list": list_name,
-                        "address": address,
-                        "disabled": "yes" if disabled else "no",
-                        "comment": comment or f"ISP Billing System",
-                    }
-                    logger.warning(f"[MikroTik] Adding new entry with data: {add_data}")
-                    firewall.add(**add_data)
-                    logger.warning(
-                        f"[MikroTik] Added address-list {list_name} for {address} (disabled={disabled})"
-                    )
 
-                return True
-            finally:
-                api.close()
+        def _apply(api: librouteros.Api) -> bool:
+            firewall = api.path("/ip/firewall/address-list")
+
+            update_data = {"disabled": "yes" if disabled else "no"}
+            if comment:
+                update_data["comment"] = comment
+            add_data = {
+                "disabled": "yes" if disabled else "no",
+                "comment": comment or "ISP Billing System",
+            }
+
+            updated = self._upsert(
+                firewall, {"list": list_name, "address": address}, update_data, add_data
+            )
+            action = "Updated" if updated else "Added"
+            logger.warning(
+                f"[MikroTik] {action} address-list {list_name} for {address} (disabled={disabled})"
+            )
+            return True
+
+        try:
+            return await self._run(_apply)
         except Exception as e:
             logger.exception(
                 f"[MikroTik] Failed to add/update address-list {list_name} for {address}: {str(e)}"
@@ -201,6 +417,67 @@ class MikroTikService:
         # Same implementation as add_address_list (it handles both add and update)
         return await self.add_address_list(list_name, address, disabled)
 
+    async def move_to_address_list(
+        self, list_name: str, address: str, comment: str | None = None
+    ) -> bool:
+        """
+        Make list_name the only address-list containing address
+
+        Removes the address from every other list and adds/updates it in
+        list_name (enabled) using one filtered query on the router.
+
+        Args:
+            list_name: Target address-list (e.g., "ISP-ACTIVOS")
+            address: IP address
+            comment: Optional comment for the address-list entry
+
+        Returns:
+            True if successful, False otherwise
+        """
+        logger.warning(f"[MikroTik] move_to_address_list called: list={list_name}, address={address}")
+
+        def _apply(api: librouteros.Api) -> bool:
+            firewall = api.path("/ip/firewall/address-list")
+            entries = self._find(firewall, (".id", "list"), address=address)
+
+            current = next((e for e in entries if e.get("list") == list_name), None)
+            stale = [e for e in entries if e is not current]
+            if stale:
+                firewall.remove(*(e[".id"] for e in stale))
+                for entry in stale:
+                    _id_cache.discard(
+                        self._cache_key(firewall, {"list": entry.get("list", ""), "address": address})
+                    )
+                logger.warning(
+                    f"[MikroTik] Removed {address} from lists "
+                    f"{', '.join(e.get('list', 'unknown') for e in stale)}"
+                )
+
+            match = {"list": list_name, "address": address}
+            update_data = {"disabled": "no"}
+            if comment:
+                update_data["comment"] = comment
+
+            if current:
+                firewall.update(**{".id": current[".id"], **update_data})
+                _id_cache.set(self._cache_key(firewall, match), current[".id"])
+            else:
+                item_id = firewall.add(
+                    **match, disabled="no", comment=comment or "ISP Billing System"
+                )
+                _id_cache.set(self._cache_key(firewall, match), item_id)
+
+            logger.warning(f"[MikroTik] {address} is now only in address-list {list_name}")
+            return True
+
+        try:
+            return await self._run(_apply)
+        except Exception as e:
+            logger.exception(
+                f"[MikroTik] Failed to move {address} to address-list {list_name}: {str(e)}"
+            )
+            return False
+
     async def remove_address_list(self, list_name: str, address: str) -> bool:
         """
         Remove address-list entry from MikroTik
@@ -212,32 +489,23 @@ class MikroTikService:
         Returns:
             True if successful, False otherwise
         """
-        try:
-            api = await self._connect()
-            try:
-                firewall = api.path("/ip/firewall/address-list")
-
-                # Find entries matching list name and address
-                entries = firewall.select(Key("list") == list_name, Key("address") == address)
-                entries_list = list(entries)
+        def _apply(api: librouteros.Api) -> bool:
+            firewall = api.path("/ip/firewall/address-list")
+            removed = self._remove_matching(firewall, list=list_name, address=address)
 
-                logger.info(f"Found {len(entries_list)} entries for {list_name} with address {address}")
-
-                if not entries_list:
-                    logger.info(
-                        f"No address-list entry to remove for {list_name} with address {address}"
-                    )
-                    return True  # Not an error if it doesn't exist
+            if not removed:
+                logger.info(
+                    f"No address-list entry to remove for {list_name} with address {address}"
+                )
+                return True  # Not an error if it doesn't exist
 
-                # Remove all matching entries
-                for entry in entries_list:
-                    logger.info(f"Removing entry ID {entry['.id']} from {list_name}")
-                    firewall.remove(entry[".id"])
-                    logger.info(f"Successfully removed address-list {list_name} for {address}")
+            logger.info(
+                f"Successfully removed {len(removed)} address-list entries {list_name} for {address}"
+            )
+            return True
 
-                return True
-            finally:
-                api.close()
+        try:
+            return await self._run(_apply)
         except Exception as e:
             logger.error(
                 f"Failed to remove address-list {list_name} for {address}: {str(e)}"
@@ -255,36 +523,23 @@ class MikroTikService:
             True if successful, False otherwise
         """
         logger.warning(f"[MikroTik] remove_all_for_address called for {address}")
-        try:
-            logger.warning(f"[MikroTik] Connecting to {self.host}:{self.port}")
-            api = await self._connect()
-            try:
-                firewall = api.path("/ip/firewall/address-list")
 
-                # Get ALL entries and filter manually
-                logger.warning(f"[MikroTik] Getting all address-list entries")
-                all_entries = list(firewall)
-                logger.warning(f"[MikroTik] Total entries in firewall: {len(all_entries)}")
-
-                # Filter by address
-                matching_entries = [e for e in all_entries if e.get("address") == address]
-                logger.warning(f"[MikroTik] Found {len(matching_entries)} entries matching address {address}")
+        def _apply(api: librouteros.Api) -> bool:
+            firewall = api.path("/ip/firewall/address-list")
+            removed = self._remove_matching(
+                firewall, cache_fields=("list", "address"), address=address
+            )
 
-                if not matching_entries:
-                    logger.warning(f"[MikroTik] No entries to remove for address {address}")
-                    return True
+            if not removed:
+                logger.warning(f"[MikroTik] No entries to remove for address {address}")
+                return True
 
-                # Remove all matching entries
-                for entry in matching_entries:
-                    list_name = entry.get("list", "unknown")
-                    entry_id = entry.get(".id", "unknown")
-                    logger.warning(f"[MikroTik] Removing {address} from list {list_name} (ID: {entry_id})")
-                    firewall.remove(entry_id)
+            lists = ", ".join(entry.get("list", "unknown") for entry in removed)
+            logger.warning(f"[MikroTik] Successfully removed {address} from lists: {lists}")
+            return True
 
-                logger.warning(f"[MikroTik] Successfully removed {len(matching_entries)} entries for address {address}")
-                return True
-            finally:
-                api.close()
+        try:
+            return await self._run(_apply)
         except Exception as e:
             logger.exception(f"[MikroTik] Failed to remove all entries for {address}: {str(e)}")
             return False
@@ -299,14 +554,14 @@ class MikroTikService:
         Returns:
             List of address-list entries
         """
+        def _apply(api: librouteros.Api) -> list[dict[str, Any]]:
+            firewall = api.path("/ip/firewall/address-list")
+            return self._find(
+                firewall, (".id", "list", "address", "disabled", "comment"), list=list_name
+            )
+
         try:
-            api = await self._connect()
-            try:
-                firewall = api.path("/ip/firewall/address-list")
-                entries = firewall.select(Key("list") == list_name)
-                return list(entries)
-            finally:
-                api.close()
+            return await self._run(_apply)
         except Exception as e:
             logger.error(f"Failed to get address-list {list_name}: {str(e)}")
             return []
@@ -328,58 +583,28 @@ class MikroTikService:
         Returns:
             True if successful, False otherwise
         """
-        try:
-            api = await self._connect()
-            try:
-                ip_pool = api.path("/ip/pool")
-
-                # Check if pool exists
-                all_pools = list(ip_pool)
-                existing_pool = [p for p in all_pools if p.get("name") == pool_name]
-
-                # Convert CIDR ranges to IP ranges for MikroTik
-                # Example: 192.168.1.0/24 -> 192.168.1.2-192.168.1.254
-                ip_ranges = []
-                for cidr in cidr_ranges:
-                    try:
-                        network = ipaddress.ip_network(cidr, strict=False)
-                        # Skip network and broadcast addresses
-                        usable_ips = list(network.hosts())
-                        if usable_ips:
-                            first_ip = str(usable_ips[0])
-                            last_ip = str(usable_ips[-1])
-                            ip_ranges.append(f"{first_ip}-{last_ip}")
-                    except ValueError as e:
-                        logger.error(f"Invalid CIDR {cidr}: {str(e)}")
-                        continue
-
-                if not ip_ranges:
-                    logger.error(f"No valid IP ranges generated from CIDRs: {cidr_ranges}")
-                    return False
-
-                # Join ranges with comma
-                ranges_str = ",".join(ip_ranges)
-
-                if existing_pool:
-                    # Update existing pool
-                    pool_id = existing_pool[0][".id"]
-                    ip_pool.update(**{
-                        ".id": pool_id,
-                        "ranges": ranges_str
-                    })
-                    logger.info(f"Updated IP pool {pool_name} with ranges: {ranges_str}")
-                else:
-                    # Create new pool
-                    ip_pool.add(**{
-                        "name": pool_name,
-                        "ranges": ranges_str,
-                        "comment": "ISP Billing System - Auto-generated from CIDR"
-                    })
-                    logger.info(f"Created IP pool {pool_name} with ranges: {ranges_str}")
+        def _apply(api: librouteros.Api) -> bool:
+            ip_ranges = cidr_pool_ranges(cidr_ranges)
+            if not ip_ranges:
+                logger.error(f"No valid IP ranges generated from CIDRs: {cidr_ranges}")
+                return False
+
+            # Join ranges with comma
+            ranges_str = ",".join(ip_ranges)
+
+            ip_pool = api.path("/ip/pool")
+            updated = self._upsert(
+                ip_pool,
+                {"name": pool_name},
+                {"ranges": ranges_str},
+                {"ranges": ranges_str, "comment": "ISP Billing System - Auto-generated from CIDR"},
+            )
+            action = "Updated" if updated else "Created"
+            logger.info(f"{action} IP pool {pool_name} with ranges: {ranges_str}")
+            return True
 
-                return True
-            finally:
-                api.close()
+        try:
+            return await self._run(_apply)
         except Exception as e:
             logger.error(f"Failed to create/update IP pool {pool_name}: {str(e)}")
             return False
@@ -394,14 +619,12 @@ class MikroTikService:
         Returns:
             True if pool exists, False otherwise
         """
+        def _apply(api: librouteros.Api) -> bool:
+            ip_pool = api.path("/ip/pool")
+            return bool(self._find(ip_pool, (".id",), name=pool_name))
+
         try:
-            api = await self._connect()
-            try:
-                ip_pool = api.path("/ip/pool")
-                all_pools = list(ip_pool)
-                return any(p.get("name") == pool_name for p in all_pools)
-            finally:
-                api.close()
+            return await self._run(_apply)
         except Exception as e:
             logger.error(f"Failed to check pool {pool_name}: {str(e)}")
             return False
@@ -429,58 +652,32 @@ class MikroTikService:
         Returns:
             True if successful, False otherwise
         """
-        try:
-            api = await self._connect()
-            try:
-                ppp_profile = api.path("/ppp/profile")
-
-                # Check if profile exists
-                all_profiles = list(ppp_profile)
-                existing_profile = [p for p in all_profiles if p.get("name") == profile_name]
-
-                # Format rate limit: "upload/download" in bits per second
-                # MikroTik expects format like "10M/50M" for 10Mbps upload / 50Mbps download
-                # Convert to int to avoid decimals (10.00 -> 10)
-                upload_speed = int(velocidad_subida_mbps)
-                download_speed = int(velocidad_bajada_mbps)
-                rate_limit = f"{upload_speed}M/{download_speed}M"
-
-                if existing_profile:
-                    # Update existing profile
-                    profile_id = existing_profile[0][".id"]
-                    update_data = {
-                        ".id": profile_id,
-                        "rate-limit": rate_limit
-                    }
-
-                    # Update local/remote address if provided
-                    if local_address:
-                        update_data["local-address"] = local_address
-                    if remote_address:
-                        update_data["remote-address"] = remote_address
-
-                    ppp_profile.update(**update_data)
-                    logger.info(f"Updated PPP profile {profile_name} with rate-limit={rate_limit}, local-address={local_address}, remote-address={remote_address}")
-                else:
-                    # Create new profile - only include network parameters if provided
-                    profile_data = {
-                        "name": profile_name,
-                        "rate-limit": rate_limit,
-                        "comment": "ISP Billing System - Auto-generated"
-                    }
-
-                    # Only add local/remote address if specified to avoid pool errors
-                    if local_address:
-                        profile_data["local-address"] = local_address
-                    if remote_address:
-                        profile_data["remote-address"] = remote_address
-
-                    ppp_profile.add(**profile_data)
-                    logger.info(f"Created PPP profile {profile_name} with rate-limit {rate_limit}")
+        # Format rate limit: "upload/download" in bits per second
+        rate_limit = ppp_rate_limit(velocidad_subida_mbps, velocidad_bajada_mbps)
+
+        # Only include local/remote address if specified to avoid pool errors
+        profile_data = {"rate-limit": rate_limit}
+        if local_address:
+            profile_data["local-address"] = local_address
+        if remote_address:
+            profile_data["remote-address"] = remote_address
+
+        def _apply(api: librouteros.Api) -> bool:
+            ppp_profile = api.path("/ppp/profile")
+            updated = self._upsert(
+                ppp_profile,
+                {"name": profile_name},
+                profile_data,
+                {**profile_data, "comment": "ISP Billing System - Auto-generated"},
+            )
+            if updated:
+                logger.info(f"Updated PPP profile {profile_name} with rate-limit={rate_limit}, local-address={local_address}, remote-address={remote_address}")
+            else:
+                logger.info(f"Created PPP profile {profile_name} with rate-limit {rate_limit}")
+            return True
 
-                return True
-            finally:
-                api.close()
+        try:
+            return await self._run(_apply)
         except Exception as e:
             logger.error(f"Failed to create/update PPP profile {profile_name}: {str(e)}")
             return False
@@ -508,51 +705,31 @@ class MikroTikService:
         Returns:
             True if successful, False otherwise
         """
-        try:
-            api = await self._connect()
-            try:
-                ppp_secret = api.path("/ppp/secret")
-
-                # Check if secret exists
-                all_secrets = list(ppp_secret)
-                existing_secret = [s for s in all_secrets if s.get("name") == username]
-
-                if existing_secret:
-                    # Update existing secret
-                    secret_id = existing_secret[0][".id"]
-                    update_data = {
-                        ".id": secret_id,
-                        "password": password,
-                        "profile": profile_name,
-                        "service": "pppoe",
-                        "disabled": "yes" if disabled else "no"
-                    }
-                    if comment:
-                        update_data["comment"] = comment
-                    if remote_address:
-                        update_data["remote-address"] = remote_address
-
-                    ppp_secret.update(**update_data)
-                    logger.info(f"Updated PPP secret for user {username} (disabled={disabled}, remote-address={remote_address})")
-                else:
-                    # Create new secret
-                    add_data = {
-                        "name": username,
-                        "password": password,
-                        "profile": profile_name,
-                        "service": "pppoe",
-                        "disabled": "yes" if disabled else "no",
-                        "comment": comment or "ISP Billing System"
-                    }
-                    if remote_address:
-                        add_data["remote-address"] = remote_address
-
-                    ppp_secret.add(**add_data)
-                    logger.info(f"Created PPP secret for user {username} with profile {profile_name} (remote-address={remote_address})")
+        secret_data = {
+            "password": password,
+            "profile": profile_name,
+            "service": "pppoe",
+            "disabled": "yes" if disabled else "no",
+        }
+        if remote_address:
+            secret_data["remote-address"] = remote_address
+
+        update_data = dict(secret_data)
+        if comment:
+            update_data["comment"] = comment
+        add_data = {**secret_data, "comment": comment or "ISP Billing System"}
+
+        def _apply(api: librouteros.Api) -> bool:
+            ppp_secret = api.path("/ppp/secret")
+            updated = self._upsert(ppp_secret, {"name": username}, update_data, add_data)
+            if updated:
+                logger.info(f"Updated PPP secret for user {username} (disabled={disabled}, remote-address={remote_address})")
+            else:
+                logger.info(f"Created PPP secret for user {username} with profile {profile_name} (remote-address={remote_address})")
+            return True
 
-                return True
-            finally:
-                api.close()
+        try:
+            return await self._run(_apply)
         except Exception as e:
             logger.error(f"Failed to add/update PPP secret for {username}: {str(e)}")
             return False
@@ -567,28 +744,19 @@ class MikroTikService:
         Returns:
             True if successful, False otherwise
         """
-        try:
-            api = await self._connect()
-            try:
-                ppp_secret = api.path("/ppp/secret")
+        def _apply(api: librouteros.Api) -> bool:
+            ppp_secret = api.path("/ppp/secret")
+            removed = self._remove_matching(ppp_secret, name=username)
 
-                # Find secret
-                all_secrets = list(ppp_secret)
-                matching_secrets = [s for s in all_secrets if s.get("name") == username]
-
-                if not matching_secrets:
-                    logger.info(f"No PPP secret found for user {username}")
-                    return True
+            if not removed:
+                logger.info(f"No PPP secret found for user {username}")
+                return True
 
-                # Remove all matching secrets (should only be one)
-                for secret in matching_secrets:
-                    secret_id = secret.get(".id")
-                    ppp_secret.remove(secret_id)
-                    logger.info(f"Removed PPP secret for user {username}")
+            logger.info(f"Removed PPP secret for user {username}")
+            return True
 
-                return True
-            finally:
-                api.close()
+        try:
+            return await self._run(_apply)
         except Exception as e:
             logger.error(f"Failed to remove PPP secret for {username}: {str(e)}")
             return False
@@ -604,31 +772,144 @@ class MikroTikService:
         Returns:
             True if successful, False otherwise
         """
-        try:
-            api = await self._connect()
-            try:
-                ppp_secret = api.path("/ppp/secret")
+        def _apply(api: librouteros.Api) -> bool:
+            ppp_secret = api.path("/ppp/secret")
+            match = {"name": username}
 
-                # Find secret
-                all_secrets = list(ppp_secret)
-                matching_secrets = [s for s in all_secrets if s.get("name") == username]
+            secret_id = self._find_id(ppp_secret, **match)
+            if secret_id is None:
+                logger.warning(f"No PPP secret found for user {username}")
+                return False
 
-                if not matching_secrets:
+            status_data = {"disabled": "yes" if disabled else "no"}
+            try:
+                ppp_secret.update(**{".id": secret_id, **status_data})
+            except TrapError:
+                # Cached id is stale, look the secret up again
+                _id_cache.discard(self._cache_key(ppp_secret, match))
+                secret_id = self._find_id(ppp_secret, **match)
+                if secret_id is None:
                     logger.warning(f"No PPP secret found for user {username}")
                     return False
+                ppp_secret.update(**{".id": secret_id, **status_data})
 
-                # Update status
-                secret_id = matching_secrets[0][".id"]
-                ppp_secret.update(**{
-                    ".id": secret_id,
-                    "disabled": "yes" if disabled else "no"
-                })
-                status = "disabled" if disabled else "enabled"
-                logger.info(f"PPP secret for user {username} {status}")
+            status = "disabled" if disabled else "enabled"
+            logger.info(f"PPP secret for user {username} {status}")
+            return True
 
-                return True
-            finally:
-                api.close()
+        try:
+            return await self._run(_apply)
         except Exception as e:
             logger.error(f"Failed to update PPP secret status for {username}: {str(e)}")
             return False
+
+    # ========== Bulk Operations ==========
+
+    async def get_sync_state(self) -> dict[str, list[dict[str, Any]]]:
+        """
+        Download everything the billing system manages on this router
+
+        One filtered print per menu: entries of the ISP address-lists,
+        all PPP secrets, all PPP profiles and all IP pools.
+
+        Returns:
+            Dict with keys "address_list", "ppp_secrets", "ppp_profiles", "ip_pools"
+
+        Raises:
+            Exception: If the router can't be reached or a print fails
+        """
+        def _apply(api: librouteros.Api) -> dict[str, list[dict[str, Any]]]:
+            firewall = api.path("/ip/firewall/address-list")
+            address_list = firewall.select(
+                Key(".id"), Key("list"), Key("address"), Key("disabled"),
+                Key("comment"), Key("dynamic"),
+            ).where(
+                Key("list").In(ADDRESS_LIST_ACTIVOS, ADDRESS_LIST_SUSPENDIDOS)
+            )
+            secrets = api.path("/ppp/secret").select(
+                Key(".id"), Key("name"), Key("password"), Key("profile"), Key("service"),
+                Key("disabled"), Key("comment"), Key("remote-address"),
+            )
+            profiles = api.path("/ppp/profile").select(
+                Key(".id"), Key("name"), Key("rate-limit"), Key("local-address"),
+                Key("remote-address"),
+            )
+            pools = api.path("/ip/pool").select(Key(".id"), Key("name"), Key("ranges"))
+            return {
+                "address_list": list(address_list),
+                "ppp_secrets": list(secrets),
+                "ppp_profiles": list(profiles),
+                "ip_pools": list(pools),
+            }
+
+        return await self._run(_apply, timeout=BULK_CALL_TIMEOUT)
+
+    @staticmethod
+    def _pipeline(api: librouteros.Api, commands: list[RouterOSCommand]) -> list[str]:
+        """
+        Write tagged commands back-to-back, then collect every reply
+
+        RouterOS processes the sentences in order, so a burst costs one
+        round-trip instead of one per command.
+
+        Returns:
+            Error messages for commands the router rejected
+        """
+        for tag, (path, action, attrs) in enumerate(commands):
+            words = [compose_word(key, value) for key, value in attrs.items()]
+            api.protocol.writeSentence(f"{path}/{action}", *words, f".tag={tag}")
+
+        errors = []
+        pending = len(commands)
+        while pending:
+            reply_word, words = api.protocol.readSentence()
+            if reply_word == "!done":
+                pending -= 1
+            elif reply_word == "!trap":
+                tag = next((w[len(".tag="):] for w in words if w.startswith(".tag=")), None)
+                message = next(
+                    (w[len("=message="):] for w in words if w.startswith("=message=")),
+                    "error desconocido",
+                )
+                if tag is not None and tag.isdigit() and int(tag) < len(commands):
+                    path, action, attrs = commands[int(tag)]
+                    target = (
+                        attrs.get(".id") or attrs.get("numbers") or attrs.get("name")
+                        or attrs.get("address", "")
+                    )
+                    errors.append(f"{path}/{action} {target}: {message}")
+                else:
+                    errors.append(message)
+        return errors
+
+    async def apply_commands(
+        self, commands: list[RouterOSCommand], batch_size: int = PIPELINE_BATCH_SIZE
+    ) -> list[str]:
+        """
+        Apply many write commands using pipelined bursts on one session
+
+        Args:
+            commands: Commands to send, in order
+            batch_size: Commands per burst
+
+        Returns:
+            Error messages for commands the router rejected
+
+        Raises:
+            Exception: If the connection fails mid-way
+        """
+        errors: list[str] = []
+        try:
+            for start in range(0, len(commands), batch_size):
+                batch = commands[start:start + batch_size]
+                errors.extend(
+                    await self._run(
+                        lambda api, batch=batch: self._pipeline(api, batch),
+                        timeout=BULK_CALL_TIMEOUT,
+                    )
+                )
+        finally:
+            # Items were added/removed behind the id cache's back
+            if commands:
+                _id_cache.clear_router(self.host, self.port)
+        return errors
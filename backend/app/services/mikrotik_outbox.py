@@ -0,0 +1,364 @@
+"""
+Outbox for MikroTik side effects of contract writes
+
+Contract create/update only insert a MikroTikSyncJob row in their own
+transaction. A background worker picks the rows up after commit, applies
+them to the router and retries failures with exponential backoff, so HTTP
+requests never wait on router round-trips.
+"""
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event, select, text, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+
+from app.core.exceptions import BadRequestError
+from app.database import async_session
+from app.models.contrato import Contrato, EstadoContrato, TipoConexion
+from app.models.mikrotik_sync_job import AccionSync, EstadoSync, MikroTikSyncJob
+from app.models.router import Router
+
+logger = logging.getLogger(__name__)
+
+# Jobs claimed per worker iteration
+BATCH_SIZE = 20
+
+# Contracts synchronized at the same time by one worker
+CONCURRENCY = 8
+
+# Seconds between polls when nothing wakes the worker up
+POLL_INTERVAL = 5
+
+# Attempts before a job is marked FALLIDO
+MAX_INTENTOS = 8
+
+# Retry delay in seconds: RETRY_BASE_DELAY * 2^(intentos-1), capped at RETRY_MAX_DELAY
+RETRY_BASE_DELAY = 10
+RETRY_MAX_DELAY = 900
+
+# Jobs stuck EN_PROCESO for longer than this (seconds) belonged to a dead worker
+STALE_AFTER = 600
+
+# Session.info flag set by enqueue_* so the worker is woken up after commit
+_WAKEUP_FLAG = "mikrotik_outbox_wakeup"
+
+# Matches the partial unique index uq_mikrotik_sync_jobs_pending_sync
+_PENDING_SYNC_WHERE = text("estado = 'PENDIENTE' AND accion = 'SYNC'")
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _retry_delay(intentos: int) -> timedelta:
+    return timedelta(seconds=min(RETRY_BASE_DELAY * 2 ** max(intentos - 1, 0), RETRY_MAX_DELAY))
+
+
+async def enqueue_sync(db: AsyncSession, contrato_id: uuid.UUID) -> None:
+    """
+    Queue applying the contract's current state to its router
+
+    Deduplicated per contract: if a SYNC is already pending it is rescheduled
+    to run now instead of adding another row.
+    """
+    stmt = pg_insert(MikroTikSyncJob).values(
+        id=uuid.uuid4(),
+        contrato_id=contrato_id,
+        accion=AccionSync.SYNC,
+        estado=EstadoSync.PENDIENTE,
+        intentos=0,
+    ).on_conflict_do_update(
+        index_elements=[MikroTikSyncJob.contrato_id],
+        index_where=_PENDING_SYNC_WHERE,
+        set_={
+            "intentos": 0,
+            "next_attempt_at": text("now()"),
+            "last_error": None,
+            "updated_at": text("now()"),
+        },
+    )
+    await db.execute(stmt)
+    db.info[_WAKEUP_FLAG] = True
+
+
+async def enqueue_cleanup(
+    db: AsyncSession, contrato_id: uuid.UUID, router_id: uuid.UUID, payload: dict
+) -> None:
+    """
+    Queue removing a contract's old configuration from a router
+
+    Args:
+        payload: {"ip": "..."} to remove address-list entries or
+            {"pppoe_usuario": "..."} to remove a PPP secret
+    """
+    db.add(MikroTikSyncJob(
+        contrato_id=contrato_id,
+        router_id=router_id,
+        accion=AccionSync.LIMPIEZA,
+        estado=EstadoSync.PENDIENTE,
+        payload=payload,
+        intentos=0,
+    ))
+    db.info[_WAKEUP_FLAG] = True
+
+
+async def list_jobs_for_contrato(
+    db: AsyncSession, contrato_id: uuid.UUID, limit: int = 10
+) -> list[MikroTikSyncJob]:
+    """Most recent sync jobs of a contract, newest first"""
+    result = await db.execute(
+        select(MikroTikSyncJob)
+        .where(MikroTikSyncJob.contrato_id == contrato_id)
+        .order_by(MikroTikSyncJob.created_at.desc())
+        .limit(limit)
+    )
+    return list(result.scalars().all())
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_worker_after_commit(session: Session) -> None:
+    if session.info.pop(_WAKEUP_FLAG, False):
+        sync_worker.notify()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_wakeup_after_rollback(session: Session) -> None:
+    session.info.pop(_WAKEUP_FLAG, None)
+
+
+async def _apply_sync(db: AsyncSession, job: MikroTikSyncJob) -> None:
+    # Imported here: contratos enqueues jobs, so it imports this module
+    from app.services.contratos import _sync_mikrotik
+
+    result = await db.execute(
+        select(Contrato)
+        .options(selectinload(Contrato.cliente), selectinload(Contrato.plan))
+        .where(Contrato.id == job.contrato_id)
+    )
+    contrato = result.scalar_one_or_none()
+    if contrato:
+        await _sync_mikrotik(db, contrato)
+
+
+async def _apply_cleanup(db: AsyncSession, job: MikroTikSyncJob) -> None:
+    from app.services.mikrotik import MikroTikService
+    from app.services.routers import decrypt_router_password
+
+    payload = job.payload or {}
+    ip = payload.get("ip")
+    pppoe_usuario = payload.get("pppoe_usuario")
+
+    router = await db.get(Router, job.router_id) if job.router_id else None
+    if not router or not router.is_active:
+        logger.info(f"Skipping MikroTik cleanup {job.id}: router missing or inactive")
+        return
+
+    # The contract may have been changed back since the job was queued
+    contrato = await db.get(Contrato, job.contrato_id)
+    if contrato and contrato.router_id == router.id and contrato.estado != EstadoContrato.CANCELADO:
+        if ip and contrato.tipo_conexion == TipoConexion.IPOE and contrato.ip_asignada == ip:
+            return
+        if (
+            pppoe_usuario
+            and contrato.tipo_conexion == TipoConexion.PPPOE
+            and contrato.pppoe_usuario == pppoe_usuario
+        ):
+            return
+
+    mikrotik = MikroTikService(
+        host=router.ip,
+        username=router.usuario,
+        password=decrypt_router_password(router),
+        port=router.puerto,
+        ssl=router.ssl,
+    )
+    if ip and not await mikrotik.remove_all_for_address(ip):
+        raise BadRequestError(f"No se pudo eliminar la IP {ip} del router '{router.nombre}'")
+    if pppoe_usuario and not await mikrotik.remove_ppp_secret(pppoe_usuario):
+        raise BadRequestError(
+            f"No se pudo eliminar el usuario PPPoE {pppoe_usuario} del router '{router.nombre}'"
+        )
+
+
+class MikroTikSyncWorker:
+    """
+    Applies queued MikroTikSyncJob rows
+
+    Jobs are claimed with SELECT ... FOR UPDATE SKIP LOCKED, so several
+    uvicorn workers can run this loop against the same table. Jobs of the same
+    contract run in creation order; different contracts run concurrently.
+    """
+
+    def __init__(self):
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self._task: asyncio.Task | None = None
+        self._wakeup: asyncio.Event | None = None
+
+    def notify(self) -> None:
+        """Wake the worker up (called after a transaction that queued jobs commits)"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _claim(self) -> list[MikroTikSyncJob]:
+        async with async_session() as db:
+            busy = select(MikroTikSyncJob.contrato_id).where(
+                MikroTikSyncJob.estado == EstadoSync.EN_PROCESO
+            )
+            result = await db.execute(
+                select(MikroTikSyncJob)
+                .where(MikroTikSyncJob.estado == EstadoSync.PENDIENTE)
+                .where(MikroTikSyncJob.next_attempt_at <= _utcnow())
+                .where(MikroTikSyncJob.contrato_id.not_in(busy))
+                .order_by(MikroTikSyncJob.next_attempt_at, MikroTikSyncJob.created_at)
+                .limit(BATCH_SIZE)
+                .with_for_update(skip_locked=True)
+            )
+            jobs = list(result.scalars().all())
+            for job in jobs:
+                job.estado = EstadoSync.EN_PROCESO
+                job.intentos += 1
+                job.worker = self.name
+            await db.commit()
+            return jobs
+
+    async def _finish(self, job_id: uuid.UUID, error: str | None) -> None:
+        async with async_session() as db:
+            job = await db.get(MikroTikSyncJob, job_id)
+            if not job:
+                return
+
+            job.last_error = error
+            if error is None:
+                job.estado = EstadoSync.COMPLETADO
+                job.completed_at = _utcnow()
+            elif job.intentos >= MAX_INTENTOS:
+                job.estado = EstadoSync.FALLIDO
+                logger.error(f"MikroTik sync job {job.id} failed after {job.intentos} attempts: {error}")
+            elif job.accion == AccionSync.SYNC and await self._has_pending_sync(db, job.contrato_id):
+                # A newer SYNC was queued meanwhile and will apply the latest state
+                job.estado = EstadoSync.FALLIDO
+            else:
+                job.estado = EstadoSync.PENDIENTE
+                job.next_attempt_at = _utcnow() + _retry_delay(job.intentos)
+            try:
+                await db.commit()
+            except IntegrityError:
+                # enqueue_sync added a SYNC for the contract after the check
+                # above; only one may be pending and it applies the latest state
+                await db.rollback()
+                await db.execute(
+                    update(MikroTikSyncJob)
+                    .where(MikroTikSyncJob.id == job_id)
+                    .values(estado=EstadoSync.FALLIDO, last_error=error)
+                )
+                await db.commit()
+
+    @staticmethod
+    async def _has_pending_sync(db: AsyncSession, contrato_id: uuid.UUID) -> bool:
+        result = await db.execute(
+            select(MikroTikSyncJob.id)
+            .where(MikroTikSyncJob.contrato_id == contrato_id)
+            .where(MikroTikSyncJob.accion == AccionSync.SYNC)
+            .where(MikroTikSyncJob.estado == EstadoSync.PENDIENTE)
+        )
+        return result.first() is not None
+
+    async def _process(self, job: MikroTikSyncJob) -> None:
+        error = None
+        try:
+            async with async_session() as db:
+                if job.accion == AccionSync.SYNC:
+                    await _apply_sync(db, job)
+                else:
+                    await _apply_cleanup(db, job)
+        except BadRequestError as e:
+            error = e.detail
+        except Exception as e:
+            logger.exception(f"Unexpected error in MikroTik sync job {job.id}: {str(e)}")
+            error = str(e) or e.__class__.__name__
+        await self._finish(job.id, error)
+
+    async def _process_contrato(self, jobs: list[MikroTikSyncJob], limit: asyncio.Semaphore) -> None:
+        async with limit:
+            for job in jobs:
+                await self._process(job)
+
+    async def run_once(self) -> int:
+        """Claim and apply one batch of due jobs, return how many were claimed"""
+        jobs = await self._claim()
+        by_contrato: dict[uuid.UUID, list[MikroTikSyncJob]] = {}
+        for job in sorted(jobs, key=lambda j: j.created_at):
+            by_contrato.setdefault(job.contrato_id, []).append(job)
+
+        limit = asyncio.Semaphore(CONCURRENCY)
+        await asyncio.gather(*(
+            self._process_contrato(contrato_jobs, limit) for contrato_jobs in by_contrato.values()
+        ))
+        return len(jobs)
+
+    async def recover_stale(self) -> None:
+        """Hand jobs left EN_PROCESO by a crashed worker back to the queue"""
+        async with async_session() as db:
+            result = await db.execute(
+                select(MikroTikSyncJob)
+                .where(MikroTikSyncJob.estado == EstadoSync.EN_PROCESO)
+                .where(MikroTikSyncJob.updated_at < _utcnow() - timedelta(seconds=STALE_AFTER))
+                .with_for_update(skip_locked=True)
+            )
+            stale = list(result.scalars().all())
+            for job in stale:
+                if job.accion == AccionSync.SYNC and await self._has_pending_sync(db, job.contrato_id):
+                    job.estado = EstadoSync.FALLIDO
+                else:
+                    job.estado = EstadoSync.PENDIENTE
+                    job.next_attempt_at = _utcnow()
+                job.last_error = f"Trabajo abandonado por el worker {job.worker}"
+            await db.commit()
+            if stale:
+                logger.warning(f"Recovered {len(stale)} stale MikroTik sync jobs")
+
+    async def _run_loop(self) -> None:
+        logger.info(f"MikroTik sync worker {self.name} started")
+        while True:
+            claimed = 0
+            try:
+                await self.recover_stale()
+                claimed = await self.run_once()
+            except Exception as e:
+                logger.error(f"Error in MikroTik sync worker: {str(e)}", exc_info=True)
+
+            # A full batch means there is probably more work waiting
+            if claimed >= BATCH_SIZE:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def start(self) -> None:
+        """Start the background worker task"""
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run_loop())
+
+    async def stop(self) -> None:
+        """Cancel the worker task; claimed jobs are recovered by recover_stale"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Singleton instance
+sync_worker = MikroTikSyncWorker()
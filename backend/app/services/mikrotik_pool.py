@@ -0,0 +1,272 @@
+"""
+Connection pool for MikroTik RouterOS API sessions
+Keeps logged-in librouteros connections open per router so consecutive
+commands reuse the same TCP/TLS session instead of reconnecting every time.
+librouteros is blocking, so every socket operation runs in a dedicated
+thread pool and never on the event loop.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, TypeVar
+
+import librouteros
+from librouteros.exceptions import MultiTrapError, TrapError
+
+logger = logging.getLogger(__name__)
+
+# Maximum simultaneous API sessions opened against a single router
+MAX_CONNECTIONS_PER_ROUTER = 4
+
+# Idle connections unused for longer than this (seconds) are closed
+IDLE_TIMEOUT = 120
+
+# Idle connections unused for longer than this (seconds) are checked before reuse
+HEALTH_CHECK_AFTER = 15
+
+# Seconds to wait for a free connection slot before giving up
+ACQUIRE_TIMEOUT = 30
+
+# Interval in seconds between idle eviction sweeps
+REAPER_INTERVAL = 30
+
+# Worker threads shared by all blocking RouterOS calls
+EXECUTOR_WORKERS = 32
+
+# Seconds a single blocking RouterOS call may run before it is abandoned
+CALL_TIMEOUT = 30
+
+# Errors raised by RouterOS for a failed command; the session itself is still usable
+COMMAND_ERRORS = (TrapError, MultiTrapError)
+
+# (host, port, username, password, ssl)
+PoolKey = tuple[str, int, str, str, bool]
+
+T = TypeVar("T")
+
+
+class _PooledConnection:
+    """Logged-in API session plus bookkeeping for idle eviction"""
+
+    def __init__(self, api: librouteros.Api):
+        self.api = api
+        self.last_used_at = time.monotonic()
+
+    def idle_for(self) -> float:
+        return time.monotonic() - self.last_used_at
+
+    def close(self) -> None:
+        try:
+            self.api.close()
+        except Exception as e:
+            logger.debug(f"Error closing MikroTik connection: {str(e)}")
+
+
+class _RouterPool:
+    """Idle connections and connection slots for a single router"""
+
+    def __init__(self, max_size: int):
+        self.idle: deque[_PooledConnection] = deque()
+        self.slots = asyncio.Semaphore(max_size)
+        # Callers holding or waiting for a slot
+        self.users = 0
+
+    def evict_idle(self, idle_timeout: float) -> int:
+        """Close connections idle for longer than idle_timeout, return how many"""
+        kept = deque(conn for conn in self.idle if conn.idle_for() < idle_timeout)
+        evicted = [conn for conn in self.idle if conn not in kept]
+        for conn in evicted:
+            conn.close()
+        self.idle = kept
+        return len(evicted)
+
+
+class MikroTikConnectionPool:
+    """
+    Pool of RouterOS API connections keyed by router
+
+    Each router gets at most max_per_router open sessions. Connections are
+    returned to the pool after use, health-checked when they have been idle
+    for a while and closed once they exceed idle_timeout.
+    """
+
+    def __init__(
+        self,
+        max_per_router: int = MAX_CONNECTIONS_PER_ROUTER,
+        idle_timeout: float = IDLE_TIMEOUT,
+        health_check_after: float = HEALTH_CHECK_AFTER,
+        acquire_timeout: float = ACQUIRE_TIMEOUT,
+    ):
+        self.max_per_router = max_per_router
+        self.idle_timeout = idle_timeout
+        self.health_check_after = health_check_after
+        self.acquire_timeout = acquire_timeout
+        self._pools: dict[PoolKey, _RouterPool] = {}
+        self._reaper_task: asyncio.Task | None = None
+        self._executor: ThreadPoolExecutor | None = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=EXECUTOR_WORKERS, thread_name_prefix="routeros"
+            )
+        return self._executor
+
+    async def run(
+        self, func: Callable[..., T], *args: Any, timeout: float = CALL_TIMEOUT
+    ) -> T:
+        """
+        Run a blocking librouteros call in the RouterOS thread pool
+
+        Args:
+            func: Blocking callable
+            *args: Positional arguments for func
+            timeout: Seconds to wait for the result
+
+        Raises:
+            TimeoutError: If func does not finish within timeout
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            return await asyncio.wait_for(
+                loop.run_in_executor(self._get_executor(), func, *args), timeout
+            )
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"RouterOS call did not finish within {timeout}s")
+
+    def _get_pool(self, key: PoolKey) -> _RouterPool:
+        pool = self._pools.get(key)
+        if pool is None:
+            pool = _RouterPool(self.max_per_router)
+            self._pools[key] = pool
+        return pool
+
+    @staticmethod
+    def _is_healthy(conn: _PooledConnection) -> bool:
+        """Run a cheap command to verify the session is still alive"""
+        try:
+            tuple(conn.api("/system/identity/print"))
+            return True
+        except Exception as e:
+            logger.debug(f"Pooled MikroTik connection failed health check: {str(e)}")
+            return False
+
+    async def _checkout(
+        self,
+        pool: _RouterPool,
+        connect: Callable[[], Awaitable[librouteros.Api]],
+    ) -> _PooledConnection:
+        pool.evict_idle(self.idle_timeout)
+
+        # Most recently used connection first, it is the most likely to be alive
+        while pool.idle:
+            conn = pool.idle.pop()
+            if conn.idle_for() < self.health_check_after:
+                return conn
+            try:
+                healthy = await self.run(self._is_healthy, conn)
+            except TimeoutError:
+                healthy = False
+            if healthy:
+                return conn
+            conn.close()
+
+        return _PooledConnection(await connect())
+
+    @asynccontextmanager
+    async def connection(
+        self,
+        key: PoolKey,
+        connect: Callable[[], Awaitable[librouteros.Api]],
+    ) -> AsyncIterator[librouteros.Api]:
+        """
+        Borrow a connection to a router, opening one with connect() if needed
+
+        The connection goes back to the pool when the block exits normally or
+        with a RouterOS command error; any other error closes it.
+
+        Args:
+            key: Router identity (host, port, username, password, ssl)
+            connect: Coroutine function that opens and logs in a new session
+
+        Raises:
+            TimeoutError: If no connection slot frees up within acquire_timeout
+        """
+        pool = self._get_pool(key)
+        pool.users += 1
+        try:
+            await asyncio.wait_for(pool.slots.acquire(), self.acquire_timeout)
+        except asyncio.TimeoutError:
+            pool.users -= 1
+            raise TimeoutError(
+                f"No free MikroTik connection to {key[0]}:{key[1]} "
+                f"after {self.acquire_timeout}s"
+            )
+
+        conn: _PooledConnection | None = None
+        try:
+            conn = await self._checkout(pool, connect)
+            try:
+                yield conn.api
+            except COMMAND_ERRORS:
+                raise
+            except BaseException:
+                # Socket state is unknown (a timed-out call may still be using it
+                # in a worker thread), don't hand it to the next caller
+                conn.close()
+                conn = None
+                raise
+        finally:
+            if conn is not None:
+                conn.last_used_at = time.monotonic()
+                pool.idle.append(conn)
+            pool.slots.release()
+            pool.users -= 1
+
+    def evict_idle(self) -> int:
+        """Close idle connections across all routers, return how many were closed"""
+        evicted = 0
+        for key in list(self._pools):
+            pool = self._pools[key]
+            evicted += pool.evict_idle(self.idle_timeout)
+            # Forget routers with nothing open and nothing borrowed
+            if not pool.idle and pool.users == 0:
+                del self._pools[key]
+        return evicted
+
+    async def _reap_loop(self) -> None:
+        while True:
+            await asyncio.sleep(REAPER_INTERVAL)
+            try:
+                evicted = self.evict_idle()
+                if evicted:
+                    logger.debug(f"Closed {evicted} idle MikroTik connections")
+            except Exception as e:
+                logger.error(f"Error evicting idle MikroTik connections: {str(e)}")
+
+    def start(self) -> None:
+        """Start the background idle eviction task"""
+        if self._reaper_task is None or self._reaper_task.done():
+            self._reaper_task = asyncio.create_task(self._reap_loop())
+
+    async def close(self) -> None:
+        """Stop the eviction task, close every idle connection and the thread pool"""
+        if self._reaper_task is not None:
+            self._reaper_task.cancel()
+            self._reaper_task = None
+        for pool in self._pools.values():
+            for conn in pool.idle:
+                conn.close()
+            pool.idle.clear()
+        self._pools.clear()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Singleton instance
+mikrotik_pool = MikroTikConnectionPool()
@@ -1,27 +1,24 @@
 import uuid
 from datetime import datetime, timezone
 
-from sqlalchemy import select
+from sqlalchemy import Select, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.exceptions import BadRequestError, NotFoundError
 from app.models.cliente import Cliente
 from app.models.contrato import Contrato
 from app.models.pago import EstadoPago, Pago
-from app.schemas.common import PaginatedResponse
+from app.schemas.common import CursorPaginatedResponse, PaginatedResponse
 from app.schemas.pago import PagoCreate, PagoUpdate
-from app.utils.pagination import paginate
+from app.utils.pagination import TotalMode, paginate, paginate_cursor
 
 
-async def list_pagos(
-    db: AsyncSession,
-    page: int = 1,
-    page_size: int = 20,
+def pagos_query(
     cliente_id: uuid.UUID | None = None,
     contrato_id: uuid.UUID | None = None,
     estado: EstadoPago | None = None,
     periodo: str | None = None,
-) -> PaginatedResponse:
+) -> Select:
     query = select(Pago).order_by(Pago.created_at.desc())
 
     if cliente_id:
@@ -33,7 +30,35 @@ async def list_pagos(
     if periodo:
         query = query.where(Pago.periodo_facturado == periodo)
 
-    return await paginate(db, query, page, page_size)
+    return query
+
+
+async def list_pagos(
+    db: AsyncSession,
+    page: int = 1,
+    page_size: int = 20,
+    cliente_id: uuid.UUID | None = None,
+    contrato_id: uuid.UUID | None = None,
+    estado: EstadoPago | None = None,
+    periodo: str | None = None,
+) -> PaginatedResponse:
+    query = pagos_query(cliente_id, contrato_id, estado, periodo)
+    return await paginate(db, query, page, page_size, cached_count=True)
+
+
+async def list_pagos_cursor(
+    db: AsyncSession,
+    cursor: str | None = None,
+    page_size: int = 20,
+    cliente_id: uuid.UUID | None = None,
+    contrato_id: uuid.UUID | None = None,
+    estado: EstadoPago | None = None,
+    periodo: str | None = None,
+    total: TotalMode = "none",
+) -> CursorPaginatedResponse:
+    """Same filters as list_pagos with keyset pagination, for deep pages"""
+    query = pagos_query(cliente_id, contrato_id, estado, periodo)
+    return await paginate_cursor(db, query, Pago, cursor, page_size, total)
 
 
 async def get_pago(db: AsyncSession, pago_id: uuid.UUID) -> Pago:
@@ -0,0 +1,65 @@
+"""
+Process pool for PDF rendering
+
+ReportLab is pure Python and CPU-bound: rendering in the request handler
+blocks the event loop, and a thread would still hold the GIL. Documents are
+rendered in worker processes instead; arguments and results cross the
+process boundary, so they must be picklable (plain values, not ORM
+instances).
+"""
+import asyncio
+import multiprocessing
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, TypeVar
+
+from app.config import settings
+
+# Seconds a single document may take before the request gives up on it
+RENDER_TIMEOUT = 30
+
+T = TypeVar("T")
+
+
+class PDFRenderPool:
+    """Lazily started process pool shared by the PDF endpoints"""
+
+    def __init__(self, max_workers: int = settings.PDF_RENDER_WORKERS):
+        self.max_workers = max_workers
+        self._executor: ProcessPoolExecutor | None = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: workers must not inherit the event loop, DB or Redis connections
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    async def run(self, func: Callable[..., T], *args: Any, timeout: float = RENDER_TIMEOUT) -> T:
+        """
+        Run a rendering function in a worker process
+
+        Args:
+            func: Module-level function, picklable by reference
+            *args: Picklable positional arguments for func
+            timeout: Seconds to wait for the result
+
+        Raises:
+            TimeoutError: If func does not finish within timeout
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            return await asyncio.wait_for(loop.run_in_executor(self._get_executor(), func, *args), timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"PDF rendering did not finish within {timeout}s")
+
+    async def close(self) -> None:
+        """Stop the worker processes"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Singleton instance
+pdf_pool = PDFRenderPool()
@@ -1,7 +1,9 @@
+import asyncio
 import uuid
 import logging
+import time
 
-from sqlalchemy import select
+from sqlalchemy import Select, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.exceptions import ConflictError, NotFoundError
@@ -9,13 +11,17 @@ from app.models.plan import Plan
 from app.models.contrato import Contrato, TipoConexion
 from app.models.router import Router
 from app.schemas.common import PaginatedResponse
-from app.schemas.plan import PlanCreate, PlanUpdate
-from app.services.mikrotik import MikroTikService
+from app.schemas.plan import PlanCreate, PlanUpdate, PlanUpdateResponse, PPPProfileRouterResult
+from app.services.mikrotik import MikroTikService, ip_pool_name, ppp_profile_name
 from app.services.routers import decrypt_router_password
+from app.utils.cidr import split_cidrs
 from app.utils.pagination import paginate
 
 logger = logging.getLogger(__name__)
 
+# Routers updated at the same time when a plan's speeds change
+PROFILE_SYNC_CONCURRENCY = 10
+
 
 async def list_planes(
     db: AsyncSession,
@@ -51,7 +57,11 @@ async def create_plan(db: AsyncSession, data: PlanCreate) -> Plan:
     return plan
 
 
-async def update_plan(db: AsyncSession, plan_id: uuid.UUID, data: PlanUpdate) -> Plan:
+async def update_plan(db: AsyncSession, plan_id: uuid.UUID, data: PlanUpdate) -> PlanUpdateResponse:
+    """
+    Update a plan; if its speeds change, its PPP profile is updated on every
+    router with PPPoE contracts on it and the per-router results returned
+    """
     plan = await get_plan(db, plan_id)
 
     update_data = data.model_dump(exclude_unset=True)
@@ -73,99 +83,127 @@ async def update_plan(db: AsyncSession, plan_id: uuid.UUID, data: PlanUpdate) ->
     await db.refresh(plan)
 
     # If speeds were updated, update PPP profiles in all routers with PPPoE contracts using this plan
+    routers: list[PPPProfileRouterResult] = []
     if speeds_updated:
-        await _update_ppp_profiles_for_plan(db, plan)
+        routers = await _update_ppp_profiles_for_plan(db, plan)
+
+    response = PlanUpdateResponse.model_validate(plan)
+    response.routers = routers
+    return response
+
+
+async def _update_ppp_profile_on_router(router: Router, plan: Plan) -> PPPProfileRouterResult:
+    """Create/update the plan's PPP profile (and the router's IP pool) on one router"""
+    started = time.monotonic()
+    profile_name = ppp_profile_name(plan.velocidad_bajada_mbps)
+    error = None
+
+    if not router.is_active:
+        error = "Router inactivo"
+        logger.warning(f"Router {router.nombre} inactive, skipping PPP profile update")
+    else:
+        try:
+            # Decrypt router password
+            password = decrypt_router_password(router)
+
+            # Initialize MikroTik service
+            mikrotik = MikroTikService(
+                host=router.ip,
+                username=router.usuario,
+                password=password,
+                port=router.puerto,
+                ssl=router.ssl,
+            )
+
+            # Generate pool name based on router
+            pool_name = ip_pool_name(router.nombre)
+
+            # Parse CIDR ranges and ensure pool exists
+            cidr_ranges = split_cidrs(router.cidr_disponibles)
+            if cidr_ranges:
+                pool_exists = await mikrotik.pool_exists(pool_name)
+                if not pool_exists:
+                    logger.info(f"Creating IP pool {pool_name} for router {router.nombre}")
+                    await mikrotik.create_or_update_ip_pool(pool_name, cidr_ranges)
+
+            # Update profile with pool
+            success = await mikrotik.create_or_update_ppp_profile(
+                profile_name,
+                plan.velocidad_bajada_mbps,
+                plan.velocidad_subida_mbps,
+                remote_address=pool_name if cidr_ranges else None
+            )
+
+            if success:
+                logger.info(
+                    f"✓ Updated PPP profile {profile_name} in router {router.nombre} "
+                    f"({plan.velocidad_subida_mbps}M/{plan.velocidad_bajada_mbps}M)"
+                )
+            else:
+                error = f"No se pudo actualizar el perfil PPP {profile_name}"
+                logger.error(f"Failed to update PPP profile {profile_name} in router {router.nombre}")
+
+        except Exception as e:
+            error = str(e)
+            logger.error(f"Error updating PPP profile in router {router.nombre}: {str(e)}")
+
+    return PPPProfileRouterResult(
+        router_id=router.id,
+        router_nombre=router.nombre,
+        success=error is None,
+        error=error,
+        duration_ms=int((time.monotonic() - started) * 1000),
+    )
 
-    return plan
+
+def pppoe_routers_query(plan_id: uuid.UUID) -> Select:
+    """Routers with at least one PPPoE contract on a plan (ix_contratos_plan_id_router_id_pppoe)"""
+    router_ids = (
+        select(Contrato.router_id)
+        .where(Contrato.plan_id == plan_id)
+        .where(Contrato.tipo_conexion == TipoConexion.PPPOE)
+        .where(Contrato.router_id.isnot(None))
+        .distinct()
+    )
+    return select(Router).where(Router.id.in_(router_ids)).order_by(Router.nombre)
 
 
-async def _update_ppp_profiles_for_plan(db: AsyncSession, plan: Plan) -> None:
+async def _update_ppp_profiles_for_plan(db: AsyncSession, plan: Plan) -> list[PPPProfileRouterResult]:
     """
-    Update PPP profiles in all routers that have active PPPoE contracts using this plan
-    """
-    try:
-        # Find all active PPPoE contracts using this plan
-        result = await db.execute(
-            select(Contrato)
-            .where(Contrato.plan_id == plan.id)
-            .where(Contrato.tipo_conexion == TipoConexion.PPPOE)
-            .where(Contrato.router_id.isnot(None))
-        )
-        contratos = result.scalars().all()
+    Update PPP profiles in all routers that have PPPoE contracts using this plan
 
-        if not contratos:
-            logger.info(f"No PPPoE contracts found for plan {plan.nombre}")
-            return
+    Routers are updated concurrently (at most PROFILE_SYNC_CONCURRENCY at a
+    time) and a failing router never stops the others.
 
-        # Group contracts by router to avoid updating the same profile multiple times
-        routers_to_update = {}
-        for contrato in contratos:
-            if contrato.router_id not in routers_to_update:
-                routers_to_update[contrato.router_id] = True
+    Returns:
+        One result per router
+    """
+    try:
+        result = await db.execute(pppoe_routers_query(plan.id))
+        routers = result.scalars().all()
+    except Exception as e:
+        logger.error(f"Error loading routers for plan {plan.nombre}: {str(e)}")
+        # Don't raise - plan update should succeed even if profile update fails
+        return []
 
-        logger.info(
-            f"Updating PPP profiles in {len(routers_to_update)} routers for plan {plan.nombre}"
-        )
+    if not routers:
+        logger.info(f"No PPPoE contracts found for plan {plan.nombre}")
+        return []
 
-        # Update profile in each router
-        for router_id in routers_to_update.keys():
-            result = await db.execute(select(Router).where(Router.id == router_id))
-            router = result.scalar_one_or_none()
-
-            if not router or not router.is_active:
-                logger.warning(f"Router {router_id} not found or inactive, skipping")
-                continue
-
-            try:
-                # Decrypt router password
-                password = decrypt_router_password(router)
-
-                # Initialize MikroTik service
-                mikrotik = MikroTikService(
-                    host=router.ip,
-                    username=router.usuario,
-                    password=password,
-                    port=router.puerto,
-                    ssl=router.ssl,
-                )
+    logger.info(f"Updating PPP profiles in {len(routers)} routers for plan {plan.nombre}")
 
-                # Generate profile name (convert to int to avoid decimals)
-                profile_name = f"PLAN-{int(plan.velocidad_bajada_mbps)}MB"
-
-                # Generate pool name based on router
-                pool_name = f"pool-{router.nombre.lower().replace(' ', '-')}"
-
-                # Parse CIDR ranges and ensure pool exists
-                cidr_ranges = [cidr.strip() for cidr in router.cidr_disponibles.split(",") if cidr.strip()]
-                if cidr_ranges:
-                    pool_exists = await mikrotik.pool_exists(pool_name)
-                    if not pool_exists:
-                        logger.info(f"Creating IP pool {pool_name} for router {router.nombre}")
-                        await mikrotik.create_or_update_ip_pool(pool_name, cidr_ranges)
-
-                # Update profile with pool
-                success = await mikrotik.create_or_update_ppp_profile(
-                    profile_name,
-                    plan.velocidad_bajada_mbps,
-                    plan.velocidad_subida_mbps,
-                    remote_address=pool_name if cidr_ranges else None
-                )
+    limit = asyncio.Semaphore(PROFILE_SYNC_CONCURRENCY)
 
-                if success:
-                    logger.info(
-                        f"✓ Updated PPP profile {profile_name} in router {router.nombre} "
-                        f"({plan.velocidad_subida_mbps}M/{plan.velocidad_bajada_mbps}M)"
-                    )
-                else:
-                    logger.error(f"Failed to update PPP profile {profile_name} in router {router.nombre}")
+    async def _update(router: Router) -> PPPProfileRouterResult:
+        async with limit:
+            return await _update_ppp_profile_on_router(router, plan)
 
-            except Exception as e:
-                logger.error(f"Error updating PPP profile in router {router.nombre}: {str(e)}")
-                # Don't raise - continue with other routers
+    results = await asyncio.gather(*(_update(router) for router in routers))
 
-    except Exception as e:
-        logger.error(f"Error updating PPP profiles for plan {plan.nombre}: {str(e)}")
-        # Don't raise - plan update should succeed even if profile update fails
+    failed = sum(1 for r in results if not r.success)
+    if failed:
+        logger.warning(f"PPP profile update for plan {plan.nombre} failed in {failed}/{len(results)} routers")
+    return list(results)
 
 
 async def deactivate_plan(db: AsyncSession, plan_id: uuid.UUID) -> Plan:
@@ -209,8 +247,7 @@ async def get_ppp_profiles_info(db: AsyncSession, plan_id: uuid.UUID) -> dict:
         routers_info[router.id]["contracts_count"] += 1
         total_contracts += 1
 
-    # Convert to int to avoid decimals (10.00 -> 10)
-    profile_name = f"PLAN-{int(plan.velocidad_bajada_mbps)}MB"
+    profile_name = ppp_profile_name(plan.velocidad_bajada_mbps)
 
     return {
         "plan_id": str(plan.id),
@@ -223,9 +260,21 @@ async def get_ppp_profiles_info(db: AsyncSession, plan_id: uuid.UUID) -> dict:
     }
 
 
-async def sync_ppp_profiles_for_plan(db: AsyncSession, plan_id: uuid.UUID) -> None:
+async def sync_ppp_profiles_for_plan(db: AsyncSession, plan_id: uuid.UUID) -> dict:
     """
     Manually sync PPP profiles for a plan (public wrapper for _update_ppp_profiles_for_plan)
     """
     plan = await get_plan(db, plan_id)
-    await _update_ppp_profiles_for_plan(db, plan)
+    results = await _update_ppp_profiles_for_plan(db, plan)
+
+    failed = sum(1 for r in results if not r.success)
+    if failed:
+        message = f"Perfiles PPP sincronizados con errores en {failed} de {len(results)} routers"
+    else:
+        message = "Perfiles PPP sincronizados exitosamente"
+
+    return {
+        "message": message,
+        "profile_name": ppp_profile_name(plan.velocidad_bajada_mbps),
+        "routers": results,
+    }
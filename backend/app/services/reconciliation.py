@@ -0,0 +1,430 @@
+"""
+Bulk reconciliation of MikroTik routers against the contracts in the database
+
+Pulls the ISP address-lists, PPP secrets, PPP profiles and IP pools once per
+router, diffs them against every contract assigned to that router and sends
+only the missing add/set/remove commands in pipelined batches.
+"""
+import logging
+import re
+import time
+import uuid
+from typing import Any
+
+from librouteros.protocol import cast_to_api
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.core.encryption import encryption_service
+from app.core.exceptions import BadRequestError
+from app.models.contrato import Contrato, EstadoContrato, TipoConexion
+from app.models.router import Router
+from app.schemas.reconciliation import ReconciliationCounts, ReconciliationResult
+from app.services.contratos import build_mikrotik_comment
+from app.services.mikrotik import (
+    ADDRESS_LIST_ACTIVOS,
+    ADDRESS_LIST_SUSPENDIDOS,
+    MikroTikService,
+    RouterOSCommand,
+    cidr_pool_ranges,
+    ip_pool_name,
+    ppp_profile_name,
+    ppp_rate_limit,
+)
+from app.services.routers import decrypt_router_password, get_local_address_from_cidrs, get_router
+from app.utils.cidr import split_cidrs
+
+logger = logging.getLogger(__name__)
+
+ADDRESS_LIST_PATH = "/ip/firewall/address-list"
+PPP_SECRET_PATH = "/ppp/secret"
+PPP_PROFILE_PATH = "/ppp/profile"
+IP_POOL_PATH = "/ip/pool"
+
+# PPP secrets with a comment like this were created by the billing system and
+# may be removed when no contract needs them anymore
+MANAGED_COMMENT_RE = re.compile(r"ISP Billing System|CTR-\d{8}-\d{4}")
+
+
+def _address_list_for(estado: EstadoContrato) -> str | None:
+    """Address-list an IPoE contract belongs in, None if it should be in none"""
+    if estado in (EstadoContrato.ACTIVO, EstadoContrato.PENDIENTE):
+        return ADDRESS_LIST_ACTIVOS
+    if estado == EstadoContrato.SUSPENDIDO:
+        return ADDRESS_LIST_SUSPENDIDOS
+    return None
+
+
+def api_value(value: Any) -> str:
+    """Compare values the way RouterOS stores them (librouteros parses "yes" to True, "10" to 10)"""
+    return "" if value is None else cast_to_api(value)
+
+
+def _changed_fields(actual: dict[str, Any], desired: dict[str, Any]) -> dict[str, Any]:
+    return {
+        key: value for key, value in desired.items()
+        if api_value(actual.get(key)) != api_value(value)
+    }
+
+
+def count_commands(commands: list[RouterOSCommand]) -> ReconciliationCounts:
+    return ReconciliationCounts(
+        added=sum(1 for _, action, _ in commands if action == "add"),
+        updated=sum(1 for _, action, _ in commands if action in ("set", "unset")),
+        removed=sum(1 for _, action, _ in commands if action == "remove"),
+    )
+
+
+def diff_address_lists(
+    actual: list[dict[str, Any]], desired: dict[str, dict[str, str]]
+) -> list[RouterOSCommand]:
+    """
+    Commands that turn the ISP address-list entries into the desired state
+
+    Args:
+        actual: Entries of ISP-ACTIVOS / ISP-SUSPENDIDOS on the router
+        desired: address -> {"list": ..., "comment": ...}
+    """
+    commands: list[RouterOSCommand] = []
+    kept: set[str] = set()
+
+    for entry in actual:
+        # Dynamic entries are owned by RouterOS and can't be edited
+        if entry.get("dynamic"):
+            continue
+        address = api_value(entry.get("address"))
+        target = desired.get(address)
+        if target is None or entry.get("list") != target["list"] or address in kept:
+            commands.append((ADDRESS_LIST_PATH, "remove", {".id": entry[".id"]}))
+            continue
+
+        kept.add(address)
+        changes = _changed_fields(entry, {"disabled": "no", "comment": target["comment"]})
+        if changes:
+            commands.append((ADDRESS_LIST_PATH, "set", {".id": entry[".id"], **changes}))
+
+    for address, target in desired.items():
+        if address not in kept:
+            commands.append((ADDRESS_LIST_PATH, "add", {
+                "list": target["list"],
+                "address": address,
+                "disabled": "no",
+                "comment": target["comment"],
+            }))
+
+    return commands
+
+
+def diff_ppp_secrets(
+    actual: list[dict[str, Any]],
+    desired: dict[str, dict[str, str]],
+    removable: set[str],
+    protected: set[str] = frozenset(),
+) -> list[RouterOSCommand]:
+    """
+    Commands that turn the router's PPP secrets into the desired state
+
+    Secrets that no contract needs are removed only if they belong to a
+    cancelled contract or carry a billing-system comment; anything else was
+    created by hand and is left alone. Secrets of live contracts whose
+    desired state could not be built (protected) are never removed.
+
+    Empty desired values (e.g. a remote-address cleared in the contract)
+    are unset on the router instead of being sent as empty strings.
+
+    Args:
+        actual: All PPP secrets on the router
+        desired: username -> secret attributes
+        removable: Usernames of cancelled contracts on this router
+        protected: Usernames of live contracts missing from desired
+    """
+    commands: list[RouterOSCommand] = []
+    present: set[str] = set()
+
+    for secret in actual:
+        name = api_value(secret.get("name"))
+        target = desired.get(name)
+        if target is None:
+            if name in protected:
+                continue
+            if name in removable or MANAGED_COMMENT_RE.search(api_value(secret.get("comment"))):
+                commands.append((PPP_SECRET_PATH, "remove", {".id": secret[".id"]}))
+            continue
+
+        present.add(name)
+        changes = _changed_fields(secret, target)
+        # The password is hidden from API users without the "sensitive" policy
+        if "password" not in secret:
+            changes.pop("password", None)
+        for key in [key for key, value in changes.items() if value == ""]:
+            del changes[key]
+            commands.append((PPP_SECRET_PATH, "unset", {"numbers": secret[".id"], "value-name": key}))
+        if changes:
+            commands.append((PPP_SECRET_PATH, "set", {".id": secret[".id"], **changes}))
+
+    for name, target in desired.items():
+        if name not in present:
+            values = {key: value for key, value in target.items() if value != ""}
+            commands.append((PPP_SECRET_PATH, "add", {"name": name, **values}))
+
+    return commands
+
+
+def diff_named_items(
+    path: str,
+    actual: list[dict[str, Any]],
+    desired: dict[str, dict[str, str]],
+    comment: str,
+) -> list[RouterOSCommand]:
+    """
+    Add/update commands for items identified by name (PPP profiles, IP pools)
+
+    Items are never removed: other configuration on the router may use them.
+    """
+    commands: list[RouterOSCommand] = []
+    by_name = {api_value(item.get("name")): item for item in actual}
+
+    for name, target in desired.items():
+        item = by_name.get(name)
+        if item is None:
+            commands.append((path, "add", {"name": name, **target, "comment": comment}))
+            continue
+        changes = _changed_fields(item, target)
+        if changes:
+            commands.append((path, "set", {".id": item[".id"], **changes}))
+
+    return commands
+
+
+def build_desired_state(
+    router: Router,
+    contratos: list[Contrato],
+    estado: EstadoContrato | None = None,
+) -> dict[str, Any]:
+    """
+    Configuration the router should have for the given contracts
+
+    Args:
+        router: Router the contracts are assigned to
+        contratos: Contracts with cliente and plan loaded
+        estado: Use this estado instead of each contract's own (for previews
+            of bulk state changes)
+
+    Returns:
+        Dict with address_list, ppp_secrets, ppp_profiles and ip_pools in the
+        format expected by the diff functions, removable_secrets (PPPoE users
+        of cancelled contracts), protected_secrets (PPPoE users of live
+        contracts that could not be built, never removed) and errors
+    """
+    cidr_ranges = split_cidrs(router.cidr_disponibles)
+    pool_name = ip_pool_name(router.nombre)
+    local_address = get_local_address_from_cidrs(router.cidr_disponibles)
+
+    desired_addresses: dict[str, dict[str, str]] = {}
+    desired_secrets: dict[str, dict[str, str]] = {}
+    desired_profiles: dict[str, dict[str, str]] = {}
+    removable_secrets: set[str] = set()
+    protected_secrets: set[str] = set()
+    errors: list[str] = []
+
+    for contrato in contratos:
+        contrato_estado = estado or contrato.estado
+        comment = build_mikrotik_comment(contrato.cliente, contrato.numero_contrato)
+
+        if contrato.tipo_conexion == TipoConexion.IPOE:
+            list_name = _address_list_for(contrato_estado)
+            if contrato.ip_asignada and list_name:
+                desired_addresses[contrato.ip_asignada] = {"list": list_name, "comment": comment}
+
+        elif contrato.tipo_conexion == TipoConexion.PPPOE:
+            if not contrato.pppoe_usuario:
+                continue
+            if contrato_estado == EstadoContrato.CANCELADO:
+                removable_secrets.add(contrato.pppoe_usuario)
+                continue
+            # From here on a skipped contract keeps whatever secret the
+            # router has: removing it would disconnect a live customer
+            if not contrato.pppoe_password:
+                protected_secrets.add(contrato.pppoe_usuario)
+                continue
+
+            try:
+                password = encryption_service.decrypt(contrato.pppoe_password)
+            except Exception:
+                protected_secrets.add(contrato.pppoe_usuario)
+                errors.append(
+                    f"Contrato {contrato.numero_contrato}: no se pudo descifrar la contraseña PPPoE"
+                )
+                continue
+
+            profile_name = ppp_profile_name(contrato.plan.velocidad_bajada_mbps)
+            secret = {
+                "password": password,
+                "profile": profile_name,
+                "service": "pppoe",
+                "disabled": "yes" if contrato_estado == EstadoContrato.SUSPENDIDO else "no",
+                "comment": comment,
+                # Empty means unset, the profile's pool assigns the address
+                "remote-address": contrato.pppoe_remote_address or "",
+            }
+            desired_secrets[contrato.pppoe_usuario] = secret
+
+            if profile_name not in desired_profiles:
+                profile = {
+                    "rate-limit": ppp_rate_limit(
+                        contrato.plan.velocidad_subida_mbps, contrato.plan.velocidad_bajada_mbps
+                    ),
+                }
+                if local_address:
+                    profile["local-address"] = local_address
+                if cidr_ranges:
+                    profile["remote-address"] = pool_name
+                desired_profiles[profile_name] = profile
+
+    desired_pools: dict[str, dict[str, str]] = {}
+    if desired_profiles and cidr_ranges:
+        ranges = cidr_pool_ranges(cidr_ranges)
+        if ranges:
+            desired_pools[pool_name] = {"ranges": ",".join(ranges)}
+
+    return {
+        "address_list": desired_addresses,
+        "ppp_secrets": desired_secrets,
+        "ppp_profiles": desired_profiles,
+        "ip_pools": desired_pools,
+        "removable_secrets": removable_secrets,
+        "protected_secrets": protected_secrets,
+        "errors": errors,
+    }
+
+
+async def _load_contratos(db: AsyncSession, router_id: uuid.UUID) -> list[Contrato]:
+    result = await db.execute(
+        select(Contrato)
+        .options(selectinload(Contrato.cliente), selectinload(Contrato.plan))
+        .where(Contrato.router_id == router_id)
+    )
+    return list(result.scalars().all())
+
+
+async def reconcile_router(
+    db: AsyncSession, router_id: uuid.UUID, dry_run: bool = False
+) -> ReconciliationResult:
+    """
+    Bring one router in line with every contract assigned to it
+
+    Args:
+        db: Database session (only read from)
+        router_id: Router to reconcile
+        dry_run: Compute the changes without sending them
+
+    Returns:
+        ReconciliationResult with the number of adds/updates/removals per menu
+
+    Raises:
+        NotFoundError: If the router doesn't exist
+        BadRequestError: If the router is inactive or its state can't be read
+    """
+    started = time.monotonic()
+    router = await get_router(db, router_id)
+    if not router.is_active:
+        raise BadRequestError(
+            f"El router '{router.nombre}' está inactivo. "
+            "Actívalo antes de sincronizarlo."
+        )
+
+    contratos = await _load_contratos(db, router.id)
+    errors: list[str] = []
+
+    mikrotik = MikroTikService(
+        host=router.ip,
+        username=router.usuario,
+        password=decrypt_router_password(router),
+        port=router.puerto,
+        ssl=router.ssl,
+    )
+    try:
+        state = await mikrotik.get_sync_state()
+    except Exception as e:
+        logger.exception(f"Failed to read state of router {router.nombre}: {str(e)}")
+        raise BadRequestError(
+            f"No se pudo leer el estado del router '{router.nombre}': {str(e)}"
+        )
+
+    desired = build_desired_state(router, contratos)
+    errors.extend(desired["errors"])
+
+    # ========== Diff ==========
+    # Order matters: pools before the profiles that use them, profiles before secrets
+    pool_commands = diff_named_items(
+        IP_POOL_PATH, state["ip_pools"], desired["ip_pools"],
+        "ISP Billing System - Auto-generated from CIDR",
+    )
+    profile_commands = diff_named_items(
+        PPP_PROFILE_PATH, state["ppp_profiles"], desired["ppp_profiles"],
+        "ISP Billing System - Auto-generated",
+    )
+    secret_commands = diff_ppp_secrets(
+        state["ppp_secrets"],
+        desired["ppp_secrets"],
+        desired["removable_secrets"],
+        desired["protected_secrets"],
+    )
+    address_commands = diff_address_lists(state["address_list"], desired["address_list"])
+    commands = pool_commands + profile_commands + secret_commands + address_commands
+
+    if commands and not dry_run:
+        try:
+            errors.extend(await mikrotik.apply_commands(commands))
+        except Exception as e:
+            logger.exception(f"Failed to apply reconciliation on router {router.nombre}: {str(e)}")
+            errors.append(f"Error aplicando cambios en el router: {str(e)}")
+
+    result = ReconciliationResult(
+        router_id=router.id,
+        router_nombre=router.nombre,
+        dry_run=dry_run,
+        contratos=len(contratos),
+        address_list=count_commands(address_commands),
+        ppp_secrets=count_commands(secret_commands),
+        ppp_profiles=count_commands(profile_commands),
+        ip_pools=count_commands(pool_commands),
+        errors=errors,
+        duration_ms=int((time.monotonic() - started) * 1000),
+    )
+    logger.info(
+        f"Reconciled router {router.nombre} ({len(contratos)} contracts, "
+        f"{len(commands)} commands, dry_run={dry_run}) in {result.duration_ms} ms"
+    )
+    return result
+
+
+async def reconcile_all_routers(
+    db: AsyncSession, dry_run: bool = False
+) -> list[ReconciliationResult]:
+    """Reconcile every active router; failures are reported per router"""
+    result = await db.execute(
+        select(Router).where(Router.is_active == True).order_by(Router.nombre)  # noqa: E712
+    )
+    routers = result.scalars().all()
+
+    results = []
+    for router in routers:
+        try:
+            results.append(await reconcile_router(db, router.id, dry_run))
+        except Exception as e:
+            detail = getattr(e, "detail", None) or str(e)
+            results.append(ReconciliationResult(
+                router_id=router.id,
+                router_nombre=router.nombre,
+                dry_run=dry_run,
+                contratos=0,
+                address_list=ReconciliationCounts(),
+                ppp_secrets=ReconciliationCounts(),
+                ppp_profiles=ReconciliationCounts(),
+                ip_pools=ReconciliationCounts(),
+                errors=[detail],
+                duration_ms=0,
+            ))
+    return results
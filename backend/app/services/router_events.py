@@ -1,13 +1,13 @@
 import uuid
-from datetime import datetime, timedelta
-from sqlalchemy import select, desc
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import Select, select, desc
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 
 from app.models.router_event import RouterEvent
 from app.models.router import Router
-from app.schemas.common import PaginatedResponse
-from app.utils.pagination import paginate
+from app.schemas.common import CursorPaginatedResponse, PaginatedResponse
+from app.utils.pagination import TotalMode, paginate, paginate_cursor
 
 
 async def create_router_event(
@@ -30,6 +30,33 @@ async def create_router_event(
     return event
 
 
+def router_events_query(
+    router_id: uuid.UUID | None = None,
+    event_type: str | None = None,
+    hours: int | None = None,
+) -> Select:
+    query = (
+        select(RouterEvent)
+        .options(joinedload(RouterEvent.router))
+        .order_by(desc(RouterEvent.created_at))
+    )
+
+    if router_id:
+        query = query.where(RouterEvent.router_id == router_id)
+
+    if event_type:
+        query = query.where(RouterEvent.event_type == event_type)
+
+    if hours:
+        # Truncated to the minute so the query, and its cached count, stays
+        # the same between requests
+        now = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+        cutoff_time = now - timedelta(hours=hours)
+        query = query.where(RouterEvent.created_at >= cutoff_time)
+
+    return query
+
+
 async def list_router_events(
     db: AsyncSession,
     page: int = 1,
@@ -49,23 +76,27 @@ async def list_router_events(
         event_type: Filter by event type
         hours: Only show events from last N hours
     """
-    query = (
-        select(RouterEvent)
-        .options(joinedload(RouterEvent.router))
-        .order_by(desc(RouterEvent.created_at))
-    )
+    query = router_events_query(router_id, event_type, hours)
+    return await paginate(db, query, page, page_size, cached_count=True)
 
-    if router_id:
-        query = query.where(RouterEvent.router_id == router_id)
-
-    if event_type:
-        query = query.where(RouterEvent.event_type == event_type)
 
-    if hours:
-        cutoff_time = datetime.utcnow() - timedelta(hours=hours)
-        query = query.where(RouterEvent.created_at >= cutoff_time)
+async def list_router_events_cursor(
+    db: AsyncSession,
+    cursor: str | None = None,
+    page_size: int = 50,
+    router_id: uuid.UUID | None = None,
+    event_type: str | None = None,
+    hours: int | None = None,
+    total: TotalMode = "none",
+) -> CursorPaginatedResponse:
+    """
+    List router events with keyset pagination
 
-    return await paginate(db, query, page, page_size)
+    Same filters as list_router_events; pages are addressed by the
+    next_cursor of the previous page instead of a page number.
+    """
+    query = router_events_query(router_id, event_type, hours)
+    return await paginate_cursor(db, query, RouterEvent, cursor, page_size, total)
 
 
 async def get_recent_events(db: AsyncSession, limit: int = 20) -> list[RouterEvent]:
@@ -81,7 +112,7 @@ async def get_recent_events(db: AsyncSession, limit: int = 20) -> list[RouterEve
 
 async def delete_old_events(db: AsyncSession, days: int = 30) -> int:
     """Delete events older than specified days (for cleanup)"""
-    cutoff_time = datetime.utcnow() - timedelta(days=days)
+    cutoff_time = datetime.now(timezone.utc) - timedelta(days=days)
     result = await db.execute(
         select(RouterEvent).where(RouterEvent.created_at < cutoff_time)
     )
@@ -1,47 +1,79 @@
 """
 Router uptime monitoring service.
 Checks router connectivity periodically and updates status in database.
+
+Each router has its own next-check time in a priority queue: online routers
+get a TCP check every MONITOR_INTERVAL, routers that stay offline back off
+exponentially and the API identity/version fetch only runs every
+INFO_REFRESH_INTERVAL or when a router changes state.
 """
 import asyncio
+import heapq
 import logging
+import time
 from datetime import datetime
 from typing import List, Tuple, Optional
-import socket
 import uuid
 
-from sqlalchemy import select
+from sqlalchemy import insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
+from app.core.leader import run_as_leader
 from app.database import async_session
 from app.models.router import Router
+from app.models.router_event import RouterEvent
+from app.models.search_entry import router_entry, upsert_entries
 from app.services.mikrotik import MikroTikService
 from app.core.encryption import encryption_service
-from app.services.router_events import create_router_event
 
 logger = logging.getLogger(__name__)
 
-# Monitoring interval in seconds (default: 30 seconds)
+# Check interval in seconds for online routers (default: 30 seconds)
 MONITOR_INTERVAL = 30
 
+# Offline routers are retried after OFFLINE_BACKOFF_BASE * 2^(checks offline - 1)
+# seconds, up to OFFLINE_BACKOFF_MAX
+OFFLINE_BACKOFF_BASE = 30
+OFFLINE_BACKOFF_MAX = 600
+
+# Seconds between API identity/version fetches for a router that stays online
+INFO_REFRESH_INTERVAL = 15 * 60
+
+# Seconds between reloads of the active router list (picks up new/edited routers)
+ROUTER_REFRESH_INTERVAL = 60
+
+# Routers due within this many seconds are checked together in one batch
+BATCH_WINDOW = 2
+
+# Leader election task started by start_monitoring
+_monitor_task: asyncio.Task | None = None
+
 # Ping timeout in seconds
 PING_TIMEOUT = 5
 
+# Maximum routers checked at the same time
+MAX_CONCURRENT_CHECKS = settings.ROUTER_MONITOR_MAX_CONCURRENT_CHECKS
+
 
-def check_router_connectivity(ip: str, port: int, timeout: int = PING_TIMEOUT) -> bool:
+async def check_router_connectivity(ip: str, port: int, timeout: float = PING_TIMEOUT) -> bool:
     """
     Check if router is reachable by attempting a TCP connection.
     Returns True if connection successful, False otherwise.
     """
     try:
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(timeout)
-        result = sock.connect_ex((ip, port))
-        sock.close()
-        return result == 0
-    except Exception as e:
-        logger.debug(f"Connection check failed for {ip}:{port} - {str(e)}")
+        _, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout)
+    except (OSError, asyncio.TimeoutError) as e:
+        logger.debug(f"Connection check failed for {ip}:{port} - {str(e) or e.__class__.__name__}")
         return False
 
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return True
+
 
 async def get_router_info(router_obj: Router) -> Tuple[Optional[str], Optional[str]]:
     """
@@ -80,136 +112,285 @@ async def get_router_info(router_obj: Router) -> Tuple[Optional[str], Optional[s
         return None, None
 
 
-async def check_single_router(router_id: uuid.UUID, router_ip: str, router_puerto: int, router_nombre: str) -> None:
-    """Check a single router's connectivity and update database."""
-    try:
-        # Check connectivity
-        is_online = check_router_connectivity(router_ip, router_puerto)
-        now = datetime.utcnow()
+async def probe_router(
+    router: Router, limit: asyncio.Semaphore, fetch_info: bool = True
+) -> Tuple[bool, Optional[str], Optional[str]]:
+    """
+    Check a single router's connectivity, and its identity/version when online
+    and fetch_info is set.
+    Returns tuple of (is_online, identity, version). Doesn't touch the database.
+    """
+    async with limit:
+        is_online = await check_router_connectivity(router.ip, router.puerto)
+    if not is_online or not fetch_info:
+        return is_online, None, None
+
+    identity, version = await get_router_info(router)
+    return True, identity, version
+
+
+def build_router_changes(
+    router: Router,
+    is_online: bool,
+    identity: Optional[str],
+    version: Optional[str],
+    now: datetime,
+) -> Tuple[dict, List[dict]]:
+    """
+    Compare a probe result with the router's stored state.
+    Returns the column values to update and the RouterEvent rows to insert.
+    """
+    changes: dict = {"id": router.id, "is_online": is_online, "last_check_at": now}
+    events: List[dict] = []
+
+    def _event(event_type: str, description: str, metadata: dict) -> None:
+        events.append({
+            "router_id": router.id,
+            "event_type": event_type,
+            "description": description,
+            "event_metadata": metadata,
+        })
+
+    # Track state change (online/offline)
+    if router.is_online is not None and router.is_online != is_online:
+        if is_online:
+            _event("ONLINE", f"Router {router.nombre} se conectó", {"ip": router.ip})
+            logger.info(f"Router {router.nombre} ({router.ip}) came ONLINE")
+        else:
+            _event("OFFLINE", f"Router {router.nombre} se desconectó", {"ip": router.ip})
+            logger.warning(f"Router {router.nombre} ({router.ip}) went OFFLINE")
+
+    if not is_online:
+        logger.warning(f"Router {router.nombre} ({router.ip}) is OFFLINE")
+        return changes, events
+
+    changes["last_online_at"] = now
+
+    if identity or version:
+        changes["identity"] = identity
+        changes["routeros_version"] = version
+
+        # Record if identity changed
+        if router.identity and identity and router.identity != identity:
+            _event(
+                "IDENTITY_CHANGED",
+                f"Cambio de identity: {router.identity} → {identity}",
+                {"old_value": router.identity, "new_value": identity},
+            )
+            logger.warning(f"Router {router.nombre} identity CHANGED: {router.identity} -> {identity}")
+
+        # Record if version changed
+        if router.routeros_version and version and router.routeros_version != version:
+            _event(
+                "VERSION_CHANGED",
+                f"Actualización RouterOS: {router.routeros_version} → {version}",
+                {"old_value": router.routeros_version, "new_value": version},
+            )
+            logger.warning(f"Router {router.nombre} version CHANGED: {router.routeros_version} -> {version}")
+
+    logger.info(f"Router {router.nombre} ({router.ip}) is ONLINE - Identity: {identity}, Version: {version}")
+    return changes, events
+
+
+async def save_check_results(
+    db: AsyncSession, changes: List[dict], events: List[dict], search_entries: List[dict] = ()
+) -> None:
+    """
+    Write a whole monitoring cycle: one bulk UPDATE of routers (executemany by
+    primary key) and one bulk INSERT of router events.
 
-        logger.debug(f"Checked router {router_nombre}: {'ONLINE' if is_online else 'OFFLINE'}, updating database...")
+    The bulk UPDATE bypasses the search index mapper events, so the search
+    entries of routers whose identity changed are upserted here.
+    """
+    if changes:
+        await db.execute(update(Router), changes)
+    if events:
+        await db.execute(insert(RouterEvent), events)
+    if search_entries:
+        await db.execute(upsert_entries(list(search_entries)))
 
-        # Update in database with a fresh session
+
+class MonitorSchedule:
+    """
+    Priority queue of next-check times per router
+
+    Holds detached Router snapshots loaded by refresh(). Heap entries that no
+    longer match a router's current next-check time (router removed,
+    deactivated or rescheduled) are skipped when popped.
+    """
+
+    def __init__(self):
+        self.routers: dict[uuid.UUID, Router] = {}
+        self._heap: List[Tuple[float, uuid.UUID]] = []
+        self._next_check_at: dict[uuid.UUID, float] = {}
+        self._offline_checks: dict[uuid.UUID, int] = {}
+        self._info_fetched_at: dict[uuid.UUID, float] = {}
+        self._refreshed_at: float | None = None
+
+    def _push(self, check_at: float, router_id: uuid.UUID) -> None:
+        self._next_check_at[router_id] = check_at
+        heapq.heappush(self._heap, (check_at, router_id))
+
+    def refresh_due(self, now: float) -> bool:
+        return self._refreshed_at is None or now - self._refreshed_at >= ROUTER_REFRESH_INTERVAL
+
+    async def refresh(self) -> None:
+        """Reload active routers; new ones are scheduled right away"""
         async with async_session() as db:
-            result = await db.execute(select(Router).where(Router.id == router_id))
-            router = result.scalar_one_or_none()
-
-            if router:
-                # Store previous values to detect changes
-                old_is_online = router.is_online
-                old_identity = router.identity
-                old_version = router.routeros_version
-
-                router.is_online = is_online
-                router.last_check_at = now
-
-                # Track state change (online/offline)
-                if old_is_online is not None and old_is_online != is_online:
-                    if is_online:
-                        await create_router_event(
-                            db, router_id, "ONLINE",
-                            f"Router {router_nombre} se conectó",
-                            {"ip": router_ip}
-                        )
-                        logger.info(f"Router {router_nombre} ({router_ip}) came ONLINE")
-                    else:
-                        await create_router_event(
-                            db, router_id, "OFFLINE",
-                            f"Router {router_nombre} se desconectó",
-                            {"ip": router_ip}
-                        )
-                        logger.warning(f"Router {router_nombre} ({router_ip}) went OFFLINE")
-
-                if is_online:
-                    router.last_online_at = now
-
-                    # Get router info from API (identity and version)
-                    identity, version = await get_router_info(router)
-
-                    if identity or version:
-                        router.identity = identity
-                        router.routeros_version = version
-
-                        # Log and record if identity changed
-                        if old_identity and identity and old_identity != identity:
-                            await create_router_event(
-                                db, router_id, "IDENTITY_CHANGED",
-                                f"Cambio de identity: {old_identity} → {identity}",
-                                {"old_value": old_identity, "new_value": identity}
-                            )
-                            logger.warning(f"Router {router_nombre} identity CHANGED: {old_identity} -> {identity}")
-
-                        # Log and record if version changed
-                        if old_version and version and old_version != version:
-                            await create_router_event(
-                                db, router_id, "VERSION_CHANGED",
-                                f"Actualización RouterOS: {old_version} → {version}",
-                                {"old_value": old_version, "new_value": version}
-                            )
-                            logger.warning(f"Router {router_nombre} version CHANGED: {old_version} -> {version}")
-
-                    logger.info(f"Router {router_nombre} ({router_ip}) is ONLINE - Identity: {identity}, Version: {version}")
-                else:
-                    logger.warning(f"Router {router_nombre} ({router_ip}) is OFFLINE")
-
-                await db.commit()
-                logger.debug(f"Router {router_nombre} status committed to database")
-            else:
-                logger.error(f"Router {router_id} not found in database")
+            result = await db.execute(select(Router).where(Router.is_active == True))
+            routers = {router.id: router for router in result.scalars().all()}
+
+        now = time.monotonic()
+        for router_id in routers.keys() - self.routers.keys():
+            self._push(now, router_id)
+        for router_id in self.routers.keys() - routers.keys():
+            self._next_check_at.pop(router_id, None)
+            self._offline_checks.pop(router_id, None)
+            self._info_fetched_at.pop(router_id, None)
+        self.routers = routers
+        self._refreshed_at = now
+
+    def next_due_in(self, now: float) -> float:
+        """Seconds until the next router check (or router list refresh) is due"""
+        refreshed_at = now if self._refreshed_at is None else self._refreshed_at
+        refresh_in = ROUTER_REFRESH_INTERVAL - (now - refreshed_at)
+        if not self._heap:
+            return max(refresh_in, 0)
+        return max(min(self._heap[0][0] - now, refresh_in), 0)
+
+    def pop_due(self, now: float) -> List[Router]:
+        """Routers whose check is due (or due within BATCH_WINDOW)"""
+        due = []
+        while self._heap and self._heap[0][0] <= now + BATCH_WINDOW:
+            check_at, router_id = heapq.heappop(self._heap)
+            if self._next_check_at.get(router_id) != check_at:
+                continue
+            del self._next_check_at[router_id]
+            due.append(self.routers[router_id])
+        return due
+
+    def needs_info(self, router: Router, now: float) -> bool:
+        """Fetch identity/version on first check, after a state change or when stale"""
+        fetched_at = self._info_fetched_at.get(router.id)
+        return (
+            fetched_at is None
+            or router.is_online is not True
+            or now - fetched_at >= INFO_REFRESH_INTERVAL
+        )
 
-    except Exception as e:
-        logger.error(f"Error checking router {router_nombre}: {str(e)}", exc_info=True)
+    def record(self, router: Router, changes: dict, info_fetched: bool, scheduled_at: float) -> None:
+        """Update the in-memory snapshot with a check result and schedule the next check"""
+        for key, value in changes.items():
+            if key != "id":
+                setattr(router, key, value)
+
+        if changes["is_online"]:
+            self._offline_checks.pop(router.id, None)
+            if info_fetched:
+                self._info_fetched_at[router.id] = scheduled_at
+            delay = MONITOR_INTERVAL
+        else:
+            offline_checks = self._offline_checks.get(router.id, 0) + 1
+            self._offline_checks[router.id] = offline_checks
+            self._info_fetched_at.pop(router.id, None)
+            delay = min(OFFLINE_BACKOFF_BASE * 2 ** (offline_checks - 1), OFFLINE_BACKOFF_MAX)
+
+        # Relative to the scheduled time so routers checked together stay batched
+        self._push(scheduled_at + delay, router.id)
+
+    def reschedule(self, router: Router, scheduled_at: float) -> None:
+        """Retry a router whose check failed unexpectedly in one interval"""
+        self._push(scheduled_at + MONITOR_INTERVAL, router.id)
+
+
+async def check_routers(schedule: MonitorSchedule, routers: List[Router], scheduled_at: float) -> None:
+    """Probe the given routers concurrently and store all results in one transaction."""
+    limit = asyncio.Semaphore(MAX_CONCURRENT_CHECKS)
+    fetch_info = [schedule.needs_info(router, scheduled_at) for router in routers]
+    results = await asyncio.gather(
+        *(probe_router(router, limit, info) for router, info in zip(routers, fetch_info)),
+        return_exceptions=True,
+    )
+
+    now = datetime.utcnow()
+    changes: List[dict] = []
+    events: List[dict] = []
+    search_entries: List[dict] = []
+    checked: List[Tuple[Router, dict, bool]] = []
+    for router, info, result in zip(routers, fetch_info, results):
+        if isinstance(result, BaseException):
+            logger.error(f"Error checking router {router.nombre}: {result}", exc_info=result)
+            schedule.reschedule(router, scheduled_at)
+            continue
+        is_online, identity, version = result
+        router_changes, router_events = build_router_changes(router, is_online, identity, version, now)
+        changes.append(router_changes)
+        events.extend(router_events)
+        if "identity" in router_changes and router_changes["identity"] != router.identity:
+            search_entries.append(router_entry(router, identity=router_changes["identity"]))
+        checked.append((router, router_changes, info and bool(identity or version)))
+
+    try:
+        async with async_session() as db:
+            await save_check_results(db, changes, events, search_entries)
+            await db.commit()
+    finally:
+        # Schedule next checks even if the write failed so the loop keeps going
+        for router, router_changes, info_fetched in checked:
+            schedule.record(router, router_changes, info_fetched, scheduled_at)
+    logger.debug(f"Saved {len(changes)} router checks and {len(events)} events")
 
 
 async def monitor_routers() -> None:
     """
-    Main monitoring loop that checks all active routers periodically.
+    Main monitoring loop: checks each active router when its next check is due.
     """
-    logger.info(f"Starting router monitoring service (interval: {MONITOR_INTERVAL}s)")
+    logger.info(
+        f"Starting router monitoring service (interval: {MONITOR_INTERVAL}s, "
+        f"offline backoff up to {OFFLINE_BACKOFF_MAX}s)"
+    )
+    schedule = MonitorSchedule()
 
     while True:
         try:
-            async with async_session() as db:
-                # Get all active routers
-                result = await db.execute(
-                    select(Router).where(Router.is_active == True)
-                )
-                routers = result.scalars().all()
-
-                if not routers:
+            now = time.monotonic()
+            if schedule.refresh_due(now):
+                await schedule.refresh()
+                if not schedule.routers:
                     logger.debug("No active routers to monitor")
-                else:
-                    logger.info(f"Checking {len(routers)} routers...")
-
-                    # Check all routers in parallel
-                    tasks = []
-                    for router in routers:
-                        # Pass router info, not the object itself, to avoid session issues
-                        tasks.append(check_single_router(
-                            router.id,  # Already a UUID, don't convert to string
-                            router.ip,
-                            router.puerto,
-                            router.nombre
-                        ))
-
-                    # Wait for all checks to complete
-                    if tasks:
-                        results = await asyncio.gather(*tasks, return_exceptions=True)
-                        # Log any exceptions that occurred
-                        for i, result in enumerate(results):
-                            if isinstance(result, Exception):
-                                logger.error(f"Task {i} failed with exception: {result}", exc_info=result)
-
-                    logger.info(f"Completed checking {len(routers)} routers")
+
+            due = schedule.pop_due(now)
+            if due:
+                logger.info(f"Checking {len(due)} of {len(schedule.routers)} routers...")
+                await check_routers(schedule, due, now)
 
         except Exception as e:
             logger.error(f"Error in monitoring loop: {str(e)}", exc_info=True)
 
-        # Wait before next check
-        await asyncio.sleep(MONITOR_INTERVAL)
+        # Wait until the next router is due
+        await asyncio.sleep(max(schedule.next_due_in(time.monotonic()), 0.5))
 
 
 async def start_monitoring() -> None:
-    """Start the monitoring service in the background."""
-    asyncio.create_task(monitor_routers())
-    logger.info("Router monitoring task started")
+    """
+    Start the monitoring service in the background.
+
+    Every worker process calls this, but only the one holding the Redis
+    leader lease actually runs monitor_routers.
+    """
+    global _monitor_task
+    if _monitor_task is None or _monitor_task.done():
+        _monitor_task = asyncio.create_task(run_as_leader("router-monitor", monitor_routers))
+    logger.info("Router monitoring task started (waiting for leadership)")
+
+
+async def stop_monitoring() -> None:
+    """Stop monitoring and release the leader lease so another worker takes over."""
+    global _monitor_task
+    if _monitor_task is not None:
+        _monitor_task.cancel()
+        try:
+            await _monitor_task
+        except asyncio.CancelledError:
+            pass
+        _monitor_task = None
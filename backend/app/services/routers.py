@@ -1,19 +1,27 @@
 import uuid
 import ipaddress
+from datetime import datetime, timedelta, timezone
 from typing import Set
 
-from sqlalchemy import or_, select
+from sqlalchemy import delete, func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.encryption import encryption_service
 from app.core.exceptions import ConflictError, NotFoundError, BadRequestError
 from app.models.router import Router
 from app.models.contrato import Contrato
+from app.models.ip_reservation import IPReservation
 from app.schemas.common import PaginatedResponse
 from app.schemas.router import RouterCreate, RouterUpdate
+from app.utils.cidr import local_address
 from app.utils.pagination import paginate
 from app.services.router_monitor import check_router_connectivity
 from app.services.router_events import create_router_event
+from app.services.ip_allocator import ip_allocator
+from app.services.ip_pool_usage import mark_pool_usage_stale
+
+# Seconds an IP stays reserved while the contract form is filled in
+IP_RESERVATION_TTL = 300
 
 
 async def list_routers(
@@ -103,6 +111,7 @@ async def create_router(db: AsyncSession, data: RouterCreate) -> Router:
     db.add(router)
     await db.flush()
     await db.refresh(router)
+    mark_pool_usage_stale(db)
 
     # Register creation event
     await create_router_event(
@@ -135,6 +144,9 @@ async def update_router(
         # If password is empty string, don't update it
         del update_data["password"]
 
+    if "cidr_disponibles" in update_data or "nombre" in update_data or "is_active" in update_data:
+        mark_pool_usage_stale(db)
+
     for key, value in update_data.items():
         setattr(router, key, value)
 
@@ -156,12 +168,14 @@ async def delete_router(db: AsyncSession, router_id: uuid.UUID) -> None:
 
     await db.delete(router)
     await db.flush()
+    mark_pool_usage_stale(db)
 
 
 async def deactivate_router(db: AsyncSession, router_id: uuid.UUID) -> Router:
     """Deactivate router (soft delete)"""
     router = await get_router(db, router_id)
     router.is_active = False
+    mark_pool_usage_stale(db)
     await db.flush()
     await db.refresh(router)
     return router
@@ -171,6 +185,7 @@ async def activate_router(db: AsyncSession, router_id: uuid.UUID) -> Router:
     """Reactivate router"""
     router = await get_router(db, router_id)
     router.is_active = True
+    mark_pool_usage_stale(db)
     await db.flush()
     await db.refresh(router)
     return router
@@ -196,7 +211,7 @@ async def get_next_available_ip(db: AsyncSession, router_id: uuid.UUID) -> str:
     """
     Get next available IP address from router's CIDR ranges
 
-    Returns the first available IP in ascending order from the configured CIDR ranges.
+    Returns the lowest available IP of the configured CIDR ranges.
     Skips network address, broadcast address, and already assigned IPs.
     """
     router = await get_router(db, router_id)
@@ -204,39 +219,143 @@ async def get_next_available_ip(db: AsyncSession, router_id: uuid.UUID) -> str:
     if not router.cidr_disponibles:
         raise BadRequestError("El router no tiene rangos CIDR configurados")
 
-    # Parse CIDR ranges
-    cidr_ranges = [cidr.strip() for cidr in router.cidr_disponibles.split(",")]
+    ip_address = await ip_allocator.next_available(
+        db, router, exclude=await get_reserved_ips_for_router(db, router_id)
+    )
+    if ip_address is None:
+        raise BadRequestError("No hay direcciones IP disponibles en los rangos CIDR configurados")
+    return ip_address
 
-    # Get already used IPs
-    used_ips = await get_used_ips_for_router(db, router_id)
 
-    # Find first available IP across all CIDR ranges
-    for cidr_str in cidr_ranges:
-        try:
-            network = ipaddress.ip_network(cidr_str, strict=False)
+async def get_reserved_ips_for_router(db: AsyncSession, router_id: uuid.UUID) -> Set[str]:
+    """IPs of a router under an unexpired reservation"""
+    result = await db.execute(
+        select(IPReservation.ip)
+        .where(IPReservation.router_id == router_id)
+        .where(IPReservation.expires_at > func.now())
+    )
+    return set(result.scalars().all())
 
-            # Iterate through all hosts in the network
-            for ip in network.hosts():
-                ip_str = str(ip)
-                if ip_str not in used_ips:
-                    return ip_str
 
-        except ValueError as e:
-            # Skip invalid CIDR notation
-            continue
+async def _lock_router_ips(db: AsyncSession, router_id: uuid.UUID) -> None:
+    """
+    Serialize IP reservations of a router until the transaction ends
 
-    raise BadRequestError("No hay direcciones IP disponibles en los rangos CIDR configurados")
+    Transaction-level advisory lock keyed by the router id, so reservations
+    on different routers don't wait for each other.
+    """
+    key = int.from_bytes(router_id.bytes[:8], "big", signed=True)
+    await db.execute(select(func.pg_advisory_xact_lock(key)))
+
+
+async def reserve_ip(
+    db: AsyncSession,
+    router_id: uuid.UUID,
+    usuario_id: uuid.UUID | None = None,
+    ttl: int = IP_RESERVATION_TTL,
+) -> IPReservation:
+    """
+    Reserve the next available IP of a router for a short time
+
+    Concurrent callers get different IPs: reservations of a router are
+    serialized with an advisory lock, and reserved IPs are skipped until the
+    lease expires or a contract takes the IP. The unique (router_id, ip)
+    indexes on ip_reservations and contratos are the final guarantee.
+    """
+    router = await get_router(db, router_id)
+    if not router.cidr_disponibles:
+        raise BadRequestError("El router no tiene rangos CIDR configurados")
+
+    await _lock_router_ips(db, router_id)
+    await db.execute(
+        delete(IPReservation)
+        .where(IPReservation.router_id == router_id)
+        .where(IPReservation.expires_at <= func.now())
+    )
+
+    ip_address = await ip_allocator.next_available(
+        db, router, exclude=await get_reserved_ips_for_router(db, router_id)
+    )
+    if ip_address is None:
+        raise BadRequestError("No hay direcciones IP disponibles en los rangos CIDR configurados")
+
+    reservation = IPReservation(
+        router_id=router_id,
+        ip=ip_address,
+        expires_at=datetime.now(timezone.utc) + timedelta(seconds=ttl),
+        reservado_por=usuario_id,
+    )
+    db.add(reservation)
+    await db.flush()
+    await db.refresh(reservation)
+    return reservation
+
+
+async def release_ip_reservation(
+    db: AsyncSession, router_id: uuid.UUID, reservation_id: uuid.UUID, usuario_id: uuid.UUID | None = None
+) -> None:
+    """Release one of the caller's reservations before it expires"""
+    result = await db.execute(
+        delete(IPReservation)
+        .where(IPReservation.id == reservation_id)
+        .where(IPReservation.router_id == router_id)
+        .where(IPReservation.reservado_por.is_not_distinct_from(usuario_id))
+    )
+    if result.rowcount == 0:
+        raise NotFoundError("Reserva de IP no encontrada")
+
+
+async def get_foreign_reservation(
+    db: AsyncSession,
+    router_id: uuid.UUID,
+    ip_address: str,
+    usuario_id: uuid.UUID | None = None,
+    lock: bool = False,
+) -> IPReservation | None:
+    """
+    Unexpired reservation of an IP held by another user, None if there is none
+
+    With lock the router's reservation lock is taken first, so no
+    reservation can be made between this check and the end of the
+    caller's transaction (for writes that take the IP).
+    """
+    if lock:
+        await _lock_router_ips(db, router_id)
+    result = await db.execute(
+        select(IPReservation)
+        .where(IPReservation.router_id == router_id)
+        .where(IPReservation.ip == ip_address)
+        .where(IPReservation.expires_at > func.now())
+        .where(IPReservation.reservado_por.is_distinct_from(usuario_id))
+    )
+    return result.scalar_one_or_none()
+
+
+async def consume_ip_reservation(
+    db: AsyncSession, router_id: uuid.UUID, ip_address: str, usuario_id: uuid.UUID | None = None
+) -> None:
+    """Drop the caller's reservation of an IP once a contract takes it"""
+    await db.execute(
+        delete(IPReservation)
+        .where(IPReservation.router_id == router_id)
+        .where(IPReservation.ip == ip_address)
+        .where(IPReservation.reservado_por.is_not_distinct_from(usuario_id))
+    )
 
 
 async def check_ip_available(
     db: AsyncSession,
     router_id: uuid.UUID,
     ip_address: str,
-    exclude_contrato_id: uuid.UUID | None = None
+    exclude_contrato_id: uuid.UUID | None = None,
+    usuario_id: uuid.UUID | None = None,
 ) -> dict:
     """
     Check if an IP address is available for assignment
 
+    IPs under another user's unexpired reservation are not available; the
+    caller's own reservation doesn't count.
+
     Returns:
         dict with keys:
             - available: bool
@@ -273,23 +392,19 @@ async def check_ip_available(
             "contrato_numero": existing_contrato.numero_contrato
         }
 
+    reservation = await get_foreign_reservation(db, router_id, ip_address, usuario_id)
+    if reservation:
+        return {
+            "available": False,
+            "message": f"IP reservada por otro usuario hasta las {reservation.expires_at:%H:%M:%S} UTC",
+            "contrato_numero": None
+        }
+
     # Check if IP is within configured CIDR ranges
     router = await get_router(db, router_id)
     if router.cidr_disponibles:
-        cidr_ranges = [cidr.strip() for cidr in router.cidr_disponibles.split(",")]
-        ip_obj = ipaddress.ip_address(ip_address)
-
-        in_range = False
-        for cidr_str in cidr_ranges:
-            try:
-                network = ipaddress.ip_network(cidr_str, strict=False)
-                if ip_obj in network:
-                    in_range = True
-                    break
-            except ValueError:
-                continue
-
-        if not in_range:
+        pool = await ip_allocator.get_pool(db, router)
+        if not pool.in_ranges(ip_address):
             return {
                 "available": True,
                 "message": "⚠️ IP fuera de los rangos CIDR configurados",
@@ -317,34 +432,6 @@ def get_local_address_from_cidrs(cidr_disponibles: str) -> str | None:
         "192.168.1.0/24,10.0.0.0/24" -> "10.0.0.1"
         "172.16.0.0/16" -> "172.16.0.1"
     """
-    if not cidr_disponibles or not cidr_disponibles.strip():
-        return None
-
-    cidr_ranges = [cidr.strip() for cidr in cidr_disponibles.split(",") if cidr.strip()]
-
-    if not cidr_ranges:
+    if not cidr_disponibles:
         return None
-
-    # Parse all CIDRs and get their first IPs
-    networks = []
-    for cidr in cidr_ranges:
-        try:
-            network = ipaddress.ip_network(cidr, strict=False)
-            networks.append(network)
-        except ValueError:
-            continue
-
-    if not networks:
-        return None
-
-    # Sort by first IP address (numerically)
-    networks.sort(key=lambda net: int(net.network_address))
-
-    # Get first usable IP from the smallest CIDR
-    smallest_network = networks[0]
-    usable_ips = list(smallest_network.hosts())
-
-    if usable_ips:
-        return str(usable_ips[0])
-
-    return None
+    return local_address(cidr_disponibles)
@@ -0,0 +1,73 @@
+"""
+Global search across clients, contracts and routers
+
+Reads only the denormalized search_entries index (see SearchEntry), so a
+lookup by IP, PPPoE user, contract number, cédula or name is one indexed
+query whatever the entity.
+"""
+import time
+
+from sqlalchemy import case, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.search_entry import SearchEntry, TipoEntrada
+from app.schemas.search import SearchHit, SearchResponse
+from app.utils.text import normalize_search
+
+# Hits returned when no limit is given
+SEARCH_LIMIT = 20
+
+
+async def global_search(
+    db: AsyncSession,
+    term: str,
+    limit: int = SEARCH_LIMIT,
+    tipos: list[TipoEntrada] | None = None,
+) -> SearchResponse:
+    """
+    Typed hits for a search term, best first
+
+    Exact identifiers (IP, PPPoE user, contract number, cédula, email) come
+    first, then substring and similar-word matches ranked by word
+    similarity. Accents and case are ignored.
+    """
+    started = time.perf_counter()
+    exact = term.strip().lower()
+    normalized = normalize_search(term)
+    if not normalized:
+        return SearchResponse(query=term, hits=[], duration_ms=0)
+
+    is_exact = SearchEntry.claves.contains([exact])
+    score = func.word_similarity(normalized, SearchEntry.search_text)
+    query = (
+        select(SearchEntry, is_exact.label("exacto"), score.label("score"))
+        .where(
+            or_(
+                is_exact,
+                SearchEntry.search_text.contains(normalized, autoescape=True),
+                SearchEntry.search_text.op("%>")(normalized),
+            )
+        )
+        .order_by(case((is_exact, 0), else_=1), score.desc(), SearchEntry.titulo)
+        .limit(limit)
+    )
+    if tipos:
+        query = query.where(SearchEntry.tipo.in_([tipo.value for tipo in tipos]))
+
+    result = await db.execute(query)
+    hits = [
+        SearchHit(
+            tipo=entry.tipo,
+            id=entry.entidad_id,
+            titulo=entry.titulo,
+            subtitulo=entry.subtitulo,
+            exacto=bool(exacto),
+            score=1.0 if exacto else float(row_score),
+        )
+        for entry, exacto, row_score in result.all()
+    ]
+    return SearchResponse(
+        query=term,
+        hits=hits,
+        duration_ms=round((time.perf_counter() - started) * 1000, 2),
+    )
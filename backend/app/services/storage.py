@@ -0,0 +1,221 @@
+"""
+Document storage backends
+
+Documents are stored by key, a relative path such as
+"documentos/ab/ab12....pdf". The local backend keeps them under
+STORAGE_LOCAL_ROOT and the API streams them; the S3 backend (AWS or any
+S3-compatible server like MinIO) hands out presigned URLs so downloads go
+straight to the object store instead of through the API workers.
+
+boto3 is blocking, every S3 call runs in a thread.
+"""
+import asyncio
+import logging
+import os
+import shutil
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from app.config import settings
+from app.utils.files import write_bytes
+
+logger = logging.getLogger(__name__)
+
+
+class StorageBackend:
+    """Interface of the document stores"""
+
+    # Whether url() returns direct download URLs the API can redirect to
+    direct_urls = False
+
+    async def start(self) -> None:
+        """Prepare the store (directory, bucket) on startup"""
+
+    async def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    async def put_file(self, key: str, path: str, content_type: str) -> None:
+        """Store a local file under key, the file is moved or copied"""
+        raise NotImplementedError
+
+    async def put_bytes(self, key: str, data: bytes, content_type: str) -> None:
+        raise NotImplementedError
+
+    async def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def local_path(self, key: str) -> str | None:
+        """Path of the document on this machine, None for remote stores"""
+        return None
+
+    @contextmanager
+    def local_copy(self, key: str) -> Iterator[str]:
+        """
+        Path of a readable file with the document, for the PDF workers
+
+        Blocking (worker processes have no event loop). Remote stores
+        download it to a temporary file, removed on exit.
+        """
+        raise NotImplementedError
+        yield
+
+    async def url(self, key: str, filename: str, content_type: str, expires: int) -> str | None:
+        """Direct download URL valid for expires seconds, None if not supported"""
+        return None
+
+
+class LocalStorage(StorageBackend):
+    def __init__(self, root: str):
+        self.root = root
+
+    def local_path(self, key: str) -> str:
+        path = os.path.normpath(os.path.join(self.root, key))
+        if not path.startswith(os.path.normpath(self.root) + os.sep):
+            raise ValueError(f"Storage key outside of the storage root: {key}")
+        return path
+
+    @contextmanager
+    def local_copy(self, key: str) -> Iterator[str]:
+        yield self.local_path(key)
+
+    async def start(self) -> None:
+        os.makedirs(self.root, exist_ok=True)
+
+    async def exists(self, key: str) -> bool:
+        return os.path.exists(self.local_path(key))
+
+    async def put_file(self, key: str, path: str, content_type: str) -> None:
+        target = self.local_path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # A rename on the same filesystem, a copy otherwise
+        await asyncio.to_thread(shutil.move, path, target)
+
+    async def put_bytes(self, key: str, data: bytes, content_type: str) -> None:
+        await write_bytes(self.local_path(key), data)
+
+    async def delete(self, key: str) -> None:
+        path = self.local_path(key)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+class S3Storage(StorageBackend):
+    direct_urls = True
+
+    def __init__(
+        self,
+        bucket: str,
+        endpoint_url: str | None = None,
+        public_endpoint_url: str | None = None,
+        access_key: str = "",
+        secret_key: str = "",
+        region: str = "us-east-1",
+    ):
+        self.bucket = bucket
+        self.endpoint_url = endpoint_url
+        # Browsers may reach the store on another address than the API does
+        # (e.g. MinIO as http://minio:9000 inside docker compose)
+        self.public_endpoint_url = public_endpoint_url or endpoint_url
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self._clients: dict[str | None, object] = {}
+
+    def _client(self, endpoint_url: str | None = None):
+        endpoint_url = endpoint_url or self.endpoint_url
+        client = self._clients.get(endpoint_url)
+        if client is None:
+            # Only needed with STORAGE_BACKEND=s3
+            import boto3
+            from botocore.config import Config
+
+            client = boto3.client(
+                "s3",
+                endpoint_url=endpoint_url,
+                aws_access_key_id=self.access_key or None,
+                aws_secret_access_key=self.secret_key or None,
+                region_name=self.region,
+                # Path-style addressing works with MinIO and other S3-compatible servers
+                config=Config(signature_version="s3v4", s3={"addressing_style": "path"}),
+            )
+            self._clients[endpoint_url] = client
+        return client
+
+    async def start(self) -> None:
+        from botocore.exceptions import ClientError
+
+        client = self._client()
+        try:
+            await asyncio.to_thread(client.head_bucket, Bucket=self.bucket)
+        except ClientError:
+            logger.warning(f"Bucket {self.bucket} not found, creating it")
+            await asyncio.to_thread(client.create_bucket, Bucket=self.bucket)
+
+    async def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            await asyncio.to_thread(self._client().head_object, Bucket=self.bucket, Key=key)
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    async def put_file(self, key: str, path: str, content_type: str) -> None:
+        # upload_file streams from disk, in multipart uploads for large files
+        await asyncio.to_thread(
+            self._client().upload_file, path, self.bucket, key, ExtraArgs={"ContentType": content_type}
+        )
+        os.remove(path)
+
+    async def put_bytes(self, key: str, data: bytes, content_type: str) -> None:
+        await asyncio.to_thread(
+            self._client().put_object, Bucket=self.bucket, Key=key, Body=data, ContentType=content_type
+        )
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(self._client().delete_object, Bucket=self.bucket, Key=key)
+
+    @contextmanager
+    def local_copy(self, key: str) -> Iterator[str]:
+        path = os.path.join(settings.UPLOAD_TMP_DIR, f"{uuid.uuid4().hex}.download")
+        try:
+            # download_file streams to disk, in ranged parts for large objects
+            self._client().download_file(self.bucket, key, path)
+            yield path
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+    async def url(self, key: str, filename: str, content_type: str, expires: int) -> str:
+        # Presigning is local computation, no request to the store
+        return self._client(self.public_endpoint_url).generate_presigned_url(
+            "get_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": key,
+                "ResponseContentType": content_type,
+                "ResponseContentDisposition": f'attachment; filename="{filename}"',
+            },
+            ExpiresIn=expires,
+        )
+
+
+def create_storage() -> StorageBackend:
+    """Storage backend selected by STORAGE_BACKEND"""
+    if settings.STORAGE_BACKEND == "s3":
+        return S3Storage(
+            bucket=settings.S3_BUCKET,
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            public_endpoint_url=settings.S3_PUBLIC_ENDPOINT_URL,
+            access_key=settings.S3_ACCESS_KEY,
+            secret_key=settings.S3_SECRET_KEY,
+            region=settings.S3_REGION,
+        )
+    return LocalStorage(settings.STORAGE_LOCAL_ROOT)
+
+
+# Singleton instance
+storage = create_storage()
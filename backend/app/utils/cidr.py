@@ -0,0 +1,121 @@
+"""
+CIDR helpers for router address ranges
+
+Everything works on integer bounds, so a /10 carrier-grade NAT range costs
+the same as a /30 (network.hosts() would build millions of address objects).
+Results are cached per cidr_disponibles string; treat them as read-only.
+"""
+import ipaddress
+import logging
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+# Distinct cidr_disponibles strings kept in each cache
+CACHE_SIZE = 1024
+
+Network = ipaddress.IPv4Network | ipaddress.IPv6Network
+
+
+def split_cidrs(cidr_disponibles: str | None) -> list[str]:
+    """Comma-separated CIDRs as a list of stripped, non-empty strings"""
+    if not cidr_disponibles:
+        return []
+    return [cidr.strip() for cidr in cidr_disponibles.split(",") if cidr.strip()]
+
+
+def int_to_ip(version: int, value: int) -> str:
+    address_class = ipaddress.IPv4Address if version == 4 else ipaddress.IPv6Address
+    return str(address_class(value))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_cidrs(cidr_disponibles: str) -> tuple[Network, ...]:
+    """Valid networks of a cidr_disponibles string, in their original order"""
+    networks = []
+    for cidr in split_cidrs(cidr_disponibles):
+        try:
+            networks.append(ipaddress.ip_network(cidr, strict=False))
+        except ValueError as e:
+            logger.error(f"Invalid CIDR {cidr}: {str(e)}")
+    return tuple(networks)
+
+
+def host_bounds(network: Network) -> tuple[int, int]:
+    """
+    First and last usable host of a network as integers
+
+    Same addresses as network.hosts(): IPv4 skips the network and broadcast
+    addresses, IPv6 skips the Subnet-Router anycast (network) address, and
+    point-to-point (/31, /127) and single-host networks use every address.
+    """
+    first, last = int(network.network_address), int(network.broadcast_address)
+    if network.num_addresses > 2:
+        first += 1
+        if network.version == 4:
+            last -= 1
+    return first, last
+
+
+def first_host(network: Network) -> str:
+    return int_to_ip(network.version, host_bounds(network)[0])
+
+
+def last_host(network: Network) -> str:
+    return int_to_ip(network.version, host_bounds(network)[1])
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def host_ranges(cidr_disponibles: str) -> dict[int, tuple[tuple[int, int], ...]]:
+    """Usable host bounds per IP version, sorted and with overlaps merged"""
+    bounds: dict[int, list[tuple[int, int]]] = {}
+    for network in parse_cidrs(cidr_disponibles):
+        bounds.setdefault(network.version, []).append(host_bounds(network))
+
+    merged: dict[int, tuple[tuple[int, int], ...]] = {}
+    for version, ranges in bounds.items():
+        ranges.sort()
+        result = [ranges[0]]
+        for start, end in ranges[1:]:
+            if start <= result[-1][1] + 1:
+                result[-1] = (result[-1][0], max(result[-1][1], end))
+            else:
+                result.append((start, end))
+        merged[version] = tuple(result)
+    return merged
+
+
+def total_hosts(cidr_disponibles: str) -> int:
+    """Number of distinct usable host addresses"""
+    return sum(
+        end - start + 1
+        for ranges in host_ranges(cidr_disponibles).values()
+        for start, end in ranges
+    )
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def pool_ranges(cidr_disponibles: str) -> tuple[str, ...]:
+    """
+    MikroTik IP pool ranges, one per valid CIDR
+
+    Example: "192.168.1.0/24" -> ("192.168.1.1-192.168.1.254",)
+    """
+    return tuple(
+        f"{first_host(network)}-{last_host(network)}" for network in parse_cidrs(cidr_disponibles)
+    )
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def local_address(cidr_disponibles: str) -> str | None:
+    """
+    First usable host of the CIDR with the lowest network address
+
+    Used as the PPPoE gateway (local-address of the PPP profiles).
+
+    Example: "192.168.1.0/24,10.0.0.0/24" -> "10.0.0.1"
+    """
+    networks = parse_cidrs(cidr_disponibles)
+    if not networks:
+        return None
+    return first_host(min(networks, key=lambda network: int(network.network_address)))
@@ -0,0 +1,43 @@
+"""
+EXPLAIN for SQLAlchemy statements
+
+Wraps a select so it runs through the session with its bound parameters,
+which a textual "EXPLAIN " + str(query) can't do.
+"""
+import json
+from typing import Any
+
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+
+class Explain(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, statement: Select, analyze: bool = False):
+        self.statement = statement
+        self.analyze = analyze
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element: Explain, compiler, **kw) -> str:
+    options = "ANALYZE, FORMAT JSON" if element.analyze else "FORMAT JSON"
+    return f"EXPLAIN ({options}) " + compiler.process(element.statement, **kw)
+
+
+async def explain(db: AsyncSession, statement: Select, analyze: bool = False) -> dict[str, Any]:
+    """Top node of the query plan ("Plan" of EXPLAIN FORMAT JSON)"""
+    result = await db.execute(Explain(statement, analyze))
+    plan = result.scalar()
+    # asyncpg hands json back undecoded for untyped columns
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+async def estimate_count(db: AsyncSession, statement: Select) -> int:
+    """Rows the planner expects the statement to return, without running it"""
+    plan = await explain(db, statement.order_by(None).limit(None).offset(None))
+    return int(plan.get("Plan Rows", 0))
@@ -0,0 +1,97 @@
+"""
+Streaming file storage
+
+Uploads are copied in fixed-size chunks in a worker thread and hashed on
+the way, so a scanned 20 MB PDF never sits in memory whole and the event
+loop never waits on the disk. Files are written to a temporary name and
+renamed into place once complete: readers see the old file or the new
+one, never a partial write.
+"""
+import asyncio
+import hashlib
+import os
+import uuid
+from typing import BinaryIO, NamedTuple
+
+from fastapi import UploadFile
+
+from app.core.exceptions import BadRequestError, PayloadTooLargeError
+
+# Bytes read and written per step
+CHUNK_SIZE = 1024 * 1024
+
+# Start of every PDF file
+PDF_MAGIC = b"%PDF-"
+
+
+class StoredFile(NamedTuple):
+    path: str
+    size: int
+    sha256: str
+
+
+def _temp_path(path: str) -> str:
+    return f"{path}.{uuid.uuid4().hex}.tmp"
+
+
+def _copy(source: BinaryIO, max_bytes: int, magic: bytes | None, tmp_path: str) -> tuple[int, str]:
+    digest = hashlib.sha256()
+    size = 0
+    with open(tmp_path, "wb") as target:
+        while chunk := source.read(CHUNK_SIZE):
+            if size == 0 and magic and not chunk.startswith(magic):
+                raise BadRequestError("El contenido del archivo no corresponde al tipo esperado")
+            size += len(chunk)
+            if size > max_bytes:
+                raise PayloadTooLargeError(
+                    f"El archivo supera el tamaño máximo de {max_bytes / (1024 * 1024):.0f} MB"
+                )
+            digest.update(chunk)
+            target.write(chunk)
+    if size == 0:
+        raise BadRequestError("El archivo está vacío")
+    return size, digest.hexdigest()
+
+
+def _write(data: bytes, tmp_path: str) -> tuple[int, str]:
+    with open(tmp_path, "wb") as target:
+        target.write(data)
+    return len(data), hashlib.sha256(data).hexdigest()
+
+
+async def _replace_with(path: str, fill, *args) -> StoredFile:
+    """Run fill(*args, tmp_path) in a thread, then rename the temporary file to path"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = _temp_path(path)
+    try:
+        size, sha256 = await asyncio.to_thread(fill, *args, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return StoredFile(path, size, sha256)
+
+
+async def save_upload(
+    file: UploadFile, path: str, max_bytes: int, magic: bytes | None = None
+) -> StoredFile:
+    """
+    Stream an upload to path, replacing any previous file atomically
+
+    Args:
+        file: Uploaded file
+        path: Destination path
+        max_bytes: Largest accepted size, PayloadTooLargeError above it
+        magic: Required first bytes of the content (e.g. PDF_MAGIC)
+
+    Returns:
+        StoredFile with the size and SHA-256 of what was written
+    """
+    await file.seek(0)
+    return await _replace_with(path, _copy, file.file, max_bytes, magic)
+
+
+async def write_bytes(path: str, data: bytes) -> StoredFile:
+    """Write generated content to path atomically, off the event loop"""
+    return await _replace_with(path, _write, data)
@@ -1,9 +1,54 @@
+import base64
+import logging
 import math
+import uuid
+from datetime import datetime
+from typing import Literal
 
-from sqlalchemy import Select, func, select
+from sqlalchemy import Select, func, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.schemas.common import PaginatedResponse
+from app.config import settings
+from app.core.count_cache import get_cached_count, set_cached_count
+from app.core.exceptions import BadRequestError
+from app.schemas.common import CursorPaginatedResponse, PaginatedResponse
+from app.utils.explain import estimate_count
+
+logger = logging.getLogger(__name__)
+
+# How paginate_cursor computes the total: skip it, planner estimate or count(*)
+TotalMode = Literal["none", "estimate", "exact"]
+
+
+async def _count(db: AsyncSession, query: Select) -> tuple[int, bool]:
+    """
+    Total of a list query, (total, is_estimate)
+
+    The total is cached in Redis until a table the query reads is written.
+    On a miss, queries the planner expects to match more than
+    PAGINATION_ESTIMATE_THRESHOLD rows report that estimate instead of
+    scanning them with count(*).
+    """
+    key = None
+    try:
+        key, cached = await get_cached_count(query)
+        if cached is not None:
+            return cached
+    except Exception as e:
+        logger.warning(f"Could not read cached count: {str(e)}")
+
+    total = await estimate_count(db, query)
+    is_estimate = total > settings.PAGINATION_ESTIMATE_THRESHOLD
+    if not is_estimate:
+        count_query = select(func.count()).select_from(query.order_by(None).subquery())
+        total = (await db.execute(count_query)).scalar() or 0
+
+    if key:
+        try:
+            await set_cached_count(key, total, is_estimate, settings.PAGINATION_COUNT_CACHE_TTL)
+        except Exception as e:
+            logger.warning(f"Could not store cached count: {str(e)}")
+    return total, is_estimate
 
 
 async def paginate(
@@ -11,11 +56,23 @@ async def paginate(
     query: Select,
     page: int = 1,
     page_size: int = 20,
+    cached_count: bool = False,
 ) -> PaginatedResponse:
+    """
+    Offset pagination
+
+    Args:
+        cached_count: Take the total from the count cache / planner estimate
+            (see _count) instead of running count(*) on every page
+    """
     # Count total
-    count_query = select(func.count()).select_from(query.subquery())
-    total_result = await db.execute(count_query)
-    total = total_result.scalar() or 0
+    total_is_estimate = False
+    if cached_count:
+        total, total_is_estimate = await _count(db, query)
+    else:
+        count_query = select(func.count()).select_from(query.subquery())
+        total_result = await db.execute(count_query)
+        total = total_result.scalar() or 0
 
     # Get items
     offset = (page - 1) * page_size
@@ -31,4 +88,72 @@ async def paginate(
         page=page,
         page_size=page_size,
         total_pages=total_pages,
+        total_is_estimate=total_is_estimate,
+    )
+
+
+def encode_cursor(created_at: datetime, item_id: uuid.UUID) -> str:
+    raw = f"{created_at.isoformat()}|{item_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, item_id = raw.split("|")
+        return datetime.fromisoformat(created_at), uuid.UUID(item_id)
+    except ValueError:
+        raise BadRequestError("Cursor de paginación inválido")
+
+
+async def paginate_cursor(
+    db: AsyncSession,
+    query: Select,
+    model: type,
+    cursor: str | None = None,
+    page_size: int = 20,
+    total: TotalMode = "none",
+) -> CursorPaginatedResponse:
+    """
+    Keyset pagination on (created_at, id), newest first
+
+    Each page seeks straight to the cursor through the (created_at, id)
+    index, so deep pages cost the same as the first one. The query's own
+    ORDER BY is replaced. Pass the returned next_cursor to get the next
+    page; it is None on the last page.
+
+    Args:
+        query: Filtered select of model
+        model: Mapped class with created_at and id columns
+        cursor: next_cursor of the previous page, None for the first page
+        total: "none" to skip counting, "estimate" for the planner's row
+            estimate (no scan) or "exact" for count(*)
+    """
+    total_value = None
+    if total == "exact":
+        result = await db.execute(select(func.count()).select_from(query.order_by(None).subquery()))
+        total_value = result.scalar() or 0
+    elif total == "estimate":
+        total_value = await estimate_count(db, query)
+
+    page_query = query.order_by(None).order_by(model.created_at.desc(), model.id.desc())
+    if cursor:
+        created_at, item_id = decode_cursor(cursor)
+        page_query = page_query.where(tuple_(model.created_at, model.id) < tuple_(created_at, item_id))
+
+    # One extra row tells whether there is a next page
+    result = await db.execute(page_query.limit(page_size + 1))
+    items = list(result.scalars().all())
+
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        next_cursor = encode_cursor(items[-1].created_at, items[-1].id)
+
+    return CursorPaginatedResponse(
+        items=items,
+        page_size=page_size,
+        next_cursor=next_cursor,
+        total=total_value,
+        total_is_estimate=total == "estimate",
     )
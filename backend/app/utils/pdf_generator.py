@@ -1,4 +1,6 @@
+from functools import lru_cache
 from io import BytesIO
+from xml.sax.saxutils import escape
 
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
@@ -147,3 +149,131 @@ def generate_instalacion_pdf(instalacion, plan) -> bytes:
     doc.build(story)
     buffer.seek(0)
     return buffer.getvalue()
+
+
+# Label/value tables shared by every invoice
+_INFO_TABLE_STYLE = TableStyle(
+    [
+        ("BACKGROUND", (0, 0), (0, -1), colors.lightgrey),
+        ("FONTNAME", (0, 0), (0, -1), "Helvetica-Bold"),
+        ("GRID", (0, 0), (-1, -1), 1, colors.black),
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+    ]
+)
+
+# Invoice lines: header row, description and the subtotal/IVA/total rows
+_LINES_TABLE_STYLE = TableStyle(
+    [
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#0066cc")),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("ALIGN", (1, 0), (1, -1), "RIGHT"),
+        ("GRID", (0, 0), (-1, 1), 1, colors.black),
+        ("FONTNAME", (0, -1), (-1, -1), "Helvetica-Bold"),
+        ("LINEABOVE", (0, -1), (-1, -1), 1, colors.black),
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+    ]
+)
+
+
+@lru_cache(maxsize=1)
+def factura_styles() -> dict[str, ParagraphStyle]:
+    """Paragraph styles for invoices, built once per process"""
+    styles = getSampleStyleSheet()
+    return {
+        "title": ParagraphStyle(
+            "FacturaTitle",
+            parent=styles["Heading1"],
+            fontSize=20,
+            textColor=colors.HexColor("#0066cc"),
+            spaceAfter=12,
+            alignment=2,
+        ),
+        "company": ParagraphStyle("FacturaCompany", parent=styles["Heading2"], spaceAfter=2),
+        "small": ParagraphStyle("FacturaSmall", parent=styles["Normal"], fontSize=8, leading=10),
+        "heading": styles["Heading3"],
+        "normal": styles["Normal"],
+    }
+
+
+def _money(moneda: str, value) -> str:
+    return f"{moneda} {value:,.2f}"
+
+
+def generate_factura_pdf(factura: dict, empresa: dict) -> bytes:
+    """
+    Generate an invoice PDF
+
+    Takes plain dicts (see factura_pdf_data and empresa_pdf_data in
+    app.services.factura_pdfs) so it can run in a worker process. Text is
+    escaped here, the dicts hold raw values.
+    """
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=letter,
+        title=f"Factura {factura['numero_factura']}",
+        author=empresa["company_name"],
+    )
+    styles = factura_styles()
+    story = []
+
+    # Company header
+    story.append(Paragraph(escape(empresa["company_name"]), styles["company"]))
+    for line in empresa["lineas"]:
+        story.append(Paragraph(escape(line), styles["small"]))
+    story.append(Paragraph(f"Factura {escape(factura['numero_factura'])}", styles["title"]))
+
+    story.append(
+        Table(
+            [
+                ["Fecha de Emisión:", factura["fecha_emision"].strftime("%d/%m/%Y")],
+                ["Fecha de Vencimiento:", factura["fecha_vencimiento"].strftime("%d/%m/%Y")],
+                ["Periodo:", factura["periodo"]],
+                ["Contrato:", factura["numero_contrato"]],
+            ],
+            colWidths=[2.5 * inch, 4 * inch],
+            style=_INFO_TABLE_STYLE,
+        )
+    )
+    story.append(Spacer(1, 0.3 * inch))
+
+    # Client
+    story.append(Paragraph("<b>CLIENTE</b>", styles["heading"]))
+    client_data = [
+        ["Nombre:", factura["cliente_nombre"]],
+        ["Identificación:", factura["cliente_identificacion"]],
+    ]
+    if factura["cliente_email"]:
+        client_data.append(["Email:", factura["cliente_email"]])
+    if factura["cliente_telefono"]:
+        client_data.append(["Teléfono:", factura["cliente_telefono"]])
+    if factura["cliente_direccion"]:
+        client_data.append(["Dirección:", Paragraph(escape(factura["cliente_direccion"]), styles["normal"])])
+    story.append(Table(client_data, colWidths=[2.5 * inch, 4 * inch], style=_INFO_TABLE_STYLE))
+    story.append(Spacer(1, 0.3 * inch))
+
+    # Lines
+    moneda = factura["moneda"]
+    story.append(Paragraph("<b>DETALLE</b>", styles["heading"]))
+    story.append(
+        Table(
+            [
+                ["Descripción", "Monto"],
+                [Paragraph(escape(factura["descripcion"]), styles["normal"]), _money(moneda, factura["subtotal"])],
+                ["Subtotal", _money(moneda, factura["subtotal"])],
+                ["IVA (13%)", _money(moneda, factura["impuesto"])],
+                ["Total", _money(moneda, factura["total"])],
+            ],
+            colWidths=[5 * inch, 1.5 * inch],
+            style=_LINES_TABLE_STYLE,
+        )
+    )
+
+    if factura["notas"]:
+        story.append(Spacer(1, 0.3 * inch))
+        story.append(Paragraph("<b>NOTAS:</b>", styles["heading"]))
+        story.append(Paragraph(escape(factura["notas"]), styles["normal"]))
+
+    doc.build(story)
+    return buffer.getvalue()
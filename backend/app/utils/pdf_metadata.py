@@ -0,0 +1,70 @@
+"""
+PDF metadata and thumbnail extraction
+
+Runs in the PDF worker processes (see app.services.pdf_pool). pypdf and
+Pillow are imported there only, the API process never parses documents.
+Workers get a storage key and read the file themselves, from disk or a
+temporary download, so documents are never held in (or pickled between)
+processes as a whole.
+"""
+import os
+from io import BytesIO
+
+# Longest side of the thumbnails, in pixels
+THUMBNAIL_SIZE = 256
+
+# Info dictionary entries kept as metadata
+_INFO_KEYS = {
+    "/Title": "titulo",
+    "/Author": "autor",
+    "/Creator": "creador",
+    "/Producer": "productor",
+    "/CreationDate": "fecha_creacion",
+}
+
+
+def extract_pdf_metadata(path: str) -> tuple[int, dict, bytes | None]:
+    """
+    Page count, metadata and JPEG thumbnail of a PDF
+
+    The thumbnail is the largest image of the first page, which for scanned
+    documents (signed contracts) is the page itself. Documents without
+    images, e.g. generated ones, get no thumbnail.
+    """
+    from PIL import Image
+    from pypdf import PdfReader
+
+    # pypdf seeks in the file, only the objects it needs are read
+    with open(path, "rb") as f:
+        reader = PdfReader(f)
+        metadatos = {"version": reader.pdf_header.removeprefix("%PDF-")}
+        info = reader.metadata or {}
+        for key, name in _INFO_KEYS.items():
+            value = info.get(key)
+            if value:
+                metadatos[name] = str(value)
+
+        thumbnail = None
+        if reader.pages:
+            images = list(reader.pages[0].images)
+            if images:
+                largest = max(images, key=lambda image: image.image.width * image.image.height)
+                picture = largest.image.convert("RGB")
+                picture.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE), Image.Resampling.LANCZOS)
+                buffer = BytesIO()
+                picture.save(buffer, format="JPEG", quality=80)
+                thumbnail = buffer.getvalue()
+
+        return len(reader.pages), metadatos, thumbnail
+
+
+def extract_stored_pdf_metadata(key: str) -> tuple[int, dict, bytes | None]:
+    """extract_pdf_metadata for a stored document, given its storage key"""
+    # Imported here: only the worker processes need the storage backend
+    from app.services.storage import storage
+
+    if os.path.isabs(key):
+        # Written before the storage backends existed
+        return extract_pdf_metadata(key)
+    with storage.local_copy(key) as path:
+        return extract_pdf_metadata(path)
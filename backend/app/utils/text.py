@@ -0,0 +1,22 @@
+import re
+import unicodedata
+
+
+def to_ascii(text: str) -> str:
+    """Strip accents (á → a, ñ → n, ü → u) and drop any other non-ASCII character"""
+    # Normalize unicode characters (decompose accents)
+    normalized = unicodedata.normalize('NFD', text)
+    # Remove combining characters (accents)
+    ascii_text = ''.join(char for char in normalized if unicodedata.category(char) != 'Mn')
+    # Keep only ASCII printable characters
+    return ''.join(char for char in ascii_text if ord(char) < 128)
+
+
+def normalize_search(text: str) -> str:
+    """Search form of a text: ASCII, lowercase, single spaces"""
+    return re.sub(r"\s+", " ", to_ascii(text).lower()).strip()
+
+
+def build_search_text(*parts: str | None) -> str:
+    """Normalized concatenation of the non-empty parts, for trigram indexes"""
+    return normalize_search(" ".join(part for part in parts if part))